@@ -1,11 +1,38 @@
 import os
 import json
 
+try:
+    import ijson  # optional streaming parser; json.load is used otherwise
+except ImportError:
+    ijson = None
+try:
+    import orjson  # optional fast encoder; json.dump is used otherwise
+except ImportError:
+    orjson = None
+
+
 def load_json(file_path: str):
     with open(file_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
+def iter_json_entries(file_path: str):
+    """Yield the entries of a top-level JSON array one at a time (streamed with ijson when available)."""
+    if ijson is not None:
+        with open(file_path, "rb") as f:
+            try:
+                yield from ijson.items(f, "item", use_float=True)
+            except ijson.JSONError as e:
+                # yajl messages span several lines; keep the first, like json's one-liners
+                raise ValueError(str(e).splitlines()[0]) from None
+        return
+    with open(file_path, "r", encoding="utf-8") as f:
+        yield from json.load(f)
+
 def save_json(data, file_path: str):
+    if orjson is not None:
+        with open(file_path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
@@ -13,25 +40,38 @@ def filter_by_state_codes(input_folder: str, output_base_folder: str, state_key:
     if not os.path.exists(output_base_folder):
         os.makedirs(output_base_folder)
 
-    for code in state_codes:
-        os.makedirs(os.path.join(output_base_folder, code), exist_ok=True)
+    # Each code once (order kept); membership tests below are O(1) lookups
+    codes = list(dict.fromkeys(state_codes))
+    # Code folders are created on their first write, so codes without matches leave none
+    created_dirs = set()
 
-    for file_name in os.listdir(input_folder):
-        if file_name.endswith(".json"):
-            input_path = os.path.join(input_folder, file_name)
-            print(f"\n🔍 Processing: {file_name}")
-            try:
-                data = load_json(input_path)
-            except Exception as e:
-                print(f"⚠️ Failed to load {file_name}: {e}")
-                continue
-
-            for code in state_codes:
-                filtered = [entry for entry in data if entry.get(state_key) == code]
-                if filtered:
-                    output_path = os.path.join(output_base_folder, code, file_name)
-                    save_json(filtered, output_path)
-                    print(f"✔ Saved {len(filtered):>4} entries → {code}/{file_name}")
+    with os.scandir(input_folder) as it:
+        json_files = [dir_entry.name for dir_entry in it
+                      if dir_entry.name.endswith(".json") and dir_entry.is_file()]
+    for file_name in json_files:
+        input_path = os.path.join(input_folder, file_name)
+        print(f"\n🔍 Processing: {file_name}")
+        # One streamed pass per file, dispatching each entry to its code's bucket
+        buckets = {code: [] for code in codes}
+        try:
+            for entry in iter_json_entries(input_path):
+                value = entry.get(state_key)
+                # Only scalar keys can match a code (and be hashed safely)
+                bucket = buckets.get(value) if isinstance(value, (str, int)) else None
+                if bucket is not None:
+                    bucket.append(entry)
+        except Exception as e:
+            print(f"⚠️ Failed to load {file_name}: {e}")
+            continue
+
+        for code, filtered in buckets.items():
+            if filtered:
+                if code not in created_dirs:
+                    os.makedirs(os.path.join(output_base_folder, code), exist_ok=True)
+                    created_dirs.add(code)
+                output_path = os.path.join(output_base_folder, code, file_name)
+                save_json(filtered, output_path)
+                print(f"✔ Saved {len(filtered):>4} entries → {code}/{file_name}")
 
 if __name__ == "__main__":
     input_folder = r"C:\Users\jo73vure\Desktop\powerPlantProject\data\active_json"
@@ -1,13 +1,51 @@
 import os
 import json
+import mmap
+from contextlib import ExitStack, contextmanager
+
+try:
+    import orjson  # optional, much faster encode/decode; stdlib json otherwise
+except ImportError:
+    orjson = None
 
 def load_json(file_path: str):
+    if orjson is not None:
+        # Parse straight from the memory-mapped file: no extra bytes copy of it
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as buf:
+                return orjson.loads(buf)
     with open(file_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
-def save_json(data, file_path: str):
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+@contextmanager
+def streamed_outputs():
+    """
+    Yield open_output(path, mode, **kwargs), which opens `path + ".part"` for writing.
+    When the block completes, the part files are closed and renamed onto their paths;
+    if it raises, they are deleted instead, so no truncated JSON is ever left behind.
+    """
+    parts = []
+    with ExitStack() as stack:
+        def open_output(path: str, mode: str = "wb", **kwargs):
+            f = stack.enter_context(open(path + ".part", mode, **kwargs))
+            parts.append(path)
+            return f
+        try:
+            yield open_output
+        except BaseException:
+            stack.close()
+            for path in parts:
+                if os.path.exists(path + ".part"):
+                    os.remove(path + ".part")
+            raise
+    for path in parts:
+        os.replace(path + ".part", path)
+
+def dumps_entry(entry) -> str:
+    """Compact one-line JSON for an entry (non-ASCII kept as UTF-8)."""
+    if orjson is not None:
+        return orjson.dumps(entry, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    return json.dumps(entry, ensure_ascii=False)
 
 def extract_state_prefix(gemeindeschluessel: str):
     if isinstance(gemeindeschluessel, str) and len(gemeindeschluessel) >= 2:
@@ -18,30 +56,50 @@ def filter_by_state_prefix(input_folder: str, output_base_folder: str):
     if not os.path.exists(output_base_folder):
         os.makedirs(output_base_folder)
 
-    for file_name in os.listdir(input_folder):
-        if file_name.endswith(".json"):
-            input_path = os.path.join(input_folder, file_name)
-            print(f"\n🔍 Processing: {file_name}")
-            try:
-                data = load_json(input_path)
-            except Exception as e:
-                print(f"⚠️ Failed to load {file_name}: {e}")
-                continue
+    # DirEntry gives name and path from the directory read, without extra stat() calls
+    with os.scandir(input_folder) as it:
+        json_entries = [e for e in it if e.name.endswith(".json")]
 
-            state_buckets = {}
+    for dir_entry in json_entries:
+        file_name = dir_entry.name
+        input_path = dir_entry.path
+        print(f"\n🔍 Processing: {file_name}")
+        try:
+            data = load_json(input_path)
+        except Exception as e:
+            print(f"⚠️ Failed to load {file_name}: {e}")
+            continue
 
+        # Stream each entry straight into its prefix's output array (one open
+        # handle per prefix) instead of buffering per-state lists in memory.
+        saved_counts = {}
+        with streamed_outputs() as open_output:
+            handles = {}
             for entry in data:
                 gkey = entry.get("Gemeindeschluessel", "")
                 prefix = extract_state_prefix(gkey)
-                if prefix:
-                    state_buckets.setdefault(prefix, []).append(entry)
-
-            for prefix, entries in state_buckets.items():
-                output_folder = os.path.join(output_base_folder, prefix)
-                os.makedirs(output_folder, exist_ok=True)
-                output_path = os.path.join(output_folder, file_name)
-                save_json(entries, output_path)
-                print(f"✔ Saved {len(entries):>4} entries → {prefix}/{file_name}")
+                if not prefix:
+                    continue
+
+                out = handles.get(prefix)
+                if out is None:
+                    output_folder = os.path.join(output_base_folder, prefix)
+                    os.makedirs(output_folder, exist_ok=True)
+                    output_path = os.path.join(output_folder, file_name)
+                    out = open_output(output_path, "w", encoding="utf-8")
+                    out.write("[\n")
+                    handles[prefix] = out
+                    saved_counts[prefix] = 0
+                else:
+                    out.write(",\n")
+                out.write(dumps_entry(entry))
+                saved_counts[prefix] += 1
+
+            for out in handles.values():
+                out.write("\n]\n")
+
+        for prefix, count in saved_counts.items():
+            print(f"✔ Saved {count:>4} entries → {prefix}/{file_name}")
 
 if __name__ == "__main__":
     input_folder = r"C:\Users\jo73vure\Desktop\powerPlantProject\data\active_json"
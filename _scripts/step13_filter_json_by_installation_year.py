@@ -1,6 +1,18 @@
 import os
 import json
-from typing import Optional
+import mmap
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, FrozenSet, List, Optional
+
+try:
+    import orjson  # optional, much faster encode/decode; stdlib json otherwise
+except ImportError:
+    orjson = None
+
+WORKERS = os.cpu_count() or 1  # processes used to split input files; 1 = serial
+MMAP_MIN_BYTES = 1 << 20  # smaller inputs are read in one call; mapping them costs more than it saves
 
 def extract_year(date_str: str) -> Optional[str]:
     if isinstance(date_str, str) and len(date_str) >= 4:
@@ -10,42 +22,84 @@ def extract_year(date_str: str) -> Optional[str]:
     return None
 
 def load_json(file_path: str):
+    if orjson is not None:
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < MMAP_MIN_BYTES:
+                return orjson.loads(f.read())
+            # Parse straight from the memory-mapped file: no extra bytes copy of it
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as buf:
+                return orjson.loads(buf)
     with open(file_path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 def save_json(data, file_path: str):
+    if orjson is not None:
+        with open(file_path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
     with open(file_path, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
-def filter_by_installation_years(input_folder: str, output_base_folder: str, year_key: str = "Inbetriebnahmedatum"):
-    # Create output directories for years between 1900 and 2025
-    valid_years = [str(y) for y in range(1900, 2026)]
-    for year in valid_years:
-        os.makedirs(os.path.join(output_base_folder, year), exist_ok=True)
-
-    for file_name in os.listdir(input_folder):
-        if file_name.endswith(".json"):
-            input_path = os.path.join(input_folder, file_name)
-            print(f"\n🔍 Processing: {file_name}")
-            try:
-                data = load_json(input_path)
-            except Exception as e:
-                print(f"⚠️ Failed to load {file_name}: {e}")
-                continue
-
-            year_groups = {year: [] for year in valid_years}
-
-            for entry in data:
-                raw_date = entry.get(year_key)
-                year = extract_year(raw_date)
-                if year in valid_years:
-                    year_groups[year].append(entry)
-
-            for year, entries in year_groups.items():
-                if entries:
-                    output_path = os.path.join(output_base_folder, year, file_name)
-                    save_json(entries, output_path)
-                    print(f"✔ Saved {len(entries):>4} entries → {year}/{file_name}")
+def split_file_by_year(input_path: str, output_base_folder: str, year_key: str, valid_years: FrozenSet[str]):
+    """
+    Write the entries of one input file into <year>/<file_name> per valid year.
+    Returns {year: entries saved} in year order, or the exception raised while loading the file.
+    """
+    file_name = os.path.basename(input_path)
+    try:
+        data = load_json(input_path)
+    except Exception as e:
+        return e
+
+    # Groups only for the years that occur, not one empty list per valid year
+    year_groups: Dict[str, List[dict]] = defaultdict(list)
+
+    for entry in data:
+        year = extract_year(entry.get(year_key))
+        if year in valid_years:
+            year_groups[year].append(entry)
+
+    saved: Dict[str, int] = {}
+    for year in sorted(year_groups):
+        entries = year_groups[year]
+        # Year folders are created on first use, so years without entries leave none behind
+        year_folder = os.path.join(output_base_folder, year)
+        os.makedirs(year_folder, exist_ok=True)
+        output_path = os.path.join(year_folder, file_name)
+        save_json(entries, output_path)
+        saved[year] = len(entries)
+    return saved
+
+def map_files(func, paths: List[str], max_workers: int = WORKERS):
+    """Yield func(path) for each path in input order; several files run in a process pool when max_workers > 1."""
+    if max_workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers) as pool:
+            yield from pool.map(func, paths)
+        return
+    yield from map(func, paths)
+
+def filter_by_installation_years(input_folder: str, output_base_folder: str, year_key: str = "Inbetriebnahmedatum",
+                                 max_workers: int = WORKERS):
+    # Years between 1900 and 2025; their output folders are created only when needed
+    valid_years = frozenset(str(y) for y in range(1900, 2026))
+    os.makedirs(output_base_folder, exist_ok=True)
+
+    with os.scandir(input_folder) as it:
+        file_names = [dir_entry.name for dir_entry in it
+                      if dir_entry.name.endswith(".json") and dir_entry.is_file()]
+    input_paths = [os.path.join(input_folder, file_name) for file_name in file_names]
+
+    # Files are independent: split them in a process pool, reporting in input order
+    split = partial(split_file_by_year, output_base_folder=output_base_folder,
+                    year_key=year_key, valid_years=valid_years)
+    for file_name, result in zip(file_names, map_files(split, input_paths, max_workers)):
+        # One print per file: the report lines are joined instead of printed one by one
+        lines = [f"\n🔍 Processing: {file_name}"]
+        if isinstance(result, Exception):
+            lines.append(f"⚠️ Failed to load {file_name}: {result}")
+        else:
+            lines.extend(f"✔ Saved {count:>4} entries → {year}/{file_name}" for year, count in result.items())
+        print("\n".join(lines))
 
 if __name__ == "__main__":
     input_folder = r"C:\Users\jo73vure\Desktop\powerPlantProject\data\active_json"
@@ -2,6 +2,7 @@
 import os
 import json
 from typing import Dict, Optional
+import shapely
 from shapely.geometry import shape, MultiPolygon, Polygon, Point
 
 # ========== CONFIG ==========
@@ -103,6 +104,7 @@ def load_state_polygons(geojson_path: str) -> Dict[str, MultiPolygon]:
             geom = MultiPolygon([geom])
         if not isinstance(geom, MultiPolygon):
             continue
+        shapely.prepare(geom)
         out[normalize_state_name(state_name)] = geom
     return out
 
@@ -21,6 +21,9 @@ import os
 import json
 from collections import defaultdict
 from typing import Dict, Optional, Tuple, List
+
+import numpy as np
+import shapely
 from shapely.geometry import shape, MultiPolygon, Polygon, Point
 from shapely.prepared import prep
 
@@ -131,8 +134,8 @@ def save_json(data, path: str):
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
-def parse_point(entry: dict, lon_key: str = LON_FIELD, lat_key: str = LAT_FIELD) -> Optional[Point]:
-    """Parse lon/lat strings with dot or comma decimals. Return shapely Point or None if invalid."""
+def parse_xy(entry: dict, lon_key: str = LON_FIELD, lat_key: str = LAT_FIELD) -> Optional[Tuple[float, float]]:
+    """Parse lon/lat strings with dot or comma decimals. Return (lon, lat) or None if invalid."""
     try:
         lon_raw = entry.get(lon_key, "")
         lat_raw = entry.get(lat_key, "")
@@ -140,7 +143,7 @@ def parse_point(entry: dict, lon_key: str = LON_FIELD, lat_key: str = LAT_FIELD)
         lat = float(str(lat_raw).replace(",", "."))
         if not (-90 <= lat <= 90 and -180 <= lon <= 180):
             return None
-        return Point(lon, lat)
+        return lon, lat
     except Exception:
         return None
 
@@ -168,16 +171,25 @@ def load_state_polygons(geojson_path: str) -> Tuple[Dict[str, MultiPolygon], Dic
         if not isinstance(geom, MultiPolygon):
             continue
         key = normalize_state_name(state_name)
+        shapely.prepare(geom)  # in place: stays a MultiPolygon, covers() reuses the GEOS index
         polygons_by_norm[key] = geom
         pretty_by_norm[key] = state_name
     return polygons_by_norm, pretty_by_norm
 
-def polygon_state_of_point(point: Point, polygons_by_norm: Dict[str, MultiPolygon]) -> Optional[str]:
-    """Return normalized state name whose polygon covers the point."""
+def states_of_points(xs: np.ndarray, ys: np.ndarray, polygons_by_norm: Dict[str, MultiPolygon]) -> np.ndarray:
+    """
+    Normalized state name whose polygon covers each point, or None (NaN = unparsed, never matches).
+    One intersects_xy call per state (same as covers for points); the first state in dict order wins.
+    """
+    state_of = np.full(len(xs), None, dtype=object)
+    open_idx = np.arange(len(xs))
     for norm_name, mp in polygons_by_norm.items():
-        if mp.covers(point):
-            return norm_name
-    return None
+        if not open_idx.size:
+            break
+        hit = shapely.intersects_xy(mp, xs[open_idx], ys[open_idx])
+        state_of[open_idx[hit]] = norm_name
+        open_idx = open_idx[~hit]
+    return state_of
 
 def bl_code_to_norm_name(code: str) -> Optional[str]:
     if code is None:
@@ -239,13 +251,16 @@ def filter_json_by_state_three_checks(
         # Local buckets for this source file
         buckets: Dict[str, List[dict]] = defaultdict(list)
 
-        for entry in data:
+        # Resolve the polygon state of every entry in one batch per state
+        coords = [parse_xy(entry) for entry in data]
+        xy = np.array([c if c is not None else (np.nan, np.nan) for c in coords], dtype=np.float64).reshape(-1, 2)
+        state_of = states_of_points(xy[:, 0], xy[:, 1], polygons_by_norm)
+
+        for entry, c, poly_state_norm in zip(data, coords, state_of):
             total_entries += 1
-            pt = parse_point(entry)
-            if pt is None:
+            if c is None:
                 continue
 
-            poly_state_norm = polygon_state_of_point(pt, polygons_by_norm)
             if not poly_state_norm:
                 dropped_no_poly += 1
                 continue
@@ -262,7 +277,7 @@ def filter_json_by_state_three_checks(
 
             if poly_state_norm == bl_norm == gs_norm:
                 # NEW (4th check): must also match at least one Landkreis polygon
-                if not has_any_landkreis_match(pt, prepared_l2):
+                if not has_any_landkreis_match(Point(c), prepared_l2):
                     dropped_no_landkreis += 1
                     continue
 
@@ -17,6 +17,8 @@ import json
 from collections import defaultdict
 from typing import Dict, Optional, Tuple, List
 
+import numpy as np
+import shapely
 from shapely.geometry import shape, MultiPolygon, Polygon, Point
 from shapely.prepared import prep
 
@@ -89,13 +91,13 @@ def save_json(data, path: str):
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
-def parse_point(entry: dict) -> Optional[Point]:
+def parse_xy(entry: dict) -> Optional[Tuple[float, float]]:
     try:
         lon = float(str(entry.get(LON_FIELD, "")).replace(",", "."))
         lat = float(str(entry.get(LAT_FIELD, "")).replace(",", "."))
         if not (-90 <= lat <= 90 and -180 <= lon <= 180):
             return None
-        return Point(lon, lat)
+        return lon, lat
     except Exception:
         return None
 
@@ -122,15 +124,22 @@ def load_state_polygons(geojson_path: str):
         if not isinstance(geom, MultiPolygon):
             continue
         key = normalize_state_name(name)
+        shapely.prepare(geom)
         polygons_by_norm[key] = geom
         pretty_by_norm[key] = name
     return polygons_by_norm, pretty_by_norm
 
-def polygon_state_of_point(pt: Point, polygons_by_norm: Dict[str, MultiPolygon]) -> Optional[str]:
+def states_of_points(xs: np.ndarray, ys: np.ndarray, polygons_by_norm: Dict[str, MultiPolygon]) -> np.ndarray:
+    # State covering each point (None if none); intersects_xy == covers for points, first state in dict order wins
+    state_of = np.full(len(xs), None, dtype=object)
+    open_idx = np.arange(len(xs))
     for norm, mp in polygons_by_norm.items():
-        if mp.covers(pt):
-            return norm
-    return None
+        if not open_idx.size:
+            break
+        hit = shapely.intersects_xy(mp, xs[open_idx], ys[open_idx])
+        state_of[open_idx[hit]] = norm
+        open_idx = open_idx[~hit]
+    return state_of
 
 def bl_code_to_norm_name(code: str) -> Optional[str]:
     if code is None:
@@ -224,13 +233,16 @@ def filter_json_by_state_year_four_checks(
         # Buckets for this source file
         buckets: Dict[str, Dict[str, List[dict]]] = defaultdict(lambda: defaultdict(list))
 
-        for entry in data:
+        # Resolve the polygon state of every entry in one batch per state
+        coords = [parse_xy(entry) for entry in data]
+        xy = np.array([c if c is not None else (np.nan, np.nan) for c in coords], dtype=np.float64).reshape(-1, 2)
+        state_of = states_of_points(xy[:, 0], xy[:, 1], polygons_by_norm)
+
+        for entry, c, poly_state_norm in zip(data, coords, state_of):
             total_entries += 1
-            pt = parse_point(entry)
-            if pt is None:
+            if c is None:
                 continue
 
-            poly_state_norm = polygon_state_of_point(pt, polygons_by_norm)
             if not poly_state_norm:
                 dropped_no_poly += 1
                 continue
@@ -247,7 +259,7 @@ def filter_json_by_state_year_four_checks(
 
             if poly_state_norm == bl_norm == gs_norm:
                 # NEW 4th check gate
-                if not has_any_landkreis_match(pt, prepared_l2):
+                if not has_any_landkreis_match(Point(c), prepared_l2):
                     dropped_no_landkreis += 1
                     continue
 
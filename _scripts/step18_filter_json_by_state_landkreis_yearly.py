@@ -12,11 +12,19 @@ Output structure (keeps original filenames):
 import os
 import re
 import json
+import mmap
 from collections import defaultdict
-from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+from typing import Dict, List, Tuple, Optional, Union
 from shapely.geometry import shape, MultiPolygon, Polygon, Point
 from shapely.prepared import prep
 
+try:
+    import orjson  # optional, much faster encode/decode; stdlib json otherwise
+except ImportError:
+    orjson = None
+
 # ========== CONFIG ==========
 INPUT_FOLDER = r"C:\Users\jo73vure\Desktop\powerPlantProject\data\filtered_json_by_state_yearly_4checks" # by filtering 4-checked data, we ensure consistency. this is already filtered using active json
 OUTPUT_ROOT  = r"C:\Users\jo73vure\Desktop\powerPlantProject\data\filtered_json_by_state_landkreis_yearly"
@@ -24,6 +32,9 @@ GADM_L2_PATH = r"C:\Users\jo73vure\Desktop\powerPlantProject\gadm_data\gadm41_DE
 DATE_FIELD   = "Inbetriebnahmedatum"
 LON_FIELD    = "Laengengrad"
 LAT_FIELD    = "Breitengrad"
+EMPTY_VALUES = (None, "")           # coordinate values that mean "no coordinate"
+WORKERS      = os.cpu_count() or 1  # processes used to filter input files; 1 = serial
+MMAP_MIN_BYTES = 1 << 20            # smaller inputs are read in one call; mapping them costs more than it saves
 # ===========================
 
 BUNDESLAND_CODE_TO_NAME: Dict[str, str] = {
@@ -63,13 +74,18 @@ GS_PREFIX_TO_NAME: Dict[str, str] = {
     "16": "thueringen",
 }
 
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^0-9a-zäöüß \-_.]")
+_UNDERSCORE_RUNS = re.compile(r"_+")
+
+@lru_cache(maxsize=4096)  # the same few state / Landkreis names recur for every entry
 def safe_filename(name: str) -> str:
     name = (name or "").strip().lower()
-    name = name.replace("/", "_").replace("\\", "_")
-    name = re.sub(r"[^0-9a-zäöüß \-_.]", "_", name)
-    name = re.sub(r"_+", "_", name)
+    # "/" and backslash are outside the allowed set, so the first pattern replaces them too
+    name = _UNSAFE_FILENAME_CHARS.sub("_", name)
+    name = _UNDERSCORE_RUNS.sub("_", name)
     return name or "unknown"
 
+@lru_cache(maxsize=4096)
 def normalize_state_name_token(name: str) -> str:
     if not isinstance(name, str):
         return ""
@@ -80,30 +96,62 @@ def normalize_state_name_token(name: str) -> str:
     return s
 
 def load_json(path: str):
+    if orjson is not None:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size < MMAP_MIN_BYTES:
+                return orjson.loads(f.read())
+            # Parse straight from the memory-mapped file: no extra bytes copy of it
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as buf:
+                return orjson.loads(buf)
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 def save_json(data, path: str):
     os.makedirs(os.path.dirname(path), exist_ok=True)
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
     with open(path, "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
+def iter_json_paths(folder: str):
+    """
+    Yield the paths of all .json files below `folder` (recursive, one scandir per directory).
+    Unreadable or missing folders are skipped, as os.walk does.
+    """
+    try:
+        it = os.scandir(folder)
+    except OSError:
+        return
+    with it:
+        for dir_entry in it:
+            if dir_entry.is_dir():
+                yield from iter_json_paths(dir_entry.path)
+            elif dir_entry.name.endswith(".json") and dir_entry.is_file():
+                yield dir_entry.path
+
 def parse_point(entry: dict) -> Optional[Point]:
+    # Numbers are converted directly; only strings need the comma-decimal fix
     try:
-        lon = float(str(entry.get(LON_FIELD, "")).replace(",", "."))
-        lat = float(str(entry.get(LAT_FIELD, "")).replace(",", "."))
-        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
-            return None
-        return Point(lon, lat)
+        lon = entry.get(LON_FIELD)
+        lat = entry.get(LAT_FIELD)
+        lon = float(lon.replace(",", ".") if lon.__class__ is str else lon)
+        lat = float(lat.replace(",", ".") if lat.__class__ is str else lat)
     except Exception:
         return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return Point(lon, lat)
 
 def extract_year(entry: dict, field: str = DATE_FIELD) -> str:
-    val = str(entry.get(field, "") or "").strip()
-    y = val[:4]
-    return y if y.isdigit() and len(y) == 4 else "unknown"
+    val = entry.get(field)
+    if val.__class__ is not str:  # dates are almost always strings already
+        val = str(val) if val else ""
+    y = val.lstrip()[:4]
+    return y if len(y) == 4 and y.isdigit() else "unknown"
 
-def load_gadm_l2(geojson_path: str) -> List[Tuple[str, str, MultiPolygon]]:
+def load_gadm_l2(geojson_path: str) -> List[Tuple[str, str, Union[Polygon, MultiPolygon]]]:
     data = load_json(geojson_path)
     feats = data["features"] if isinstance(data, dict) and "features" in data else data
     out = []
@@ -114,108 +162,169 @@ def load_gadm_l2(geojson_path: str) -> List[Tuple[str, str, MultiPolygon]]:
         if not name_1 or not name_2:
             continue
         geom = shape(feat.get("geometry"))
-        if isinstance(geom, Polygon):
-            geom = MultiPolygon([geom])
-        if not isinstance(geom, MultiPolygon):
+        # GEOS predicates work the same on Polygon and MultiPolygon: no wrapping needed
+        if not isinstance(geom, (Polygon, MultiPolygon)):
             continue
         out.append((name_1, name_2, geom))
     return out
 
+# Prepared L2 polygons of this process, set by init_prepared (pool initializer),
+# plus each polygon's (NAME_1, NAME_2) group id and the names of every group id
+_prepared: List[Tuple[str, str, object]] = []
+_group_of_polygon: List[int] = []
+_group_names: List[Tuple[str, str]] = []
+
+YEAR_BITS = 16
+UNKNOWN_YEAR = (1 << YEAR_BITS) - 1
+
+def init_prepared(l2: List[Tuple[str, str, Union[Polygon, MultiPolygon]]]) -> None:
+    global _prepared, _group_of_polygon, _group_names
+    _prepared = [(name_1, name_2, prep(geom)) for (name_1, name_2, geom) in l2]
+    group_ids: Dict[Tuple[str, str], int] = {}
+    _group_of_polygon = [group_ids.setdefault((name_1, name_2), len(group_ids)) for (name_1, name_2, _) in l2]
+    _group_names = list(group_ids)
+
+def bucket_key(group_id: int, year: str) -> int:
+    """Pack a (State, Landkreis) group id and a 4-digit or "unknown" year into one int."""
+    return (group_id << YEAR_BITS) | (int(year) if year != "unknown" else UNKNOWN_YEAR)
+
+def unpack_bucket_key(key: int) -> Tuple[str, str, str]:
+    """(NAME_1, NAME_2, year) of a bucket_key."""
+    year = key & UNKNOWN_YEAR
+    name_1, name_2 = _group_names[key >> YEAR_BITS]
+    return name_1, name_2, ("unknown" if year == UNKNOWN_YEAR else f"{year:04d}")
+
+def filter_file(fpath: str, output_root: str, date_field: str = DATE_FIELD):
+    """
+    Match, 3-check and write the entries of one input file against the prepared L2 polygons.
+    Returns (counts, saved) with saved = [(relative output path, entries)], or the
+    exception raised while loading the file.
+    """
+    fname = os.path.basename(fpath)
+    try:
+        data = load_json(fpath)
+    except Exception as e:
+        return e
+
+    counts = {
+        "entries_seen": 0,
+        "kept_entries": 0,
+        "dropped_empty_coords": 0,
+        "dropped_no_polygon_match": 0,
+        "dropped_missing_bundesland": 0,
+        "dropped_missing_gemeindeschluessel": 0,
+        "dropped_state_triple_mismatch": 0,
+    }
+
+    # bucket_key(state/landkreis group, year) -> [entries]
+    buckets: Dict[int, List[dict]] = defaultdict(list)
+
+    for entry in data:
+        counts["entries_seen"] += 1
+        # Blank coordinates are common in MaStR: reject them before any parsing
+        if entry.get(LON_FIELD) in EMPTY_VALUES or entry.get(LAT_FIELD) in EMPTY_VALUES:
+            counts["dropped_empty_coords"] += 1
+            continue
+        pt = parse_point(entry)
+        if pt is None:
+            continue
+
+        matched_state = None
+        matched_idx = None
+        for idx, (name_1, _, pgeom) in enumerate(_prepared):
+            if pgeom.context.covers(pt) if hasattr(pgeom, "context") and hasattr(pgeom.context, "covers") else pgeom.contains(pt):
+                matched_state = name_1
+                matched_idx = idx
+                break
+        if not matched_state:
+            counts["dropped_no_polygon_match"] += 1
+            continue
+
+        bl_norm = normalize_state_name_token(BUNDESLAND_CODE_TO_NAME.get(str(entry.get("Bundesland", "")).strip(), ""))
+        if not bl_norm:
+            counts["dropped_missing_bundesland"] += 1
+            continue
+
+        gs_norm = normalize_state_name_token(GS_PREFIX_TO_NAME.get(str(entry.get("Gemeindeschluessel", ""))[:2], ""))
+        if not gs_norm:
+            counts["dropped_missing_gemeindeschluessel"] += 1
+            continue
+
+        if normalize_state_name_token(matched_state) == bl_norm == gs_norm:
+            year = extract_year(entry, date_field)
+            buckets[bucket_key(_group_of_polygon[matched_idx], year)].append(entry)
+            counts["kept_entries"] += 1
+        else:
+            counts["dropped_state_triple_mismatch"] += 1
+
+    # write
+    saved: List[Tuple[str, int]] = []
+    for key, entries in buckets.items():
+        state_name, lkr_name, year = unpack_bucket_key(key)
+        lkr_dir = safe_filename(lkr_name)
+        out_folder = os.path.join(output_root, state_name, lkr_dir, year)
+        os.makedirs(out_folder, exist_ok=True)
+        out_path = os.path.join(out_folder, fname)
+        save_json(entries, out_path)
+        saved.append((f"{state_name}/{lkr_dir}/{year}/{fname}", len(entries)))
+
+    return counts, saved
+
+def iter_filtered_files(json_paths: List[str], l2, output_root: str, date_field: str, max_workers: int = WORKERS):
+    """
+    Yield filter_file results in input order. Several files with max_workers > 1 run
+    in a process pool whose workers prepare the L2 polygons once each.
+    """
+    run = partial(filter_file, output_root=output_root, date_field=date_field)
+    if max_workers > 1 and len(json_paths) > 1:
+        with ProcessPoolExecutor(max_workers, initializer=init_prepared, initargs=(l2,)) as pool:
+            yield from pool.map(run, json_paths)
+        return
+    init_prepared(l2)
+    yield from map(run, json_paths)
+
 def filter_json_by_state_landkreis_yearly(
     input_folder: str,
     output_root: str,
     gadm_l2_path: str,
-    date_field: str = DATE_FIELD
+    date_field: str = DATE_FIELD,
+    max_workers: int = WORKERS,
 ):
     os.makedirs(output_root, exist_ok=True)
 
     l2 = load_gadm_l2(gadm_l2_path)
     if not l2:
         raise RuntimeError("No L2 polygons loaded.")
-    prepared = [(name_1, name_2, prep(geom)) for (name_1, name_2, geom) in l2]
-
-    total_files = 0
-    total_entries = 0
-    kept_entries = 0
-    dropped_mismatch = 0
-    dropped_no_match = 0
-    dropped_missing_bl = 0
-    dropped_missing_gs = 0
-
-    for root, _, files in os.walk(input_folder):
-        for fname in files:
-            if not fname.endswith(".json"):
-                continue
-
-            total_files += 1
-            fpath = os.path.join(root, fname)
-
-            try:
-                data = load_json(fpath)
-            except Exception as e:
-                print(f"⚠️ Could not load {fname}: {e}")
-                continue
-
-            # {state: {landkreis: {year: [entries]}}}
-            buckets: Dict[str, Dict[str, Dict[str, List[dict]]]] = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-
-            for entry in data:
-                total_entries += 1
-                pt = parse_point(entry)
-                if pt is None:
-                    continue
-
-                matched_state = None
-                matched_lk = None
-                for name_1, name_2, pgeom in prepared:
-                    if pgeom.context.covers(pt) if hasattr(pgeom, "context") and hasattr(pgeom.context, "covers") else pgeom.contains(pt):
-                        matched_state = name_1
-                        matched_lk = name_2
-                        break
-                if not matched_state:
-                    dropped_no_match += 1
-                    continue
-
-                bl_norm = normalize_state_name_token(BUNDESLAND_CODE_TO_NAME.get(str(entry.get("Bundesland", "")).strip(), ""))
-                if not bl_norm:
-                    dropped_missing_bl += 1
-                    continue
-
-                gs_norm = normalize_state_name_token(GS_PREFIX_TO_NAME.get(str(entry.get("Gemeindeschluessel", ""))[:2], ""))
-                if not gs_norm:
-                    dropped_missing_gs += 1
-                    continue
-
-                if normalize_state_name_token(matched_state) == bl_norm == gs_norm:
-                    year = extract_year(entry, date_field)
-                    buckets[matched_state][matched_lk][year].append(entry)
-                    kept_entries += 1
-                else:
-                    dropped_mismatch += 1
-
-            # write
-            for state_name, lmap in buckets.items():
-                for lkr_name, years_map in lmap.items():
-                    for year, entries in years_map.items():
-                        out_folder = os.path.join(output_root, state_name, safe_filename(lkr_name), year)
-                        os.makedirs(out_folder, exist_ok=True)
-                        out_path = os.path.join(out_folder, fname)
-                        save_json(entries, out_path)
-                        print(f"✔ Saved {len(entries):>5} entries → {state_name}/{safe_filename(lkr_name)}/{year}/{fname}")
+
+    json_paths = list(iter_json_paths(input_folder))
+
+    totals = {
+        "entries_seen": 0,
+        "kept_entries": 0,
+        "dropped_empty_coords": 0,
+        "dropped_no_polygon_match": 0,
+        "dropped_missing_bundesland": 0,
+        "dropped_missing_gemeindeschluessel": 0,
+        "dropped_state_triple_mismatch": 0,
+    }
+
+    for fpath, result in zip(json_paths, iter_filtered_files(json_paths, l2, output_root, date_field, max_workers)):
+        if isinstance(result, Exception):
+            print(f"⚠️ Could not load {os.path.basename(fpath)}: {result}")
+            continue
+        counts, saved = result
+        for key, value in counts.items():
+            totals[key] += value
+        for rel_path, n in saved:
+            print(f"✔ Saved {n:>5} entries → {rel_path}")
 
     summary = {
-        "files_processed": total_files,
-        "entries_seen": total_entries,
-        "kept_entries": kept_entries,
-        "dropped_no_polygon_match": dropped_no_match,
-        "dropped_missing_bundesland": dropped_missing_bl,
-        "dropped_missing_gemeindeschluessel": dropped_missing_gs,
-        "dropped_state_triple_mismatch": dropped_mismatch,
+        "files_processed": len(json_paths),
+        **totals,
         "output_root": output_root,
         "date_field": date_field,
     }
-    with open(os.path.join(output_root, "_summary.json"), "w", encoding="utf-8") as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2)
+    save_json(summary, os.path.join(output_root, "_summary.json"))
     print("\n====== SUMMARY ======")
     print(json.dumps(summary, ensure_ascii=False, indent=2))
 
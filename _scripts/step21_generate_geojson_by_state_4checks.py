@@ -11,8 +11,10 @@ import re
 from collections import defaultdict
 from typing import Dict, Optional, List, Tuple
 
+import shapely
 from shapely.geometry import shape, MultiPolygon, Polygon, Point
 from shapely.prepared import prep
+from shapely.strtree import STRtree
 
 
 # ========== CONFIG ==========
@@ -125,17 +127,32 @@ def load_state_polygons(geojson_path: str) -> Dict[str, MultiPolygon]:
         if not isinstance(geom, MultiPolygon):
             continue
 
+        shapely.prepare(geom)
         out[normalize_state_name(state_name)] = geom
 
     return out
 
 
-def polygon_state_of_point(point: Point, polygons: Dict[str, MultiPolygon]) -> Optional[str]:
+def build_state_index(polygons: Dict[str, MultiPolygon]) -> Tuple[STRtree, List[str]]:
+    """Build an STRtree over the state polygons plus the parallel list of normalized names."""
+    names = list(polygons)
+    return STRtree([polygons[n] for n in names]), names
+
+
+def polygon_state_of_point(point: Point, polygons: Dict[str, MultiPolygon],
+                           state_index: Optional[Tuple[STRtree, List[str]]] = None) -> Optional[str]:
     """
     Determine which state's polygon covers the point. Returns the *normalized* state name.
     Uses 'covers' so boundary points are included.
+    With a state_index from build_state_index, only bbox candidates are tested.
     """
-    for norm_name, mp in polygons.items():
+    if state_index is None:
+        candidates = polygons.items()
+    else:
+        # bbox candidates only; sorted so shared borders resolve in the same order as the plain scan
+        tree, names = state_index
+        candidates = ((names[i], polygons[names[i]]) for i in sorted(tree.query(point)))
+    for norm_name, mp in candidates:
         if mp.covers(point):
             return norm_name
     return None
@@ -223,6 +240,7 @@ def convert_with_4_checks(
     state_polygons = load_state_polygons(polygon_states_path)
     if not state_polygons:
         raise RuntimeError("No state polygons loaded. Check POLYGON_STATES_PATH and properties.name field.")
+    state_index = build_state_index(state_polygons)
 
     # Load Landkreis polygons once (prepared, step17-style)
     l2 = load_landkreis_polygons(gadm_l2_path)
@@ -268,7 +286,7 @@ def convert_with_4_checks(
                 if pt is None:
                     continue
 
-                poly_state_norm = polygon_state_of_point(pt, state_polygons)
+                poly_state_norm = polygon_state_of_point(pt, state_polygons, state_index)
                 if not poly_state_norm:
                     no_poly += 1
                     continue
@@ -7,6 +7,7 @@ import re
 from collections import defaultdict
 from typing import Dict, Optional, Tuple, List
 
+import shapely
 from shapely.geometry import shape, MultiPolygon, Polygon, Point
 from shapely.prepared import prep
 
@@ -139,6 +140,7 @@ def load_state_polygons(geojson_path: str) -> Tuple[Dict[str, MultiPolygon], Dic
         if not isinstance(geom, MultiPolygon):
             continue
         key = normalize_state_name(state_name)
+        shapely.prepare(geom)
         polygons_by_norm[key] = geom
         pretty_by_norm[key] = state_name
     return polygons_by_norm, pretty_by_norm
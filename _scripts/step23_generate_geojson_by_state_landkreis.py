@@ -2,12 +2,26 @@
 
 import os
 import json
-import re
-from collections import defaultdict
+import pickle
+import queue
+import threading
+from contextlib import ExitStack, contextmanager
+import string
 from typing import Dict, List, Tuple, Optional
 
+import numpy as np
+import shapely
 from shapely.geometry import shape, MultiPolygon, Polygon, Point
-from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+try:
+    import orjson  # optional fast decoder/encoder; stdlib json is used otherwise
+except ImportError:
+    orjson = None
+try:
+    import numba  # optional JIT for the point-in-polygon kernel; GEOS is used otherwise
+except ImportError:
+    numba = None
 
 
 # ========== CONFIG ==========
@@ -16,6 +30,10 @@ OUTPUT_FOLDER = r"C:\Users\jo73vure\Desktop\powerPlantProject\data\geojson\by_st
 GADM_L2_PATH = r"C:\Users\jo73vure\Desktop\powerPlantProject\gadm_data\gadm41_DEU\gadm41_DEU_2.json"  # expects properties.NAME_1 and properties.NAME_2
 LON_FIELD = "Laengengrad"
 LAT_FIELD = "Breitengrad"
+GADM_CACHE_SUFFIX = ".polygons.pkl"  # parsed GADM polygons (properties + WKB) cached next to the GeoJSON
+READ_AHEAD = 8  # files a reader thread may load ahead of the parser
+RASTER_CELL_DEG = 0.05  # cell size of the interior raster that bypasses exact tests; 0 disables
+NUMBA_MIN_POINTS = 5000  # candidates per polygon above which the numba kernel replaces GEOS
 # ===========================
 
 
@@ -26,6 +44,118 @@ def load_json(path: str):
         return json.load(f)
 
 
+def is_fresh(derived_path: str, source_path: str) -> bool:
+    """True if `derived_path` exists and is not older than `source_path`."""
+    return (
+        os.path.exists(derived_path)
+        and os.path.getmtime(derived_path) >= os.path.getmtime(source_path)
+    )
+
+
+def iter_json_paths(folder: str):
+    """
+    Yield the paths of all .json files below `folder` (recursive, one scandir per directory).
+    Unreadable or missing folders are skipped, as os.walk does.
+    """
+    try:
+        it = os.scandir(folder)
+    except OSError:
+        return
+    with it:
+        for dir_entry in it:
+            if dir_entry.is_dir():
+                yield from iter_json_paths(dir_entry.path)
+            elif dir_entry.name.endswith(".json") and dir_entry.is_file():
+                yield dir_entry.path
+
+
+def load_entries(file_path: str, raw: Optional[bytes] = None) -> list:
+    """
+    Parse the top-level JSON array of an input file in one call (orjson when available).
+    If `raw` holds the file's bytes already, those are parsed instead of reading `file_path`.
+    """
+    if raw is None:
+        with open(file_path, "rb") as f:
+            raw = f.read()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+def read_ahead(paths: List[str], q: "queue.Queue") -> None:
+    """Producer: put (path, raw bytes or the OSError) for each path on `q`, then None."""
+    for path in paths:
+        try:
+            with open(path, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            raw = e
+        q.put((path, raw))
+    q.put(None)
+
+
+def dumps_json(obj, pretty: bool = False) -> bytes:
+    """UTF-8 JSON bytes (non-ASCII kept; orjson when available), compact unless `pretty`."""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, ensure_ascii=False, indent=2 if pretty else None).encode("utf-8")
+
+
+def write_bytes(path: str, data: bytes) -> None:
+    """Write `data` to `path` with raw os.write calls (no buffered file object)."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0), 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def dump_json(data, path: str, pretty: bool = False) -> None:
+    """Write `data` as UTF-8 JSON in one encode + write (indented when `pretty`)."""
+    write_bytes(path, dumps_json(data, pretty))
+
+
+@contextmanager
+def streamed_outputs():
+    """
+    Yield open_output(path), which opens `path + ".part"` for binary writing.
+    The part files are renamed onto their paths once the block completes, and
+    deleted if it raises, so an aborted run leaves no truncated GeoJSON.
+    """
+    parts: List[str] = []
+    with ExitStack() as stack:
+        def open_output(path: str):
+            f = stack.enter_context(open(path + ".part", "wb"))
+            parts.append(path)
+            return f
+        try:
+            yield open_output
+        except BaseException:
+            stack.close()
+            for path in parts:
+                if os.path.exists(path + ".part"):
+                    os.remove(path + ".part")
+            raise
+    for path in parts:
+        os.replace(path + ".part", path)
+
+
+class _UnsafeToUnderscore(dict):
+    """str.translate table mapping every character outside SAFE_FILENAME_CHARS to '_' (filled on first use)."""
+
+    def __missing__(self, codepoint: int) -> int:
+        value = codepoint if chr(codepoint) in SAFE_FILENAME_CHARS else ord("_")
+        self[codepoint] = value
+        return value
+
+
+SAFE_FILENAME_CHARS = frozenset(string.ascii_letters + string.digits + "ÄÖÜäöüß -_.")
+_SAFE_FILENAME_TABLE = _UnsafeToUnderscore()
+
+
 def safe_filename(name: str) -> str:
     """
     Make a safe filename or folder name.
@@ -33,55 +163,282 @@ def safe_filename(name: str) -> str:
     Collapses consecutive underscores.
     """
     name = (name or "").strip()
-    name = name.replace("/", "_").replace("\\", "_")
-    name = re.sub(r"[^0-9A-Za-zÄÖÜäöüß \-_.]", "_", name)
-    name = re.sub(r"_+", "_", name)
+    # One C-level pass replaces every unsafe char (slashes included)
+    name = name.translate(_SAFE_FILENAME_TABLE)
+    # Collapse multiple underscores
+    while "__" in name:
+        name = name.replace("__", "_")
     return name or "unknown"
 
 
 # ---------- Geometry helpers ----------
 
-def parse_point(entry: dict, lon_key: str = LON_FIELD, lat_key: str = LAT_FIELD) -> Optional[Point]:
+def parse_xy(entry: dict, lon_key: str = LON_FIELD, lat_key: str = LAT_FIELD) -> Optional[Tuple[float, float]]:
     """
-    Parse lon/lat strings with either dot or comma decimals, return a shapely Point.
+    Parse lon/lat strings (or numbers) with either dot or comma decimals, return (lon, lat) floats.
     """
     try:
-        lon_raw = entry.get(lon_key, "")
-        lat_raw = entry.get(lat_key, "")
-        lon = float(str(lon_raw).replace(",", "."))
-        lat = float(str(lat_raw).replace(",", "."))
-        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
-            return None
-        return Point(lon, lat)
+        lon = entry.get(lon_key)
+        lat = entry.get(lat_key)
+        lon = float(lon.replace(",", ".") if lon.__class__ is str else lon)
+        lat = float(lat.replace(",", ".") if lat.__class__ is str else lat)
     except Exception:
         return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lon, lat
 
 
-def load_landkreis_polygons(geojson_path: str) -> List[Tuple[str, str, dict, MultiPolygon]]:
+def parse_point(entry: dict, lon_key: str = LON_FIELD, lat_key: str = LAT_FIELD) -> Optional[Point]:
     """
-    Load GADM Level-2 polygons.
+    Parse lon/lat strings with either dot or comma decimals, return a shapely Point.
+    """
+    lonlat = parse_xy(entry, lon_key, lat_key)
+    return Point(*lonlat) if lonlat else None
 
-    Returns a list of (name_1, name_2, properties, multipolygon), where:
-      - name_1 = props["NAME_1"]  (State)
-      - name_2 = props["NAME_2"]  (Landkreis)
+
+def parse_file(file_path: str, raw: Optional[bytes] = None) -> Tuple[int, List[dict], List[float], List[float]]:
+    """
+    Read one input JSON (or its already loaded bytes) and return (entries_seen, entries, xs, ys)
+    for the entries with valid coordinates. Raises if the file cannot be read completely.
+    """
+    n_seen = 0
+    entries: List[dict] = []
+    xs: List[float] = []
+    ys: List[float] = []
+    for entry in load_entries(file_path, raw):
+        n_seen += 1
+        lonlat = parse_xy(entry)
+        if lonlat is None:
+            continue
+        entries.append(entry)
+        xs.append(lonlat[0])
+        ys.append(lonlat[1])
+    return n_seen, entries, xs, ys
+
+
+def iter_parsed_files(json_paths: List[str]):
+    """
+    Yield (path, parse_file result or the exception it raised) in input order.
+    Files are parsed here while a reader thread loads the next READ_AHEAD files from disk.
     """
+    q: "queue.Queue" = queue.Queue(maxsize=READ_AHEAD)
+    threading.Thread(target=read_ahead, args=(json_paths, q), daemon=True).start()
+    for path, raw in iter(q.get, None):
+        if isinstance(raw, Exception):
+            yield path, raw
+            continue
+        try:
+            yield path, parse_file(path, raw)
+        except Exception as e:
+            yield path, e
+
+
+_prange = numba.prange if numba is not None else range
+
+
+def covers_xy_rings(xs: np.ndarray, ys: np.ndarray, ring_x: np.ndarray, ring_y: np.ndarray,
+                    ring_offsets: np.ndarray, out: np.ndarray) -> None:
+    """
+    Ray-casting "covers" test of points against one (multi)polygon given as flat,
+    closed rings: ring r spans ring_x/ring_y[ring_offsets[r]:ring_offsets[r + 1]].
+    Even-odd crossing over all rings handles holes and parts; points on an edge count
+    as covered. Writes the result into the boolean array `out`.
+    """
+    for i in _prange(len(xs)):
+        x = xs[i]
+        y = ys[i]
+        inside = False
+        on_edge = False
+        for r in range(len(ring_offsets) - 1):
+            for k in range(ring_offsets[r], ring_offsets[r + 1] - 1):
+                x1 = ring_x[k]
+                y1 = ring_y[k]
+                x2 = ring_x[k + 1]
+                y2 = ring_y[k + 1]
+                if (min(x1, x2) <= x <= max(x1, x2) and min(y1, y2) <= y <= max(y1, y2)
+                        and (x2 - x1) * (y - y1) == (y2 - y1) * (x - x1)):
+                    on_edge = True
+                if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                    inside = not inside
+        out[i] = inside or on_edge
+
+
+covers_xy_kernel = numba.njit(parallel=True, cache=True)(covers_xy_rings) if numba is not None else None
+
+
+def ring_arrays(geom) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flatten all rings of a (Multi)Polygon into (ring_x, ring_y, ring_offsets) for covers_xy_rings."""
+    rings = shapely.get_rings(shapely.get_parts(geom))
+    coords = [shapely.get_coordinates(ring) for ring in rings]
+    offsets = np.zeros(len(coords) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(c) for c in coords])
+    flat = np.concatenate(coords) if coords else np.empty((0, 2))
+    return np.ascontiguousarray(flat[:, 0]), np.ascontiguousarray(flat[:, 1]), offsets
+
+
+def raster_shape(bounds: Tuple[float, float, float, float], cell: float) -> Tuple[int, int]:
+    """(nx, ny) number of `cell`-sized raster cells covering `bounds` (1 x 1 if cell <= 0)."""
+    if cell <= 0:
+        return 1, 1
+    minx, miny, maxx, maxy = bounds
+    return max(1, int(np.ceil((maxx - minx) / cell))), max(1, int(np.ceil((maxy - miny) / cell)))
+
+
+def interior_raster(tree: STRtree, bounds: Tuple[float, float, float, float], cell: float) -> np.ndarray:
+    """
+    (ny, nx) grid over `bounds`: for a cell intersected by exactly one tree polygon that
+    covers it completely, that polygon's index; -1 for boundary and outside cells.
+    Cells are padded slightly so points rounding onto a cell edge stay inside it.
+    """
+    minx, miny, _, _ = bounds
+    nx, ny = raster_shape(bounds, cell)
+    ix, iy = np.meshgrid(np.arange(nx), np.arange(ny))
+    x0 = minx + ix.ravel() * cell
+    y0 = miny + iy.ravel() * cell
+    pad = cell * 1e-6
+    cells = shapely.box(x0 - pad, y0 - pad, x0 + cell + pad, y0 + cell + pad)
+
+    grid = np.full(nx * ny, -1, dtype=np.intp)
+    # bbox candidates, then exact tests on the prepared polygons (see covered_pairs)
+    shapely.prepare(tree.geometries)
+    cell_idx, poly_idx = tree.query(cells)
+    touching = shapely.intersects(tree.geometries[poly_idx], cells[cell_idx])
+    cell_idx, poly_idx = cell_idx[touching], poly_idx[touching]
+    single = np.bincount(cell_idx, minlength=len(cells))[cell_idx] == 1
+    cell_idx, poly_idx = cell_idx[single], poly_idx[single]
+    inside = shapely.covers(tree.geometries[poly_idx], cells[cell_idx])
+    grid[cell_idx[inside]] = poly_idx[inside]
+    return grid.reshape(ny, nx)
+
+
+def first_covering_polygon(tree: STRtree, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+    """
+    For each point (xs[i], ys[i]), return the index of the first tree geometry
+    (in insertion order) that covers it, or -1. One bulk query plus vectorized
+    covers tests against the prepared polygons, evaluated in GEOS.
+    Points outside the overall bounding box of the polygons are rejected up front, and
+    identical coordinates (many units of one plant) are looked up only once. When there
+    are more distinct points than cells, points in cells of the interior raster skip
+    the exact test.
+    With numba installed, polygons with more than NUMBA_MIN_POINTS bbox candidates
+    are tested by the compiled ray-casting kernel instead of GEOS.
+    """
+    n_polys = len(tree.geometries)
+    first = np.full(len(xs), n_polys, dtype=np.intp)
+    if len(xs) and n_polys:
+        minx, miny, maxx, maxy = shapely.total_bounds(tree.geometries)
+        candidates = np.flatnonzero((xs >= minx) & (xs <= maxx) & (ys >= miny) & (ys <= maxy))
+        unique_xy, inverse = np.unique(
+            np.column_stack((xs[candidates], ys[candidates])), axis=0, return_inverse=True
+        )
+        first_unique = np.full(len(unique_xy), n_polys, dtype=np.intp)
+        todo = np.arange(len(unique_xy))
+
+        # Points in raster cells lying wholly inside a single polygon need no exact test
+        nx, ny = raster_shape((minx, miny, maxx, maxy), RASTER_CELL_DEG)
+        if RASTER_CELL_DEG > 0 and len(unique_xy) > nx * ny:
+            raster = interior_raster(tree, (minx, miny, maxx, maxy), RASTER_CELL_DEG)
+            ix = np.clip(((unique_xy[:, 0] - minx) // RASTER_CELL_DEG).astype(np.intp), 0, nx - 1)
+            iy = np.clip(((unique_xy[:, 1] - miny) // RASTER_CELL_DEG).astype(np.intp), 0, ny - 1)
+            known = raster[iy, ix]
+            first_unique[known >= 0] = known[known >= 0]
+            todo = np.flatnonzero(known < 0)
+
+        ux, uy = unique_xy[todo, 0], unique_xy[todo, 1]
+        points = shapely.points(ux, uy)
+        pt_idx, poly_idx = covered_pairs(tree, points, np.ascontiguousarray(ux), np.ascontiguousarray(uy))
+        np.minimum.at(first_unique, todo[pt_idx], poly_idx)
+        first[candidates] = first_unique[inverse.ravel()]
+    first[first == n_polys] = -1
+    return first
+
+
+def covered_pairs(tree: STRtree, points: np.ndarray, xs: np.ndarray, ys: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (point, polygon) index pairs where the polygon covers the point, like
+    tree.query(points, predicate="covered_by"). That query only prepares the points,
+    so each exact test would walk a whole GADM ring; here the bbox candidates are
+    tested against the prepared polygons instead. With numba installed, busy
+    polygons are tested by covers_xy_kernel.
+    """
+    pt_idx, poly_idx = tree.query(points)  # bounding-box candidates only
+    # shapely.covers only uses GEOS prepared geometry if the polygon was prepared beforehand
+    shapely.prepare(tree.geometries)
+    if covers_xy_kernel is None:
+        hit = shapely.covers(tree.geometries[poly_idx], points[pt_idx])
+        return pt_idx[hit], poly_idx[hit]
+    hit = np.zeros(len(pt_idx), dtype=bool)
+    order = np.argsort(poly_idx, kind="stable")
+    polys, starts = np.unique(poly_idx[order], return_index=True)
+    for poly, pair_sel in zip(polys, np.split(order, starts[1:])):
+        geom = tree.geometries[poly]
+        cand = pt_idx[pair_sel]
+        if len(cand) > NUMBA_MIN_POINTS:
+            out = np.zeros(len(cand), dtype=bool)
+            covers_xy_kernel(xs[cand], ys[cand], *ring_arrays(geom), out)
+            hit[pair_sel] = out
+        else:
+            hit[pair_sel] = shapely.covers(geom, points[cand])
+    return pt_idx[hit], poly_idx[hit]
+
+
+def load_gadm_multipolygons(geojson_path: str) -> List[Tuple[dict, MultiPolygon]]:
+    """
+    Load every (Multi)Polygon feature of a GADM GeoJSON as (properties, multipolygon).
+
+    The parsed result is cached as properties + WKB in `geojson_path + GADM_CACHE_SUFFIX`
+    and reused while it is not older than the GeoJSON, which skips the slow JSON parse.
+    """
+    cache_path = geojson_path + GADM_CACHE_SUFFIX
+    if is_fresh(cache_path, geojson_path):
+        try:
+            with open(cache_path, "rb") as f:
+                props_list, wkbs = pickle.load(f)
+            return list(zip(props_list, shapely.from_wkb(wkbs)))
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable polygon cache {cache_path}: {e}")
+
     data = load_json(geojson_path)
     feats = data["features"] if isinstance(data, dict) and "features" in data else data
 
-    results: List[Tuple[str, str, dict, MultiPolygon]] = []
+    results: List[Tuple[dict, MultiPolygon]] = []
     for feat in feats:
-        props = feat.get("properties", {}) or {}
-        name_1 = props.get("NAME_1")
-        name_2 = props.get("NAME_2")
-        if not name_1 or not name_2:
+        if not feat.get("geometry"):
             continue
-
-        geom = shape(feat.get("geometry"))
+        geom = shape(feat["geometry"])
         if isinstance(geom, Polygon):
             geom = MultiPolygon([geom])
         if not isinstance(geom, MultiPolygon):
             continue
+        results.append((feat.get("properties", {}) or {}, geom))
+
+    try:
+        with open(cache_path, "wb") as f:
+            pickle.dump(
+                ([props for props, _ in results], shapely.to_wkb([geom for _, geom in results])),
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+    except OSError as e:
+        print(f"⚠️ Could not write polygon cache {cache_path}: {e}")
+    return results
+
+
+def load_landkreis_polygons(geojson_path: str) -> List[Tuple[str, str, dict, MultiPolygon]]:
+    """
+    Load GADM Level-2 polygons.
 
+    Returns a list of (name_1, name_2, properties, multipolygon), where:
+      - name_1 = props["NAME_1"]  (State)
+      - name_2 = props["NAME_2"]  (Landkreis)
+    """
+    results: List[Tuple[str, str, dict, MultiPolygon]] = []
+    for props, geom in load_gadm_multipolygons(geojson_path):
+        name_1 = props.get("NAME_1")
+        name_2 = props.get("NAME_2")
+        if not name_1 or not name_2:
+            continue
         results.append((name_1, name_2, props, geom))
 
     return results
@@ -91,11 +448,21 @@ def load_landkreis_polygons(geojson_path: str) -> List[Tuple[str, str, dict, Mul
 
 def to_feature(entry: dict, point: Point) -> dict:
     """Build a GeoJSON Point Feature from the raw entry."""
-    props = {k: v for k, v in entry.items() if k not in [LON_FIELD, LAT_FIELD]}
+    return xy_feature(entry, point.x, point.y)
+
+
+def xy_feature(entry: dict, x: float, y: float) -> dict:
+    """
+    Build a GeoJSON Point Feature from the raw entry and plain coordinates.
+    The entry itself becomes the properties (coordinate fields removed in place),
+    so it must not be reused afterwards.
+    """
+    entry.pop(LON_FIELD, None)
+    entry.pop(LAT_FIELD, None)
     return {
         "type": "Feature",
-        "geometry": {"type": "Point", "coordinates": [point.x, point.y]},
-        "properties": props,
+        "geometry": {"type": "Point", "coordinates": [x, y]},
+        "properties": entry,
     }
 
 
@@ -104,7 +471,8 @@ def to_feature(entry: dict, point: Point) -> dict:
 def convert_by_state_landkreis(
     input_folder: str,
     output_folder: str,
-    gadm_l2_path: str
+    gadm_l2_path: str,
+    pretty: bool = False,
 ):
     os.makedirs(output_folder, exist_ok=True)
 
@@ -113,67 +481,78 @@ def convert_by_state_landkreis(
     if not landkreise:
         raise RuntimeError("No Level-2 polygons loaded. Check GADM_L2_PATH and that properties.NAME_1/NAME_2 exist.")
 
-    prepared = [(name_1, name_2, props, prep(geom)) for (name_1, name_2, props, geom) in landkreise]
+    # Spatial index over the polygons; queried once for all points below.
+    # One tree over all Level-2 polygons: STRtree is already hierarchical, so a
+    # per-state tree of trees would not prune further, and choosing the state from
+    # an entry's Bundesland code would let attribute errors override the geometry.
+    tree = STRtree([geom for (_, _, _, geom) in landkreise])
 
-    # Accumulators: (state -> landkreis -> features)
-    grouped: Dict[str, Dict[str, List[dict]]] = defaultdict(lambda: defaultdict(list))
-
-    total_files = 0
     total_entries = 0
     matched_entries = 0
     unmatched_entries = 0
     sample_unmatched = []
 
-    for root, _, files in os.walk(input_folder):
-        for fname in files:
-            if not fname.endswith(".json"):
-                continue
-            total_files += 1
-            fpath = os.path.join(root, fname)
-
-            try:
-                data = load_json(fpath)
-            except Exception as e:
-                print(f"⚠️ Could not load {fname}: {e}")
-                continue
-
-            for entry in data:
-                total_entries += 1
-                pt = parse_point(entry)
-                if pt is None:
-                    continue
-
-                matched = False
-                for name_1, name_2, _props, pgeom in prepared:
-                    # covers() includes boundary points; if covers not available from prepared context, fallback to contains()
-                    if pgeom.covers(pt) if hasattr(pgeom.context, "covers") else pgeom.contains(pt):
-                        grouped[name_1][name_2].append(to_feature(entry, pt))
-                        matched_entries += 1
-                        matched = True
-                        break
-
-                if not matched:
-                    unmatched_entries += 1
-                    if len(sample_unmatched) < 200:
-                        sample_unmatched.append({
-                            "EinheitMastrNummer": entry.get("EinheitMastrNummer"),
-                            "coords": [pt.x, pt.y]
-                        })
-
-    # Write one GeoJSON per Landkreis under its State folder
-    for state_name, lkr_map in grouped.items():
-        state_folder = os.path.join(output_folder, safe_filename(state_name))
-        os.makedirs(state_folder, exist_ok=True)
-
-        for lkr_name, feats in lkr_map.items():
-            if not feats:
-                continue
-            out_name = safe_filename(lkr_name) + ".geojson"
-            out_path = os.path.join(state_folder, out_name)
-            geojson = {"type": "FeatureCollection", "features": feats}
-            with open(out_path, "w", encoding="utf-8") as f:
-                json.dump(geojson, f, ensure_ascii=False, indent=2)
-            print(f"✅ Saved {len(feats):5d} features → {state_name}/{out_name}")
+    json_paths = list(iter_json_paths(input_folder))
+    total_files = len(json_paths)
+
+    # Pass 1: parse every entry's coordinates into flat arrays, merged in file
+    # order. A file that fails mid-way contributes nothing.
+    entries: List[dict] = []
+    xs: List[float] = []
+    ys: List[float] = []
+    for fpath, result in iter_parsed_files(json_paths):
+        if isinstance(result, Exception):
+            print(f"⚠️ Could not load {os.path.basename(fpath)}: {result}")
+            continue
+        n_seen, f_entries, f_xs, f_ys = result
+        total_entries += n_seen
+        entries.extend(f_entries)
+        xs.extend(f_xs)
+        ys.extend(f_ys)
+
+    # Pass 2: first Level-2 polygon (in file order) covering each point;
+    # covers semantics so boundary points match as well
+    matches = first_covering_polygon(tree, np.asarray(xs, dtype=float), np.asarray(ys, dtype=float))
+
+    # Stream each matched feature straight into its Landkreis file under its
+    # State folder instead of collecting every feature in memory first
+    # Output paths are resolved once per polygon, not once per matched entry
+    out_paths = [
+        os.path.join(output_folder, safe_filename(name_1), safe_filename(name_2) + ".geojson")
+        for (name_1, name_2, _, _) in landkreise
+    ]
+    saved_counts: Dict[str, int] = {}
+    with streamed_outputs() as open_output:
+        handles = {}
+        for entry, x, y, i in zip(entries, xs, ys, matches.tolist()):
+            if i >= 0:
+                out_path = out_paths[i]
+                out = handles.get(out_path)
+                if out is None:
+                    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                    out = open_output(out_path)
+                    out.write(b'{"type": "FeatureCollection", "features": [\n')
+                    handles[out_path] = out
+                    saved_counts[out_path] = 0
+                else:
+                    out.write(b",\n")
+                out.write(dumps_json(xy_feature(entry, x, y), pretty))
+                saved_counts[out_path] += 1
+                matched_entries += 1
+            else:
+                unmatched_entries += 1
+                if len(sample_unmatched) < 200:
+                    sample_unmatched.append({
+                        "EinheitMastrNummer": entry.get("EinheitMastrNummer"),
+                        "coords": [x, y]
+                    })
+
+        for out in handles.values():
+            out.write(b"\n]}\n")
+
+    for out_path, count in saved_counts.items():
+        rel_path = os.path.relpath(out_path, output_folder).replace(os.sep, "/")
+        print(f"✅ Saved {count:5d} features → {rel_path}")
 
     # Write summary
     summary = {
@@ -186,8 +565,7 @@ def convert_by_state_landkreis(
         "gadm_l2_path": gadm_l2_path,
     }
     log_path = os.path.join(output_folder, "_state_landkreis_summary.json")
-    with open(log_path, "w", encoding="utf-8") as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2)
+    dump_json(summary, log_path, pretty=True)
 
     print("\n====== SUMMARY ======")
     print(json.dumps(summary, indent=2, ensure_ascii=False))
@@ -2,11 +2,23 @@
 import os
 import re
 import json
-from collections import defaultdict
-from typing import Dict, List, Optional
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional, Union
 
+import numpy as np
+import shapely
 from shapely.geometry import shape, MultiPolygon, Polygon, Point
 from shapely.prepared import prep
+from shapely.strtree import STRtree
+
+try:
+    import orjson  # optional, much faster encode/decode; stdlib json otherwise
+except ImportError:
+    orjson = None
+try:
+    import numba  # optional JIT for the point-in-polygon kernel; GEOS is used otherwise
+except ImportError:
+    numba = None
 
 
 # ================= CONFIG =================
@@ -19,6 +31,9 @@ POLYGON_STATES_PATH = r"C:\Users\jo73vure\Desktop\powerPlantProject\data\polygon
 LON_FIELD  = "Laengengrad"
 LAT_FIELD  = "Breitengrad"
 DATE_FIELD = "Inbetriebnahmedatum"
+
+EMPTY_VALUES = (None, "")  # coordinate values that mean "no coordinate"
+NUMBA_MIN_POINTS = 5000    # candidates per polygon above which the numba kernel replaces GEOS
 # =========================================
 
 
@@ -66,10 +81,52 @@ GS_PREFIX_TO_NAME: Dict[str, str] = {
 # ---------- Helpers ----------
 
 def load_json(path: str):
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
 
+def dumps_json(data, pretty: bool = False) -> bytes:
+    """
+    UTF-8 JSON bytes (non-ASCII kept; orjson when available), compact unless `pretty`.
+    Output GeoJSON is written compact; only the summary people read is indented.
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if pretty else 0)
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, ensure_ascii=False, indent=2 if pretty else None).encode("utf-8")
+
+
+def save_json(data, path: str, pretty: bool = False):
+    with open(path, "wb") as f:
+        f.write(dumps_json(data, pretty))
+
+
+def write_feature_collection(path: str, features) -> None:
+    """
+    Write GeoJSON `features` (any iterable, encoded one at a time) to `path` as a
+    FeatureCollection. The file is written as `path + ".part"` and renamed into place
+    once complete, so an aborted write leaves no truncated GeoJSON.
+    """
+    part = path + ".part"
+    try:
+        with open(part, "wb") as out:
+            out.write(b'{"type": "FeatureCollection", "features": [\n')
+            for k, feature in enumerate(features):
+                if k:
+                    out.write(b",\n")
+                out.write(dumps_json(feature))
+            out.write(b"\n]}\n")
+    except BaseException:
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+    os.replace(part, path)
+
+
+@lru_cache(maxsize=4096)  # the same few state / Landkreis names recur for every entry
 def normalize_state_name(name: str) -> str:
     if not isinstance(name, str):
         return ""
@@ -83,36 +140,77 @@ def normalize_state_name(name: str) -> str:
     return s
 
 
+_UNSAFE_FILENAME_CHARS = re.compile(r"[^0-9A-Za-zÄÖÜäöüß \-_.]")
+_UNDERSCORE_RUNS = re.compile(r"_+")
+
+
+@lru_cache(maxsize=4096)
 def safe_filename(name: str) -> str:
     name = (name or "").strip()
-    name = name.replace("/", "_").replace("\\", "_")
-    name = re.sub(r"[^0-9A-Za-zÄÖÜäöüß \-_.]", "_", name)
-    name = re.sub(r"_+", "_", name)
+    # "/" and backslash are outside the allowed set, so the first pattern replaces them too
+    name = _UNSAFE_FILENAME_CHARS.sub("_", name)
+    name = _UNDERSCORE_RUNS.sub("_", name)
     return name or "unknown"
 
 
-def parse_point(entry: dict) -> Optional[Point]:
+def iter_json_paths(folder: str):
+    """
+    Yield the paths of all .json files below `folder` (recursive, one scandir per directory).
+    Unreadable or missing folders are skipped, as os.walk does.
+    """
     try:
-        lon = float(str(entry.get(LON_FIELD, "")).replace(",", "."))
-        lat = float(str(entry.get(LAT_FIELD, "")).replace(",", "."))
-        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
-            return None
-        return Point(lon, lat)
+        it = os.scandir(folder)
+    except OSError:
+        return
+    with it:
+        for dir_entry in it:
+            if dir_entry.is_dir():
+                yield from iter_json_paths(dir_entry.path)
+            elif dir_entry.name.endswith(".json") and dir_entry.is_file():
+                yield dir_entry.path
+
+
+def parse_xy(entry: dict) -> Optional[Tuple[float, float]]:
+    """
+    Parse lon/lat strings (or numbers) with either dot or comma decimals, return (lon, lat) floats.
+    Numbers are converted directly instead of round-tripping through str().
+    """
+    try:
+        lon = entry.get(LON_FIELD)
+        lat = entry.get(LAT_FIELD)
+        lon = float(lon.replace(",", ".") if lon.__class__ is str else lon)
+        lat = float(lat.replace(",", ".") if lat.__class__ is str else lat)
     except Exception:
         return None
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return None
+    return lon, lat
 
 
-def extract_year(entry: dict) -> str:
-    val = str(entry.get(DATE_FIELD, "") or "").strip()
-    return val[:4] if len(val) >= 4 and val[:4].isdigit() else "unknown"
+def parse_point(entry: dict) -> Optional[Point]:
+    xy = parse_xy(entry)
+    return Point(*xy) if xy else None
 
 
-def to_feature(entry: dict, pt: Point) -> dict:
-    props = {k: v for k, v in entry.items() if k not in [LON_FIELD, LAT_FIELD]}
+def extract_year(entry: dict) -> str:
+    val = entry.get(DATE_FIELD)
+    if val.__class__ is not str:  # dates are almost always strings already
+        val = str(val) if val else ""
+    year = val.lstrip()[:4]
+    return year if len(year) == 4 and year.isdigit() else "unknown"
+
+
+def to_feature(entry: dict, x: float, y: float) -> dict:
+    """
+    Build a GeoJSON Point Feature from the raw entry and plain coordinates. The entry itself
+    becomes the properties (coordinate fields removed in place), so it must not be reused afterwards.
+    """
+    entry.pop(LON_FIELD, None)
+    entry.pop(LAT_FIELD, None)
     return {
         "type": "Feature",
-        "geometry": {"type": "Point", "coordinates": [pt.x, pt.y]},
-        "properties": props,
+        "geometry": {"type": "Point", "coordinates": [x, y]},
+        "properties": entry,
     }
 
 
@@ -131,9 +229,8 @@ def load_state_polygons(path: str):
             continue
 
         geom = shape(f.get("geometry"))
-        if isinstance(geom, Polygon):
-            geom = MultiPolygon([geom])
-        if not isinstance(geom, MultiPolygon):
+        # GEOS predicates work the same on Polygon and MultiPolygon: no wrapping needed
+        if not isinstance(geom, (Polygon, MultiPolygon)):
             continue
 
         polygons[normalize_state_name(name)] = geom
@@ -141,7 +238,8 @@ def load_state_polygons(path: str):
     return polygons
 
 
-def polygon_state_of_point(pt: Point, polygons: Dict[str, MultiPolygon]) -> Optional[str]:
+def polygon_state_of_point(pt: Point, polygons: Dict[str, Union[Polygon, MultiPolygon]]) -> Optional[str]:
+    """Normalized name of the first state polygon covering `pt`, or None (single-point reference)."""
     for state_norm, mp in polygons.items():
         if mp.covers(pt):
             return state_norm
@@ -178,9 +276,7 @@ def load_gadm_l2_polygons(path: str):
             continue
 
         geom = shape(f.get("geometry"))
-        if isinstance(geom, Polygon):
-            geom = MultiPolygon([geom])
-        if not isinstance(geom, MultiPolygon):
+        if not isinstance(geom, (Polygon, MultiPolygon)):
             continue
 
         out.append((lkr, prep(geom)))
@@ -188,78 +284,190 @@ def load_gadm_l2_polygons(path: str):
     return out
 
 
+_prange = numba.prange if numba is not None else range
+
+
+def covers_xy_rings(xs: np.ndarray, ys: np.ndarray, ring_x: np.ndarray, ring_y: np.ndarray,
+                    ring_offsets: np.ndarray, out: np.ndarray) -> None:
+    """
+    Ray-casting "covers" test of points against one (multi)polygon given as flat,
+    closed rings: ring r spans ring_x/ring_y[ring_offsets[r]:ring_offsets[r + 1]].
+    Even-odd crossing over all rings handles holes and parts; points on an edge count
+    as covered. Writes the result into the boolean array `out`.
+    """
+    for i in _prange(len(xs)):
+        x = xs[i]
+        y = ys[i]
+        inside = False
+        on_edge = False
+        for r in range(len(ring_offsets) - 1):
+            for k in range(ring_offsets[r], ring_offsets[r + 1] - 1):
+                x1 = ring_x[k]
+                y1 = ring_y[k]
+                x2 = ring_x[k + 1]
+                y2 = ring_y[k + 1]
+                if (min(x1, x2) <= x <= max(x1, x2) and min(y1, y2) <= y <= max(y1, y2)
+                        and (x2 - x1) * (y - y1) == (y2 - y1) * (x - x1)):
+                    on_edge = True
+                if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                    inside = not inside
+        out[i] = inside or on_edge
+
+
+covers_xy_kernel = numba.njit(parallel=True, cache=True)(covers_xy_rings) if numba is not None else None
+
+
+def ring_arrays(geom) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flatten all rings of a (Multi)Polygon into (ring_x, ring_y, ring_offsets) for covers_xy_rings."""
+    rings = shapely.get_rings(shapely.get_parts(geom))
+    coords = [shapely.get_coordinates(ring) for ring in rings]
+    offsets = np.zeros(len(coords) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(c) for c in coords])
+    flat = np.concatenate(coords) if coords else np.empty((0, 2))
+    return np.ascontiguousarray(flat[:, 0]), np.ascontiguousarray(flat[:, 1]), offsets
+
+
+def covered_pairs(tree: STRtree, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (point, polygon) index pairs where the polygon covers the point: bbox candidates
+    from one bulk tree query, confirmed on the prepared polygons. With numba installed,
+    polygons with more than NUMBA_MIN_POINTS candidates are tested by covers_xy_kernel.
+    """
+    pt_idx, poly_idx = tree.query(points)  # bounding-box candidates only
+    shapely.prepare(tree.geometries)
+    if covers_xy_kernel is None:
+        hit = shapely.covers(tree.geometries[poly_idx], points[pt_idx])
+        return pt_idx[hit], poly_idx[hit]
+    hit = np.zeros(len(pt_idx), dtype=bool)
+    order = np.argsort(poly_idx, kind="stable")
+    polys, starts = np.unique(poly_idx[order], return_index=True)
+    for poly, pair_sel in zip(polys, np.split(order, starts[1:])):
+        geom = tree.geometries[poly]
+        cand = pt_idx[pair_sel]
+        if len(cand) > NUMBA_MIN_POINTS:
+            xy = shapely.get_coordinates(points[cand])
+            out = np.zeros(len(cand), dtype=bool)
+            covers_xy_kernel(np.ascontiguousarray(xy[:, 0]), np.ascontiguousarray(xy[:, 1]),
+                             *ring_arrays(geom), out)
+            hit[pair_sel] = out
+        else:
+            hit[pair_sel] = shapely.covers(geom, points[cand])
+    return pt_idx[hit], poly_idx[hit]
+
+
+def first_covering_polygon(tree: STRtree, points: np.ndarray) -> np.ndarray:
+    """
+    For each point, the index of the first tree polygon (in insertion order) that
+    covers it, or -1. Bbox candidates come from one bulk tree query and are
+    confirmed on the prepared polygons (see covered_pairs).
+    """
+    n_polys = len(tree.geometries)
+    first = np.full(len(points), n_polys, dtype=np.intp)
+    if len(points) and n_polys:
+        pt_idx, poly_idx = covered_pairs(tree, points)
+        np.minimum.at(first, pt_idx, poly_idx)
+    first[first == n_polys] = -1
+    return first
+
+
 # ---------- MAIN ----------
 
 def convert_landkreis_yearly():
     os.makedirs(OUTPUT_ROOT, exist_ok=True)
 
     state_polys = load_state_polygons(POLYGON_STATES_PATH)
+    # Prepared once: every state check below is a covers test against one of them
+    shapely.prepare(list(state_polys.values()))
     l2_polys = load_gadm_l2_polygons(GADM_L2_PATH)
 
-    buckets = defaultdict(lambda: defaultdict(list))
+    # Spatial index over the L2 polygons; queried once for all 3-check passes below
+    tree = STRtree([pgeom.context for (_, pgeom) in l2_polys])
 
     stats = {
         "entries_seen": 0,
         "passed_3check": 0,
         "matched_entries": 0,
         "skipped_inconsistent": 0,
+        "skipped_empty_coords": 0,
     }
 
-    for root, _, files in os.walk(INPUT_FOLDER):
-        for fn in files:
-            if not fn.endswith(".json"):
+    # Pass 1: 3-check every entry, keeping the passing ones as columns: entries, plain
+    # coordinates and the per-file point arrays (no per-feature Point bookkeeping)
+    passed: List[dict] = []
+    passed_xs: List[float] = []
+    passed_ys: List[float] = []
+    point_chunks: List[np.ndarray] = []
+    for path in iter_json_paths(INPUT_FOLDER):
+        data = load_json(path)
+        stats["entries_seen"] += len(data)
+
+        # Cheap checks first: coordinates, then Bundesland code == GS prefix.
+        # The agreeing code names the only state polygon worth testing, so each
+        # survivor gets one covers test, run for the whole file in one GEOS call.
+        located: List[dict] = []
+        expected: List[str] = []
+        xs: List[float] = []
+        ys: List[float] = []
+        for entry in data:
+            # Blank coordinates are common in MaStR: reject them before any parsing
+            if entry.get(LON_FIELD) in EMPTY_VALUES or entry.get(LAT_FIELD) in EMPTY_VALUES:
+                stats["skipped_empty_coords"] += 1
                 continue
 
-            data = load_json(os.path.join(root, fn))
-
-            for entry in data:
-                stats["entries_seen"] += 1
-
-                pt = parse_point(entry)
-                if pt is None:
-                    continue
-
-                poly_state = polygon_state_of_point(pt, state_polys)
-                bl_norm = bl_code_to_norm_name(entry.get("Bundesland"))
-                gs_norm = gs_prefix_to_norm_name(entry.get("Gemeindeschluessel"))
-
-                if not poly_state or not bl_norm or not gs_norm:
-                    stats["skipped_inconsistent"] += 1
-                    continue
-
-                if not (poly_state == bl_norm == gs_norm):
-                    stats["skipped_inconsistent"] += 1
-                    continue
-
-                stats["passed_3check"] += 1
-
-                for lkr_name, pgeom in l2_polys:
-                    if pgeom.context.covers(pt):
-                        year = extract_year(entry)
-                        feat = to_feature(entry, pt)
-                        buckets[lkr_name][year].append(feat)
-                        stats["matched_entries"] += 1
-                        break
-
-    # ---------- WRITE ----------
-    for lkr, year_map in buckets.items():
-        lkr_dir = os.path.join(OUTPUT_ROOT, safe_filename(lkr))
-        os.makedirs(lkr_dir, exist_ok=True)
+            xy = parse_xy(entry)
+            if xy is None:
+                continue
 
-        for year, feats in year_map.items():
-            if not feats:
+            bl_norm = bl_code_to_norm_name(entry.get("Bundesland"))
+            gs_norm = gs_prefix_to_norm_name(entry.get("Gemeindeschluessel"))
+            if not bl_norm or bl_norm != gs_norm:
+                stats["skipped_inconsistent"] += 1
                 continue
 
-            with open(os.path.join(lkr_dir, f"{year}.geojson"), "w", encoding="utf-8") as f:
-                json.dump(
-                    {"type": "FeatureCollection", "features": feats},
-                    f,
-                    ensure_ascii=False,
-                    indent=2,
-                )
+            located.append(entry)
+            expected.append(bl_norm)
+            xs.append(xy[0])
+            ys.append(xy[1])
+
+        file_points = shapely.points(xs, ys)
+        expected_polys = np.array([state_polys.get(bl_norm) for bl_norm in expected], dtype=object)
+        in_state = shapely.covers(expected_polys, file_points)
+        n_passed = int(np.count_nonzero(in_state))
+        stats["passed_3check"] += n_passed
+        stats["skipped_inconsistent"] += len(located) - n_passed
+        point_chunks.append(file_points[in_state])
+        for entry, x, y, ok in zip(located, xs, ys, in_state.tolist()):
+            if ok:
+                passed.append(entry)
+                passed_xs.append(x)
+                passed_ys.append(y)
+
+    # Pass 2: first L2 polygon (in file order) covering each passing point
+    points = np.concatenate(point_chunks) if point_chunks else np.empty(0, dtype=object)
+    matches = first_covering_polygon(tree, points)
 
-    with open(os.path.join(OUTPUT_ROOT, "_landkreis_yearly_summary.json"), "w", encoding="utf-8") as f:
-        json.dump(stats, f, ensure_ascii=False, indent=2)
+    # ---------- WRITE ----------
+    # Group the matched rows by <lkr>/<year>.geojson (input order kept), then write
+    # the files one at a time: a single output handle is open at any moment
+    lkr_dirs = [os.path.join(OUTPUT_ROOT, safe_filename(lkr_name)) for (lkr_name, _) in l2_polys]
+    by_path: Dict[str, List[int]] = {}
+    for k, (entry, i) in enumerate(zip(passed, matches.tolist())):
+        if i < 0:
+            continue
+        out_path = os.path.join(lkr_dirs[i], f"{extract_year(entry)}.geojson")
+        rows = by_path.get(out_path)
+        if rows is None:
+            rows = by_path[out_path] = []
+        rows.append(k)
+
+    for out_path, rows in by_path.items():
+        os.makedirs(os.path.dirname(out_path), exist_ok=True)
+        write_feature_collection(
+            out_path, (to_feature(passed[k], passed_xs[k], passed_ys[k]) for k in rows)
+        )
+        stats["matched_entries"] += len(rows)
+
+    save_json(stats, os.path.join(OUTPUT_ROOT, "_landkreis_yearly_summary.json"), pretty=True)
 
     print("DONE:", json.dumps(stats, indent=2, ensure_ascii=False))
 
@@ -39,6 +39,7 @@ from dataclasses import asdict, dataclass
 from datetime import datetime
 from typing import Any, Dict, List, Optional, Tuple
 
+import shapely
 from shapely.geometry import MultiPolygon, Point, Polygon, shape
 from shapely.prepared import prep
 
@@ -355,6 +356,7 @@ def load_state_polygons(geojson_path: str) -> Tuple[Dict[str, MultiPolygon], Dic
         if not isinstance(geom, MultiPolygon):
             continue
         key = normalize_state_name(state_name)
+        shapely.prepare(geom)
         polygons_by_norm[key] = geom
         pretty_by_norm[key] = state_name
 
@@ -3,22 +3,39 @@
 import os
 import json
 
+try:
+    import ijson  # optional streaming parser; json.load is used otherwise
+except ImportError:
+    ijson = None
+
+def iter_json_entries(file_path: str):
+    """Yield the entries of a top-level JSON array one at a time (streamed with ijson when available)."""
+    if ijson is not None:
+        with open(file_path, "rb") as f:
+            try:
+                yield from ijson.items(f, "item", use_float=True)
+            except ijson.JSONError as e:
+                # yajl messages span several lines; keep the first, like json's one-liners
+                raise ValueError(str(e).splitlines()[0]) from None
+        return
+    with open(file_path, "r", encoding="utf-8") as f:
+        yield from json.load(f)
+
+
 def list_energy_codes(folder_path: str, key: str = "Energietraeger") -> None:
     energy_codes = set()
 
-    for filename in os.listdir(folder_path):
-        if filename.endswith(".json"):
-            print(f"→ Scanning: {filename}")
-            file_path = os.path.join(folder_path, filename)
-            try:
-                with open(file_path, "r", encoding="utf-8") as file:
-                    data = json.load(file)
-                    for entry in data:
-                        code = entry.get(key)
-                        if code:
-                            energy_codes.add(code)
-            except Exception as e:
-                print(f"⚠️ Failed to process {filename}: {e}")
+    with os.scandir(folder_path) as it:
+        json_files = [dir_entry.name for dir_entry in it
+                      if dir_entry.name.endswith(".json") and dir_entry.is_file()]
+    for filename in json_files:
+        print(f"→ Scanning: {filename}")
+        file_path = os.path.join(folder_path, filename)
+        try:
+            # set.update drains the generator in C; falsy codes are dropped by filter
+            energy_codes.update(filter(None, (entry.get(key) for entry in iter_json_entries(file_path))))
+        except Exception as e:
+            print(f"⚠️ Failed to process {filename}: {e}")
 
     print("\n✔ Unique Energieträger codes found:\n")
     for code in sorted(energy_codes):
@@ -206,6 +206,7 @@ def pies_from_points(gdf_points, vmin, vmax, out_path: Path):
 def main():
     global_min = None
     global_max = None
+    points_by_bin = {}  # bin name -> points already read for global sizing
 
     if GLOBAL_SIZING and GLOBAL_META.exists():
         meta = json.loads(GLOBAL_META.read_text(encoding="utf-8"))
@@ -220,6 +221,7 @@ def main():
             pts = bin_dir / f"de_state_pies_{bin_dir.name}.geojson"
             if pts.exists():
                 gdf = gpd.read_file(pts)
+                points_by_bin[bin_dir.name] = gdf
                 if len(gdf):
                     totals += list(gdf["total_kw"].astype(float))
 
@@ -250,7 +252,9 @@ def main():
         else:
             print(f"[USING SCALE] {bin_dir.name}: BIN vmin={vmin:.2f}, vmax={vmax:.2f}")
 
-        gdf_points = gpd.read_file(pts_path)
+        gdf_points = points_by_bin.pop(bin_dir.name, None)
+        if gdf_points is None:
+            gdf_points = gpd.read_file(pts_path)
         out_geojson = bin_dir / f"de_state_pie_{bin_dir.name}.geojson"
 
         feature_count = pies_from_points(gdf_points, vmin, vmax, out_geojson)
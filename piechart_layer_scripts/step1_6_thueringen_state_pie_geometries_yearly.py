@@ -202,6 +202,7 @@ def pies_from_points(gdf_points, vmin, vmax, out_path: Path):
 def main():
     global_min = None
     global_max = None
+    points_by_bin = {}  # bin name -> points already read for global sizing
 
     # ---- global sizing meta ----
     if GLOBAL_SIZING and GLOBAL_META.exists():
@@ -216,6 +217,7 @@ def main():
             pts = bin_dir / f"thueringen_state_pies_{bin_dir.name}.geojson"
             if pts.exists():
                 g = gpd.read_file(pts)
+                points_by_bin[bin_dir.name] = g
                 if len(g):
                     totals += list(g["total_kw"].astype(float))
 
@@ -247,7 +249,9 @@ def main():
         else:
             print(f"[USING SCALE] {bin_dir.name}: BIN vmin={vmin:.2f}, vmax={vmax:.2f}")
 
-        g_points = gpd.read_file(pts)
+        g_points = points_by_bin.pop(bin_dir.name, None)
+        if g_points is None:
+            g_points = gpd.read_file(pts)
         out_geojson = bin_dir / f"thueringen_state_pie_{bin_dir.name}.geojson"
 
         feature_count = pies_from_points(g_points, vmin, vmax, out_geojson)
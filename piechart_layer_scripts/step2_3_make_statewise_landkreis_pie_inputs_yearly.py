@@ -585,21 +585,19 @@ def main():
     period_by_kreis_bin = {}
     kreis_center = {}
 
-    for (state_slug, kreis_key, bin_slug), grp in df.groupby(
-        ["state_slug", "kreis_key", "year_bin_slug"]
-    ):
-        label = grp["year_bin_label"].iloc[0]
+    # Sum power per (state, kreis, bin, part) in one vectorized pass
+    group_keys = ["state_slug", "kreis_key", "year_bin_slug"]
+    df = df.assign(_part=df["energy_norm"].map(PRIORITY).fillna(OTHERS))
+    part_sums = (
+        df.groupby(group_keys + ["_part"])["_power"].sum().unstack(fill_value=0.0)
+    )
 
-        parts = {f: 0.0 for f in PRIORITY.values()}
-        parts[OTHERS] = 0.0
+    for (state_slug, kreis_key, bin_slug), grp in df.groupby(group_keys):
+        label = grp["year_bin_label"].iloc[0]
 
-        for _, r in grp.iterrows():
-            cat = r["energy_norm"]
-            pkw = float(r["_power"])
-            if cat in PRIORITY:
-                parts[PRIORITY[cat]] += pkw
-            else:
-                parts[OTHERS] += pkw
+        sums = part_sums.loc[(state_slug, kreis_key, bin_slug)]
+        parts = {f: float(sums.get(f, 0.0)) for f in PRIORITY.values()}
+        parts[OTHERS] = float(sums.get(OTHERS, 0.0))
 
         parts["total_kw"] = float(sum(parts.values()))
         parts["state_slug"] = state_slug
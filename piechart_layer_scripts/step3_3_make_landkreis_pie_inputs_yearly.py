@@ -592,22 +592,20 @@ def main():
     period_by_kreis_bin = {}
     kreis_center = {}
 
-    for (state_slug, kreis_key, bin_slug), grp in df.groupby(
-        ["state_slug", "kreis_key", "year_bin_slug"]
-    ):
+    # Sum power per (state, kreis, bin, part) in one vectorized pass
+    group_keys = ["state_slug", "kreis_key", "year_bin_slug"]
+    df = df.assign(_part=df["energy_norm"].map(PRIORITY).fillna(OTHERS))
+    part_sums = (
+        df.groupby(group_keys + ["_part"])["_power"].sum().unstack(fill_value=0.0)
+    )
+
+    for (state_slug, kreis_key, bin_slug), grp in df.groupby(group_keys):
         label = grp["year_bin_label"].iloc[0]
         kreis_name = choose_label(grp["kreis_name"].tolist()) or kreis_key
 
-        parts = {f: 0.0 for f in PRIORITY.values()}
-        parts[OTHERS] = 0.0
-
-        for _, rr in grp.iterrows():
-            cat = rr["energy_norm"]
-            pkw = float(rr["_power"])
-            if cat in PRIORITY:
-                parts[PRIORITY[cat]] += pkw
-            else:
-                parts[OTHERS] += pkw
+        sums = part_sums.loc[(state_slug, kreis_key, bin_slug)]
+        parts = {f: float(sums.get(f, 0.0)) for f in PRIORITY.values()}
+        parts[OTHERS] = float(sums.get(OTHERS, 0.0))
 
         parts["total_kw"] = float(sum(parts.values()))
         parts["state_slug"] = state_slug
@@ -44,8 +44,10 @@ def plot_yearly_bar_charts(all_counts):
     tab_widget = QTabWidget()
 
     for state, yearly_counts in sorted(all_counts.items()):
-        years = sorted(yearly_counts.keys())
-        values = [yearly_counts[y] for y in years]
+        # Year keys are ints (parsed from the file name), so one sort over the items is enough
+        year_items = sorted(yearly_counts.items())
+        years = [y for y, _ in year_items]
+        values = [v for _, v in year_items]
 
         fig, ax = plt.subplots(figsize=(12, 10))
         fig.patch.set_facecolor("#f7f7f5")
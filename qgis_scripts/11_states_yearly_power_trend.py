@@ -50,8 +50,10 @@ def plot_power_trend_charts(all_state_data):
     tab_widget = QTabWidget()
 
     for state, yearly_data in sorted(all_state_data.items()):
-        years = sorted(yearly_data.keys())
-        values = [yearly_data[y] for y in years]
+        # Year keys are ints (parsed from the file name), so one sort over the items is enough
+        year_items = sorted(yearly_data.items())
+        years = [y for y, _ in year_items]
+        values = [v for _, v in year_items]
 
         fig, ax = plt.subplots(figsize=(12, 6))
         fig.patch.set_facecolor("#f7f7f5")
@@ -1,4 +1,5 @@
 import os
+import numpy as np
 from qgis.core import QgsVectorLayer
 
 # === PATH CONFIGURATION ===
@@ -26,6 +27,11 @@ OTHERS_CODES = {"2403", "2405", "2406", "2957", "2958"}
 # Optional: any unknown/rare codes will also fall back to "Others".
 GROUP_ORDER = ["Photovoltaics", "Onshore Wind", "Hydropower", "Biogas", "Battery", "Others"]
 
+# Code -> row in the per-state power array (unknown codes fall back to "Others")
+GROUP_INDEX = {g: i for i, g in enumerate(GROUP_ORDER)}
+CODE_TO_INDEX = {code: GROUP_INDEX[label] for code, label in PRIMARY_TYPES.items()}
+OTHERS_INDEX = GROUP_INDEX["Others"]
+
 # (Optional) color map for pie charts (same as legend)
 GROUP_COLORS = {
     "Photovoltaics": "yellow",
@@ -57,26 +63,17 @@ for fname in os.listdir(GEOJSON_FOLDER):
         print(f"❌ Failed to load {fname}")
         continue
 
-    # Grouped totals (five main + Others)
-    power_by_group = {g: 0.0 for g in GROUP_ORDER}
+    # Grouped totals (five main + Others), indexed like GROUP_ORDER
+    power_by_group = np.zeros(len(GROUP_ORDER), dtype=np.float64)
 
     for feat in layer.getFeatures():
         code = str(feat["Energietraeger"])
-        kw = parse_kw(feat["Bruttoleistung"])
-
-        if code in PRIMARY_TYPES:
-            key = PRIMARY_TYPES[code]
-        elif code in OTHERS_CODES:
-            key = "Others"
-        else:
-            key = "Others"  # fallback for any unexpected code
-
-        power_by_group[key] += kw
+        idx = CODE_TO_INDEX.get(code, OTHERS_INDEX)  # OTHERS_CODES and unexpected codes
+        power_by_group[idx] += parse_kw(feat["Bruttoleistung"])
 
     # Print in fixed order, skip zeros
     print(f"\n📍 State: {state_name}")
-    for g in GROUP_ORDER:
-        total_kw = power_by_group[g]
+    for g, total_kw in zip(GROUP_ORDER, power_by_group.tolist()):
         if total_kw > 0:
             print(f"  - {g}: {total_kw:.1f} kW")
 
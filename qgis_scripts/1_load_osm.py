@@ -1,9 +1,11 @@
 from qgis.core import QgsProject, QgsRasterLayer
 from qgis.utils import iface
 
+# OpenStreetMap XYZ source; explicit zoom range so QGIS does not probe the server for it
+OSM_URL = 'type=xyz&url=https://tile.openstreetmap.org/{z}/{x}/{y}.png&zmin=0&zmax=19'
+
 # Load OpenStreetMap basemap (XYZ layer)
-url = 'type=xyz&url=https://tile.openstreetmap.org/{z}/{x}/{y}.png'
-osm_layer = QgsRasterLayer(url, 'OpenStreetMap', 'wms')
+osm_layer = QgsRasterLayer(OSM_URL, 'OpenStreetMap', 'wms')
 
 if osm_layer.isValid():
     QgsProject.instance().addMapLayer(osm_layer)
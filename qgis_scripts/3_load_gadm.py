@@ -3,9 +3,12 @@ import os
 from qgis.core import (
     QgsProject, QgsVectorLayer, QgsRasterLayer,
     QgsPalLayerSettings, QgsTextFormat, QgsVectorLayerSimpleLabeling,
-    QgsFillSymbol, QgsSingleSymbolRenderer, QgsInvertedPolygonRenderer
+    QgsFillSymbol, QgsSingleSymbolRenderer, QgsInvertedPolygonRenderer,
+    QgsVectorSimplifyMethod
 )
 from qgis.PyQt.QtGui import QColor, QFont
+from qgis.utils import iface
+from osgeo import gdal, ogr
 
 # --- CONFIG -------------------------------------------------------------------
 BASE_PATH = r"C:/Users/jo73vure/Desktop/powerPlantProject/gadm_data/gadm41_DEU"
@@ -16,93 +19,245 @@ GADM_FILES = [
     ("gadm41_DEU_4.json", "gadm41_DEU_4"),
 ]
 VISIBLE = {"gadm41_DEU_1", "gadm41_DEU_2"}
+# Douglas-Peucker tolerance (degrees) baked into the copies of the dense levels
+SIMPLIFY_TOLERANCE = {"gadm41_DEU_3": 0.0005, "gadm41_DEU_4": 0.0005}
 OSM_NAME = "OpenStreetMap"  # change if your basemap layer name differs
+# Optional pre-downloaded Germany basemap; used instead of the online XYZ tiles if present
+OSM_MBTILES = r"C:/Users/jo73vure/Desktop/powerPlantProject/osm_data/germany.mbtiles"
 
 proj = QgsProject.instance()
 root = proj.layerTreeRoot()
 
-# --- 1) Remove existing OSM + GADM + DEU_mask (by id) -------------------------
-to_remove = []
-for lyr in list(proj.mapLayers().values()):
-    if not lyr:
-        continue
-    if lyr.name() in {OSM_NAME, "DEU_mask"}:
-        to_remove.append(lyr.id())
-    if lyr.name() in [n for _, n in GADM_FILES]:
-        to_remove.append(lyr.id())
-for lid in set(to_remove):
-    proj.removeMapLayer(lid)
-
-# Use panel order (turn off any stale custom order)
-root.setHasCustomLayerOrder(False)
-
-# --- 2) Add OSM FIRST (bottom) ------------------------------------------------
-# If OSM already exists in project, you can pull its source like before; here we just add fallback XYZ:
-xyz = 'type=xyz&url=https://tile.openstreetmap.org/{z}/{x}/{y}.png'
-osm_layer = QgsRasterLayer(xyz, OSM_NAME, 'wms')
-if osm_layer.isValid():
-    proj.addMapLayer(osm_layer)
-    print("🗺️ OpenStreetMap added first (bottom).")
-else:
-    print("⚠️ Could not add OpenStreetMap.")
-
-# --- 3) Add DEU_mask as 'Inverted Polygons' (outside = solid white) -----------
-states_path = os.path.join(BASE_PATH, "gadm41_DEU_0.json")
-mask_layer = QgsVectorLayer(states_path, "DEU_mask", "ogr")   # file-backed, NOT scratch
-if not mask_layer.isValid():
-    raise RuntimeError("Could not load gadm41_DEU_1.json for DEU_mask.")
-
-# Style: outside = white, inside = transparent
-fill_symbol   = QgsFillSymbol.createSimple({"color": "white", "outline_style": "no"})
-base_renderer = QgsSingleSymbolRenderer(fill_symbol)
-inv_renderer  = QgsInvertedPolygonRenderer(base_renderer)
-mask_layer.setRenderer(inv_renderer)
-mask_layer.setOpacity(1.0)
-
-proj.addMapLayer(mask_layer)
-print("🧱 DEU_mask (inverted polygons) added directly from gadm41_DEU_1 source.")
-
-# --- 4) Add GADM layers (above the mask) --------------------------------------
-loaded = {}
-for fname, name in GADM_FILES:
-    fpath = os.path.join(BASE_PATH, fname)
-    lyr = QgsVectorLayer(fpath, name, "ogr")
-    if lyr.isValid():
-        proj.addMapLayer(lyr)
-        loaded[name] = lyr
-        print(f"✅ Added: {name}")
+# --- Helper: FlatGeobuf copy with spatial index ---------------------------------
+def is_fresh(derived_path: str, source_path: str) -> bool:
+    """True if `derived_path` exists and is not older than `source_path`."""
+    return (
+        os.path.exists(derived_path)
+        and os.path.getmtime(derived_path) >= os.path.getmtime(source_path)
+    )
+
+def indexed_source(json_path: str, simplify: float = None) -> str:
+    """
+    Return a FlatGeobuf copy of a GADM GeoJSON (written next to it, with a
+    spatial index, and rebuilt only when the JSON is newer), so OGR does not
+    re-parse the whole JSON on every open.
+    With `simplify`, the copy is generalized with that tolerance, which is part of
+    the file name (e.g. "_s0.0005.fgb"), so changing the tolerance builds a new copy.
+    Falls back to the JSON path if the conversion fails.
+    """
+    suffix = f"_s{simplify}.fgb" if simplify else ".fgb"
+    fgb_path = os.path.splitext(json_path)[0] + suffix
+    if not is_fresh(fgb_path, json_path):
+        # Write under a temp name and move into place only once complete, so a failed or
+        # interrupted run never leaves a partial copy that is_fresh() would accept later
+        tmp_path = fgb_path[:-len(".fgb")] + ".tmp.fgb"
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)  # leftover of an interrupted run
+            # Without gdal.UseExceptions(), failure is signalled by a None return
+            ds = gdal.VectorTranslate(
+                tmp_path, json_path, format="FlatGeobuf",
+                layerCreationOptions=["SPATIAL_INDEX=YES"],
+                simplifyTolerance=simplify,
+            )
+            if ds is None:
+                raise RuntimeError(gdal.GetLastErrorMsg() or "gdal.VectorTranslate returned None")
+            ds = None  # close: flush to disk before the rename
+            os.replace(tmp_path, fgb_path)
+            print(f"🗂️ Converted {os.path.basename(json_path)} → {os.path.basename(fgb_path)}")
+        except Exception as e:
+            print(f"⚠️ FlatGeobuf conversion failed for {json_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return json_path
+    return fgb_path
+
+# --- Helper: pre-baked "outside Germany" mask ---------------------------------
+WORLD_WKT = "POLYGON((-180 -90, 180 -90, 180 90, -180 90, -180 -90))"
+
+def baked_mask_source(json_path: str) -> str:
+    """
+    Return a FlatGeobuf holding (world extent − Germany), written once next to the
+    source, so the mask is a plain polygon instead of being inverted on every repaint.
+    Returns None if baking fails (caller falls back to the inverted renderer).
+    """
+    mask_path = os.path.splitext(json_path)[0] + "_mask.fgb"
+    if is_fresh(mask_path, json_path):
+        return mask_path
+    # Baked under a temp name and renamed only once complete (see indexed_source)
+    tmp_path = mask_path[:-len(".fgb")] + ".tmp.fgb"
+    out_ds = None
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)  # leftover of an interrupted run
+        src_ds = ogr.Open(json_path)
+        if src_ds is None:
+            raise RuntimeError(gdal.GetLastErrorMsg() or "ogr.Open returned None")
+        src_lyr = src_ds.GetLayer(0)
+        land = None
+        for feat in src_lyr:
+            geom = feat.GetGeometryRef()
+            land = geom.Clone() if land is None else land.Union(geom)
+        outside = ogr.CreateGeometryFromWkt(WORLD_WKT).Difference(land)
+
+        out_ds = ogr.GetDriverByName("FlatGeobuf").CreateDataSource(tmp_path)
+        if out_ds is None:
+            raise RuntimeError(gdal.GetLastErrorMsg() or "CreateDataSource returned None")
+        out_lyr = out_ds.CreateLayer("DEU_mask", src_lyr.GetSpatialRef(), ogr.wkbUnknown)
+        out_feat = ogr.Feature(out_lyr.GetLayerDefn())
+        out_feat.SetGeometry(outside)
+        if out_lyr.CreateFeature(out_feat) != ogr.OGRERR_NONE:
+            raise RuntimeError(gdal.GetLastErrorMsg() or "CreateFeature failed")
+        out_ds = None  # flush to disk before the rename
+        os.replace(tmp_path, mask_path)
+        print(f"🧱 Baked mask → {os.path.basename(mask_path)}")
+        return mask_path
+    except Exception as e:
+        print(f"⚠️ Could not bake mask from {json_path}: {e}")
+        out_ds = None  # close before removing the partial file
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+def same_source(layer, path: str) -> bool:
+    """True if `layer` is a valid layer already reading `path` (ignoring OGR '|' options)."""
+    src = layer.source().split("|")[0]
+    return layer.isValid() and os.path.normcase(os.path.normpath(src)) == os.path.normcase(os.path.normpath(path))
+
+# Freeze the canvas while layers are added and styled; unfrozen in `finally`,
+# so a failed load never leaves it frozen
+canvas = iface.mapCanvas()
+canvas.freeze(True)
+try:
+    # --- 1) Remove existing OSM + DEU_mask, and GADM layers not reusable (by id) ---
+    # GADM layers already loaded from the same source in this session are kept, so
+    # re-running the script does not parse the same files again.
+    gadm_sources = {
+        name: indexed_source(os.path.join(BASE_PATH, fname), SIMPLIFY_TOLERANCE.get(name))
+        for fname, name in GADM_FILES
+    }
+    names_to_remove = {OSM_NAME, "DEU_mask", *gadm_sources}
+    reused = {}
+    to_remove = []
+    for lid, lyr in proj.mapLayers().items():
+        if not lyr:
+            continue
+        name = lyr.name()
+        if name not in names_to_remove:
+            continue
+        if name in gadm_sources and name not in reused and same_source(lyr, gadm_sources[name]):
+            reused[name] = lyr
+        else:
+            to_remove.append(lid)
+    for lid in set(to_remove):
+        proj.removeMapLayer(lid)
+
+    # Use panel order (turn off any stale custom order)
+    root.setHasCustomLayerOrder(False)
+
+    # --- 2) Add OSM FIRST (bottom) ------------------------------------------------
+    # Prefer local MBTiles (no network in the render loop); otherwise online XYZ tiles.
+    # Recommended: raise QGIS' network disk cache to ~1 GB (Settings > Options > Network >
+    # Cache settings) so revisited online tiles load from disk; this script leaves it alone.
+    if os.path.exists(OSM_MBTILES):
+        osm_layer = QgsRasterLayer(OSM_MBTILES, OSM_NAME, 'gdal')
+        osm_source = "local MBTiles"
     else:
-        print(f"❌ Failed to add: {name}")
-
-# Optional: make polygons transparent so OSM peeks through inside Germany
-for lyr in loaded.values():
-    lyr.setOpacity(0.35)
-    lyr.triggerRepaint()
-
-# Only 1–2 visible
-for name, lyr in loaded.items():
-    node = root.findLayer(lyr.id())
-    if node:
-        node.setItemVisibilityChecked(name in VISIBLE)
-
-## Labels on 1–2
-#def enable_labeling(layer, field_name: str, family="Arial", size=10, color="black"):
-#    if not layer:
-#        return
-#    s = QgsPalLayerSettings()
-#    s.fieldName = field_name
-#    s.enabled = True
-#    fmt = QgsTextFormat()
-#    fmt.setFont(QFont(family, size))
-#    fmt.setSize(size)
-#    fmt.setColor(QColor(color))
-#    s.setFormat(fmt)
-#    layer.setLabeling(QgsVectorLayerSimpleLabeling(s))
-#    layer.setLabelsEnabled(True)
-#    layer.triggerRepaint()
-#
-#enable_labeling(loaded.get("gadm41_DEU_1"), "NAME_1")
-#enable_labeling(loaded.get("gadm41_DEU_2"), "NAME_2")
-#print("🏷️ Labels enabled on 1–2.")
-
-print("✅ Final stack (bottom → top): OpenStreetMap → DEU_mask (inverted) → GADM_1..4 (1–2 visible)")
+        xyz = 'type=xyz&url=https://tile.openstreetmap.org/{z}/{x}/{y}.png&zmin=0&zmax=19'
+        osm_layer = QgsRasterLayer(xyz, OSM_NAME, 'wms')
+        osm_source = "online XYZ"
+    if osm_layer.isValid():
+        proj.addMapLayer(osm_layer)
+        print(f"🗺️ OpenStreetMap added first (bottom) from {osm_source}.")
+    else:
+        print("⚠️ Could not add OpenStreetMap.")
+
+    # Let QGIS simplify further on the fly while panning/zooming (~1 px tolerance,
+    # done locally so it also applies to providers without server-side simplification)
+    simplify_method = QgsVectorSimplifyMethod()
+    simplify_method.setSimplifyHints(
+        QgsVectorSimplifyMethod.GeometrySimplification | QgsVectorSimplifyMethod.AntialiasingSimplification
+    )
+    simplify_method.setSimplifyAlgorithm(QgsVectorSimplifyMethod.Distance)
+    simplify_method.setThreshold(1.0)
+    simplify_method.setForceLocalOptimization(True)
+
+    # --- 3) Add DEU_mask (outside = solid white) ----------------------------------
+    # Prefer the pre-baked outside polygon; fall back to inverting Germany per repaint.
+    deu0_json = os.path.join(BASE_PATH, "gadm41_DEU_0.json")
+    baked_path = baked_mask_source(deu0_json)
+    states_path = baked_path or indexed_source(deu0_json)
+    mask_layer = QgsVectorLayer(states_path, "DEU_mask", "ogr")   # file-backed, NOT scratch
+    if not mask_layer.isValid():
+        raise RuntimeError("Could not load gadm41_DEU_0 for DEU_mask.")
+
+    # Style: outside = white, inside = transparent
+    fill_symbol   = QgsFillSymbol.createSimple({"color": "white", "outline_style": "no"})
+    base_renderer = QgsSingleSymbolRenderer(fill_symbol)
+    if baked_path:
+        mask_layer.setRenderer(base_renderer)
+    else:
+        mask_layer.setRenderer(QgsInvertedPolygonRenderer(base_renderer))
+    mask_layer.setSimplifyMethod(simplify_method)
+    mask_layer.setOpacity(1.0)
+
+    proj.addMapLayer(mask_layer)
+    print(f"🧱 DEU_mask added ({'pre-baked outside polygon' if baked_path else 'inverted polygons'}).")
+
+    # --- 4) Add GADM layers (above the mask) --------------------------------------
+    loaded = {}
+    for fname, name in GADM_FILES:
+        if name in reused:
+            # Already in the project: only move its node above the mask (no reload)
+            lyr = reused[name]
+            node = root.findLayer(lyr.id())
+            if node:
+                parent = node.parent()
+                root.insertChildNode(0, node.clone())
+                parent.removeChildNode(node)
+            loaded[name] = lyr
+            print(f"♻️ Reused: {name}")
+            continue
+        lyr = QgsVectorLayer(gadm_sources[name], name, "ogr")
+        if lyr.isValid():
+            proj.addMapLayer(lyr)
+            loaded[name] = lyr
+            print(f"✅ Added: {name}")
+        else:
+            print(f"❌ Failed to add: {name}")
+
+    # Optional: make polygons transparent so OSM peeks through inside Germany
+    for lyr in loaded.values():
+        lyr.setSimplifyMethod(simplify_method)
+        lyr.setOpacity(0.35)
+
+    # Only 1–2 visible
+    for name, lyr in loaded.items():
+        node = root.findLayer(lyr.id())
+        if node:
+            node.setItemVisibilityChecked(name in VISIBLE)
+
+    ## Labels on 1–2
+    #def enable_labeling(layer, field_name: str, family="Arial", size=10, color="black"):
+    #    if not layer:
+    #        return
+    #    s = QgsPalLayerSettings()
+    #    s.fieldName = field_name
+    #    s.enabled = True
+    #    fmt = QgsTextFormat()
+    #    fmt.setFont(QFont(family, size))
+    #    fmt.setSize(size)
+    #    fmt.setColor(QColor(color))
+    #    s.setFormat(fmt)
+    #    layer.setLabeling(QgsVectorLayerSimpleLabeling(s))
+    #    layer.setLabelsEnabled(True)
+    #    layer.triggerRepaint()
+    #
+    #enable_labeling(loaded.get("gadm41_DEU_1"), "NAME_1")
+    #enable_labeling(loaded.get("gadm41_DEU_2"), "NAME_2")
+    #print("🏷️ Labels enabled on 1–2.")
+finally:
+    canvas.freeze(False)
+    canvas.refresh()
+
+print("✅ Final stack (bottom → top): OpenStreetMap → DEU_mask → GADM_1..4 (1–2 visible)")
@@ -1,14 +1,17 @@
 # 4_create_state_layers_from_gadm.py
-# Build one toggleable item per German state (from GADM Level-1),
-# and give each item a "Germany-style" mask so ONLY that state remains visible.
+# Build one outline layer and one "Germany-style" mask layer over all German states
+# (from GADM Level-1); only the state named by the project variable @active_state
+# is outlined and left visible. Switch focus with focus_state("<NAME_1>").
 # Comments and filename are intentionally in English.
 
 import os
 from qgis.core import (
-    QgsProject, QgsVectorLayer, QgsFillSymbol, QgsSingleSymbolRenderer,
-    QgsInvertedPolygonRenderer, QgsLayerTreeLayer
+    QgsProject, QgsVectorLayer, QgsFillSymbol, QgsRuleBasedRenderer,
+    QgsInvertedPolygonRenderer, QgsLayerTreeLayer, QgsExpressionContextUtils,
+    QgsVectorSimplifyMethod, QgsFeatureRequest
 )
 from qgis.PyQt.QtGui import QColor
+from osgeo import gdal, ogr
 
 # --- CONFIG -------------------------------------------------------------------
 # If you already set these in 3_load_gadm.py, you can keep them consistent here.
@@ -17,9 +20,96 @@ GADM1_FILE = "gadm41_DEU_1.json"   # Bundesländer polygons (GeoJSON/JSON via OG
 STATE_FIELD = "NAME_1"             # GADM Level-1 state name
 GROUP_NAME  = "DE States (masked)"
 DEFAULT_VISIBLE_STATE = "Thüringen"  # set which state starts visible
+ACTIVE_STATE_VAR = "active_state"    # project variable read by both renderers
+
+# --- HELPER: FlatGeobuf copy with spatial index ---------------------------------
+def is_fresh(derived_path: str, source_path: str) -> bool:
+    """True if `derived_path` exists and is not older than `source_path`."""
+    return (
+        os.path.exists(derived_path)
+        and os.path.getmtime(derived_path) >= os.path.getmtime(source_path)
+    )
+
+def indexed_source(json_path: str) -> str:
+    """
+    Return a FlatGeobuf copy of a GADM GeoJSON (written next to it, with a
+    spatial index, and rebuilt only when the JSON is newer), so the layers below
+    do not re-parse the whole JSON.
+    Falls back to the JSON path if the conversion fails.
+    """
+    fgb_path = os.path.splitext(json_path)[0] + ".fgb"
+    if not is_fresh(fgb_path, json_path):
+        # temp name + rename: a failed run never leaves a partial copy behind
+        tmp_path = fgb_path[:-len(".fgb")] + ".tmp.fgb"
+        try:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)  # leftover of an interrupted run
+            ds = gdal.VectorTranslate(
+                tmp_path, json_path, format="FlatGeobuf",
+                layerCreationOptions=["SPATIAL_INDEX=YES"],
+            )
+            if ds is None:
+                raise RuntimeError(gdal.GetLastErrorMsg() or "gdal.VectorTranslate returned None")
+            ds = None  # close: flush to disk before the rename
+            os.replace(tmp_path, fgb_path)
+            print(f"🗂️ Converted {os.path.basename(json_path)} → {os.path.basename(fgb_path)}")
+        except Exception as e:
+            print(f"⚠️ FlatGeobuf conversion failed for {json_path}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return json_path
+    return fgb_path
+
+# --- HELPER: pre-baked "outside each state" masks -------------------------------
+WORLD_WKT = "POLYGON((-180 -90, 180 -90, 180 90, -180 90, -180 -90))"
+
+def baked_state_masks(path: str):
+    """
+    Return a GeoPackage with one (world extent − state) polygon per state, keyed by
+    an indexed STATE_FIELD and written once next to the source, so the mask layer
+    draws a plain polygon instead of inverting on every repaint, and a subset on
+    STATE_FIELD is an index lookup that fetches only the active state's polygon.
+    Returns None if baking fails (caller falls back to the inverted renderer).
+    """
+    mask_path = os.path.splitext(path)[0] + "_state_masks.gpkg"
+    if is_fresh(mask_path, path):
+        return mask_path
+    tmp_path = mask_path[:-len(".gpkg")] + ".tmp.gpkg"  # renamed into place only when complete
+    out_ds = None
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        src_ds = ogr.Open(path)
+        if src_ds is None:
+            raise RuntimeError(gdal.GetLastErrorMsg() or "ogr.Open returned None")
+        src_lyr = src_ds.GetLayer(0)
+        world = ogr.CreateGeometryFromWkt(WORLD_WKT)
+
+        out_ds = ogr.GetDriverByName("GPKG").CreateDataSource(tmp_path)
+        if out_ds is None:
+            raise RuntimeError(gdal.GetLastErrorMsg() or "CreateDataSource returned None")
+        out_lyr = out_ds.CreateLayer("state_masks", src_lyr.GetSpatialRef(), ogr.wkbUnknown)
+        out_lyr.CreateField(ogr.FieldDefn(STATE_FIELD, ogr.OFTString))
+        for feat in src_lyr:
+            out_feat = ogr.Feature(out_lyr.GetLayerDefn())
+            out_feat.SetField(STATE_FIELD, feat.GetField(STATE_FIELD))
+            out_feat.SetGeometry(world.Difference(feat.GetGeometryRef()))
+            if out_lyr.CreateFeature(out_feat) != ogr.OGRERR_NONE:
+                raise RuntimeError(gdal.GetLastErrorMsg() or "CreateFeature failed")
+        out_ds.ExecuteSQL(f'CREATE INDEX IF NOT EXISTS idx_state_masks_name ON state_masks("{STATE_FIELD}")')
+        out_ds = None  # flush to disk before the rename
+        os.replace(tmp_path, mask_path)
+        print(f"🧱 Baked state masks → {os.path.basename(mask_path)}")
+        return mask_path
+    except Exception as e:
+        print(f"⚠️ Could not bake state masks from {path}: {e}")
+        out_ds = None
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
 
 # --- LOAD THE SOURCE LAYER ----------------------------------------------------
-src_path = os.path.join(BASE_PATH, GADM1_FILE)
+src_path = indexed_source(os.path.join(BASE_PATH, GADM1_FILE))
 src_path = src_path.replace("\\", "/")  # OGR prefers forward slashes on Windows
 src = QgsVectorLayer(src_path, "gadm_1_src", "ogr")
 if not src.isValid():
@@ -29,7 +119,9 @@ idx = src.fields().indexOf(STATE_FIELD)
 if idx < 0:
     raise RuntimeError(f"Field '{STATE_FIELD}' not found in {GADM1_FILE}")
 
-state_names = sorted([str(v) for v in src.uniqueValues(idx)])
+# Attribute-only scan: no geometry is deserialized, only the NAME_1 column is read
+req = QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry).setSubsetOfAttributes([idx])
+state_names = sorted({str(f[idx]) for f in src.getFeatures(req)})
 
 # --- PREPARE THE GROUP --------------------------------------------------------
 project = QgsProject.instance()
@@ -51,57 +143,91 @@ def add_layer_under(group, layer):
     group.insertChildNode(0, QgsLayerTreeLayer(layer))
 
 # --- STYLE DEFINITIONS --------------------------------------------------------
-def make_white_mask_renderer():
-    """Return an inverted-polygon renderer that paints OUTSIDE the state in white."""
+# Both layers hold all states; one rule keyed on @active_state picks the focused one.
+ACTIVE_STATE_FILTER = f'"{STATE_FIELD}" = @{ACTIVE_STATE_VAR}'
+
+def make_active_state_rules(symbol):
+    """Return a rule-based renderer that draws `symbol` for the active state only."""
+    root_rule = QgsRuleBasedRenderer.Rule(None)
+    rule = QgsRuleBasedRenderer.Rule(symbol)
+    rule.setFilterExpression(ACTIVE_STATE_FILTER)
+    rule.setLabel("Active state")
+    root_rule.appendChild(rule)
+    return QgsRuleBasedRenderer(root_rule)
+
+def make_white_mask_renderer(baked: bool):
+    """
+    Return a renderer that paints OUTSIDE the active state in white: a plain fill for
+    the pre-baked masks, otherwise an inverted-polygon renderer over the states.
+    """
     white_fill = QgsFillSymbol.createSimple({
         "color": "255,255,255,255",        # opaque white
         "outline_color": "255,255,255,0",  # no outline
         "outline_width": "0"
     })
-    return QgsInvertedPolygonRenderer(QgsSingleSymbolRenderer(white_fill))
+    rules = make_active_state_rules(white_fill)
+    return rules if baked else QgsInvertedPolygonRenderer(rules)
 
 def make_outline_renderer():
-    """Return a simple renderer that draws only the state outline."""
+    """Return a renderer that draws only the active state's outline."""
     outline = QgsFillSymbol.createSimple({
         "color": "255,255,255,0",    # transparent fill
         "outline_color": "0,0,0,255",
         "outline_width": "0.8"
     })
-    return QgsSingleSymbolRenderer(outline)
-
-# --- BUILD ONE "ITEM" PER STATE ----------------------------------------------
-created = 0
-for name in state_names:
-    # Defensive quoting for single quotes in names (OGR SQL)
-    safe = name.replace("'", "''")
-    subset = f""""{STATE_FIELD}" = '{safe}'"""
-
-    # We create two sibling layers inside a per-state group:
-    #  1) <State> – Outline (normal renderer)
-    #  2) <State> – Mask outside (inverted polygon to white)
-    state_group = parent_group.addGroup(name)
-
-    # Outline
-    outline_layer = QgsVectorLayer(src.source(), f"{name} – Outline", "ogr")
-    outline_layer.setSubsetString(subset)
-    outline_layer.setRenderer(make_outline_renderer())
-    add_layer_under(state_group, outline_layer)
-
-    # Mask (outside the state)
-    mask_layer = QgsVectorLayer(src.source(), f"{name} – Mask outside", "ogr")
-    mask_layer.setSubsetString(subset)
-    mask_layer.setRenderer(make_white_mask_renderer())
-    add_layer_under(state_group, mask_layer)
-
-    # Visibility: only the chosen default state's group is on
-    state_group.setItemVisibilityChecked(name == DEFAULT_VISIBLE_STATE)
-
-    created += 1
-
-print(f"✅ Created {created} state groups under: '{GROUP_NAME}'.")
-print("ℹ️ Each group contains:")
-print("   • an outline layer to delineate the state, and")
-print("   • a white 'inverted polygon' mask that hides everything outside the state.")
-print(f"👁️ Only '{DEFAULT_VISIBLE_STATE}' is visible initially. Toggle groups to switch focus.")
-
-
+    return make_active_state_rules(outline)
+
+# --- BUILD THE TWO LAYERS -----------------------------------------------------
+#  1) DE States – Outline (rule-based, active state only)
+#  2) DE States – Mask outside (white around the active state; pre-baked if possible)
+outline_layer = src
+outline_layer.setName("DE States – Outline")
+outline_layer.setRenderer(make_outline_renderer())
+
+masks_path = baked_state_masks(src_path)
+if masks_path:
+    mask_layer = QgsVectorLayer(masks_path, "DE States – Mask outside", "ogr")
+if not masks_path or not mask_layer.isValid():
+    masks_path = None
+    mask_layer = src.clone()
+    mask_layer.setName("DE States – Mask outside")
+mask_layer.setRenderer(make_white_mask_renderer(baked=masks_path is not None))
+
+# On-the-fly simplification (~1 px tolerance) for both polygon layers
+simplify_method = QgsVectorSimplifyMethod()
+simplify_method.setSimplifyHints(
+    QgsVectorSimplifyMethod.GeometrySimplification | QgsVectorSimplifyMethod.AntialiasingSimplification
+)
+simplify_method.setSimplifyAlgorithm(QgsVectorSimplifyMethod.Distance)
+simplify_method.setThreshold(1.0)
+simplify_method.setForceLocalOptimization(True)
+outline_layer.setSimplifyMethod(simplify_method)
+mask_layer.setSimplifyMethod(simplify_method)
+
+add_layer_under(parent_group, mask_layer)
+add_layer_under(parent_group, outline_layer)
+
+def focus_state(name: str):
+    """
+    Switch the focused state. The outline only re-evaluates its rule; the baked mask
+    layer narrows its (indexed) subset to the one polygon it has to draw.
+    """
+    if name not in state_names:
+        print(f"⚠️ Unknown state '{name}'. Available: {', '.join(state_names)}")
+        return
+    QgsExpressionContextUtils.setProjectVariable(project, ACTIVE_STATE_VAR, name)
+    if masks_path:
+        # Defensive quoting for single quotes in names (OGR SQL)
+        safe = name.replace("'", "''")
+        mask_layer.setSubsetString(f""""{STATE_FIELD}" = '{safe}'""")
+    outline_layer.triggerRepaint()
+    mask_layer.triggerRepaint()
+    print(f"👁️ Active state: {name}")
+
+focus_state(DEFAULT_VISIBLE_STATE)
+
+print(f"✅ Created outline + mask layers for {len(state_names)} states under: '{GROUP_NAME}'.")
+print("ℹ️ The group contains:")
+print("   • an outline layer that delineates the active state, and")
+print("   • a white mask that hides everything outside it.")
+print(f"👁️ '{DEFAULT_VISIBLE_STATE}' is active initially. Call focus_state(\"<NAME_1>\") to switch focus.")
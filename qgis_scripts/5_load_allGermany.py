@@ -6,8 +6,10 @@
 
 from qgis.core import (
     QgsVectorLayer, QgsProject, QgsRuleBasedRenderer, QgsMarkerSymbol,
-    QgsSymbolLayer, QgsProperty
+    QgsSymbolLayer, QgsProperty, QgsPointClusterRenderer, QgsUnitTypes
 )
+from osgeo import gdal, ogr
+import math
 import os
 
 # --- Primary 5 codes -> group names -------------------------------------------
@@ -30,27 +32,137 @@ GROUP_COLORS = {
     "Others": "gray",
 }
 
+# --- Helper: GeoPackage copy with precomputed style columns ------------------
+def symbol_size(brutto) -> float:
+    """Marker size ~ log(Bruttoleistung); 0.1 for missing/non-positive power."""
+    try:
+        kw = float(str(brutto).replace(",", "."))
+    except (TypeError, ValueError):
+        return 0.1
+    return 1 + math.log10(kw) if kw > 0 else 0.1
+
+def stroke_color(feat) -> str:
+    """Outline green if remotely controllable, else black."""
+    remote = "1" in (str(feat.GetField("FernsteuerbarkeitNb")), str(feat.GetField("FernsteuerbarkeitDv")))
+    return "green" if remote else "black"
+
+def is_fresh(derived_path: str, source_path: str) -> bool:
+    """True if `derived_path` exists and is not older than `source_path`."""
+    return (
+        os.path.exists(derived_path)
+        and os.path.getmtime(derived_path) >= os.path.getmtime(source_path)
+    )
+
+def grouped_source(geojson_path: str):
+    """
+    Write a GeoPackage next to the GeoJSON (rebuilt when the GeoJSON is newer)
+    with an integer "group_code" column (index into GROUP_ORDER) plus an attribute
+    index on it and on "Energietraeger", so each rule is one indexed integer comparison.
+    Also stores "size_px" and "stroke_col", so symbols read plain fields instead
+    of evaluating expressions per feature on every repaint.
+    Returns the GPKG path, or None if the conversion fails.
+    """
+    gpkg_path = os.path.splitext(geojson_path)[0] + ".gpkg"
+    if is_fresh(gpkg_path, geojson_path):
+        return gpkg_path
+    src_layer = os.path.splitext(os.path.basename(geojson_path))[0]
+    cases = " ".join(
+        f"WHEN '{code}' THEN {GROUP_ORDER.index(group)}" for code, group in PRIMARY_TYPES.items()
+    )
+    # Exact code match, same as the GeoJSON fallback filters (no trim() in either)
+    sql = (
+        f"SELECT *, CASE CAST(Energietraeger AS TEXT) {cases} "
+        f"ELSE {GROUP_ORDER.index('Others')} END AS group_code FROM \"{src_layer}\""
+    )
+    tmp_path = gpkg_path[:-len(".gpkg")] + ".tmp.gpkg"  # renamed into place only when complete
+    ds = None
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)  # leftover of an interrupted run
+        ds = gdal.VectorTranslate(
+            tmp_path, geojson_path, format="GPKG",
+            SQLStatement=sql, SQLDialect="SQLITE", layerName="plants",
+        )
+        if ds is None:
+            raise RuntimeError(gdal.GetLastErrorMsg() or "gdal.VectorTranslate returned None")
+        ds = None
+        ds = ogr.Open(tmp_path, update=1)
+        if ds is None:
+            raise RuntimeError(gdal.GetLastErrorMsg() or "ogr.Open returned None")
+        lyr = ds.GetLayerByName("plants")
+        lyr.CreateField(ogr.FieldDefn("size_px", ogr.OFTReal))
+        lyr.CreateField(ogr.FieldDefn("stroke_col", ogr.OFTString))
+        has_remote = all(
+            lyr.GetLayerDefn().GetFieldIndex(f) >= 0 for f in ("FernsteuerbarkeitNb", "FernsteuerbarkeitDv")
+        )
+        has_power = lyr.GetLayerDefn().GetFieldIndex("Bruttoleistung") >= 0
+        lyr.StartTransaction()
+        for feat in lyr:
+            feat.SetField("size_px", symbol_size(feat.GetField("Bruttoleistung")) if has_power else 0.1)
+            feat.SetField("stroke_col", stroke_color(feat) if has_remote else "black")
+            lyr.SetFeature(feat)
+        lyr.CommitTransaction()
+        ds.ExecuteSQL("CREATE INDEX IF NOT EXISTS idx_plants_group_code ON plants(group_code)")
+        ds.ExecuteSQL("CREATE INDEX IF NOT EXISTS idx_plants_energietraeger ON plants(Energietraeger)")
+        ds = None  # flush to disk before the rename
+        os.replace(tmp_path, gpkg_path)
+        print(f"🗂️ Converted {os.path.basename(geojson_path)} → {os.path.basename(gpkg_path)}")
+        return gpkg_path
+    except Exception as e:
+        print(f"⚠️ GeoPackage conversion failed for {geojson_path}: {e}")
+        ds = None  # close before removing the partial file
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+# --- Helper: cluster near-coincident points on dense layers --------------------
+CLUSTER_MIN_FEATURES = 5000   # layers above this size get a cluster renderer
+CLUSTER_TOLERANCE_PX = 5.0
+
+def with_clustering(layer, renderer):
+    """
+    Wrap `renderer` in a QgsPointClusterRenderer for dense layers, so overlapping
+    rooftop-PV dots collapse into one cluster glyph; individual (rule-styled)
+    symbols reappear once points are further apart than the tolerance.
+    """
+    if layer.featureCount() <= CLUSTER_MIN_FEATURES:
+        return renderer
+    cluster = QgsPointClusterRenderer()
+    cluster.setEmbeddedRenderer(renderer)
+    cluster.setTolerance(CLUSTER_TOLERANCE_PX)
+    cluster.setToleranceUnit(QgsUnitTypes.RenderPixels)
+    return cluster
+
 # --- Data path ----------------------------------------------------------------
 geojson_path = r"C:\Users\jo73vure\Desktop\powerPlantProject\data\geojson\all_germany_three_checks.geojson"
 layer_name = "all_germany"
-layer = QgsVectorLayer(geojson_path, layer_name, "ogr")
+gpkg_path = grouped_source(geojson_path)
+layer = QgsVectorLayer(gpkg_path or geojson_path, layer_name, "ogr")
 
 if not layer.isValid():
     print("❌ Failed to load all_germany_three_checks.geojson.")
 else:
     # Root for rule-based renderer
     root_rule = QgsRuleBasedRenderer.Rule(None)
+    # Precomputed size/stroke columns present (GeoPackage copy)?
+    precomputed = layer.fields().indexOf("size_px") >= 0
 
     # Helper to build a symbol with our data-defined properties
-    def build_symbol(fill_color: str) -> QgsMarkerSymbol:
+    def build_symbol(fill_color: str, precomputed: bool = False) -> QgsMarkerSymbol:
         sym = QgsMarkerSymbol.createSimple({
             "name": "circle",
             "color": fill_color,
             "outline_color": "black",
             "size": "4"  # base size; overridden by data-defined property below
         })
+        layer0 = sym.symbolLayer(0)
+        if precomputed:
+            # Plain field reads of the columns baked into the GeoPackage
+            layer0.setDataDefinedProperty(QgsSymbolLayer.PropertySize, QgsProperty.fromField("size_px"))
+            layer0.setDataDefinedProperty(QgsSymbolLayer.PropertyStrokeColor, QgsProperty.fromField("stroke_col"))
+            return sym
         # Size ~ log(Bruttoleistung)
-        sym.symbolLayer(0).setDataDefinedProperty(
+        layer0.setDataDefinedProperty(
             QgsSymbolLayer.PropertySize,
             QgsProperty.fromExpression(
                 'CASE WHEN "Bruttoleistung" IS NOT NULL AND "Bruttoleistung" > 0 '
@@ -58,7 +170,7 @@ else:
             )
         )
         # Outline green if remotely controllable, else black
-        sym.symbolLayer(0).setDataDefinedProperty(
+        layer0.setDataDefinedProperty(
             QgsSymbolLayer.PropertyStrokeColor,
             QgsProperty.fromExpression(
                 "CASE WHEN \"FernsteuerbarkeitNb\" = '1' OR \"FernsteuerbarkeitDv\" = '1' "
@@ -67,34 +179,28 @@ else:
         )
         return sym
 
-    # --- Rules for the 5 primary groups (one code each; stable legend order) ---
+    # --- One rule per group (stable legend order) -----------------------------
     code_by_group = {v: k for k, v in PRIMARY_TYPES.items()}
-    for group in GROUP_ORDER:
-        if group == "Others":
-            continue
-        code = code_by_group[group]
-        symbol = build_symbol(GROUP_COLORS[group])
+    primary_codes_list = ",".join([f"'{c}'" for c in PRIMARY_TYPES.keys()])
+    for group_code, group in enumerate(GROUP_ORDER):
+        if gpkg_path:
+            # Precomputed integer group column (indexed in the GeoPackage)
+            expr = f"\"group_code\" = {group_code}"
+        elif group != "Others":
+            expr = f"\"Energietraeger\" = '{code_by_group[group]}'"
+        else:
+            # Catch-all for "Others" (QGIS 3.10: use a filter expression)
+            # ('' is never a primary code, so NOT IN already covers blanks; no trim())
+            expr = f"\"Energietraeger\" IS NULL OR \"Energietraeger\" NOT IN ({primary_codes_list})"
+        symbol = build_symbol(GROUP_COLORS[group], precomputed)
         rule = QgsRuleBasedRenderer.Rule(symbol)
-        rule.setFilterExpression(f"\"Energietraeger\" = '{code}'")
+        rule.setFilterExpression(expr)
         rule.setLabel(group)
         root_rule.appendChild(rule)
 
-    # --- Catch-all rule for "Others" (QGIS 3.10: use a filter expression) ------
-    others_symbol = build_symbol(GROUP_COLORS["Others"])
-    others_rule = QgsRuleBasedRenderer.Rule(others_symbol)
-
-    primary_codes_list = ",".join([f"'{c}'" for c in PRIMARY_TYPES.keys()])
-    others_expr = (
-        f"\"Energietraeger\" IS NULL OR trim(\"Energietraeger\") = '' "
-        f"OR NOT (\"Energietraeger\" IN ({primary_codes_list}))"
-    )
-    others_rule.setFilterExpression(others_expr)
-    others_rule.setLabel("Others")
-    root_rule.appendChild(others_rule)
-
     # Apply renderer
     renderer = QgsRuleBasedRenderer(root_rule)
-    layer.setRenderer(renderer)
+    layer.setRenderer(with_clustering(layer, renderer))
 
     QgsProject.instance().addMapLayer(layer)
     print("✅ all_germany styled with 5+Others color coding (QGIS 3.10 compatible).")
@@ -6,11 +6,15 @@
 
 from qgis.core import (
     QgsVectorLayer, QgsProject, QgsLayerTreeLayer, QgsLayerTreeGroup,
-    QgsRuleBasedRenderer, QgsMarkerSymbol, QgsSymbolLayer, QgsProperty
+    QgsRuleBasedRenderer, QgsMarkerSymbol, QgsSymbolLayer, QgsProperty,
+    QgsPointClusterRenderer, QgsUnitTypes
 )
 from qgis.core import (
     QgsPalLayerSettings, QgsTextFormat, QgsVectorLayerSimpleLabeling
 )
+from qgis.utils import iface
+from osgeo import gdal, ogr
+import math
 import os
 
 geojson_folder = r"C:\Users\jo73vure\Desktop\powerPlantProject\data\geojson\by_state_three_checks"
@@ -43,15 +47,122 @@ GROUP_COLORS = {
     "Others": "gray",
 }
 
-def build_symbol(fill_color: str) -> QgsMarkerSymbol:
+# --- Helper: GeoPackage copy with precomputed style columns ------------------
+def symbol_size(brutto) -> float:
+    """Marker size ~ log(Bruttoleistung); 0.1 for missing/non-positive power."""
+    try:
+        kw = float(str(brutto).replace(",", "."))
+    except (TypeError, ValueError):
+        return 0.1
+    return 1 + math.log10(kw) if kw > 0 else 0.1
+
+def stroke_color(feat) -> str:
+    """Outline green if remotely controllable, else black."""
+    remote = "1" in (str(feat.GetField("FernsteuerbarkeitNb")), str(feat.GetField("FernsteuerbarkeitDv")))
+    return "green" if remote else "black"
+
+def is_fresh(derived_path: str, source_path: str) -> bool:
+    """True if `derived_path` exists and is not older than `source_path`."""
+    return (
+        os.path.exists(derived_path)
+        and os.path.getmtime(derived_path) >= os.path.getmtime(source_path)
+    )
+
+def grouped_source(geojson_path: str):
+    """
+    Write a GeoPackage next to the GeoJSON (rebuilt when the GeoJSON is newer)
+    with an integer "group_code" column (index into GROUP_ORDER) plus an attribute
+    index on it and on "Energietraeger", so each rule is one indexed integer comparison.
+    Also stores "size_px" and "stroke_col", so symbols read plain fields instead
+    of evaluating expressions per feature on every repaint.
+    Returns the GPKG path, or None if the conversion fails.
+    """
+    gpkg_path = os.path.splitext(geojson_path)[0] + ".gpkg"
+    if is_fresh(gpkg_path, geojson_path):
+        return gpkg_path
+    src_layer = os.path.splitext(os.path.basename(geojson_path))[0]
+    cases = " ".join(
+        f"WHEN '{code}' THEN {GROUP_ORDER.index(group)}" for code, group in PRIMARY_TYPES.items()
+    )
+    # Exact code match, same as the GeoJSON fallback filters (no trim() in either)
+    sql = (
+        f"SELECT *, CASE CAST(Energietraeger AS TEXT) {cases} "
+        f"ELSE {GROUP_ORDER.index('Others')} END AS group_code FROM \"{src_layer}\""
+    )
+    tmp_path = gpkg_path[:-len(".gpkg")] + ".tmp.gpkg"  # renamed into place only when complete
+    ds = None
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)  # leftover of an interrupted run
+        ds = gdal.VectorTranslate(
+            tmp_path, geojson_path, format="GPKG",
+            SQLStatement=sql, SQLDialect="SQLITE", layerName="plants",
+        )
+        if ds is None:
+            raise RuntimeError(gdal.GetLastErrorMsg() or "gdal.VectorTranslate returned None")
+        ds = None
+        ds = ogr.Open(tmp_path, update=1)
+        if ds is None:
+            raise RuntimeError(gdal.GetLastErrorMsg() or "ogr.Open returned None")
+        lyr = ds.GetLayerByName("plants")
+        lyr.CreateField(ogr.FieldDefn("size_px", ogr.OFTReal))
+        lyr.CreateField(ogr.FieldDefn("stroke_col", ogr.OFTString))
+        has_remote = all(
+            lyr.GetLayerDefn().GetFieldIndex(f) >= 0 for f in ("FernsteuerbarkeitNb", "FernsteuerbarkeitDv")
+        )
+        has_power = lyr.GetLayerDefn().GetFieldIndex("Bruttoleistung") >= 0
+        lyr.StartTransaction()
+        for feat in lyr:
+            feat.SetField("size_px", symbol_size(feat.GetField("Bruttoleistung")) if has_power else 0.1)
+            feat.SetField("stroke_col", stroke_color(feat) if has_remote else "black")
+            lyr.SetFeature(feat)
+        lyr.CommitTransaction()
+        ds.ExecuteSQL("CREATE INDEX IF NOT EXISTS idx_plants_group_code ON plants(group_code)")
+        ds.ExecuteSQL("CREATE INDEX IF NOT EXISTS idx_plants_energietraeger ON plants(Energietraeger)")
+        ds = None  # flush to disk before the rename
+        os.replace(tmp_path, gpkg_path)
+        print(f"🗂️ Converted {os.path.basename(geojson_path)} → {os.path.basename(gpkg_path)}")
+        return gpkg_path
+    except Exception as e:
+        print(f"⚠️ GeoPackage conversion failed for {geojson_path}: {e}")
+        ds = None  # close before removing the partial file
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+
+# --- Helper: cluster near-coincident points on dense layers --------------------
+CLUSTER_MIN_FEATURES = 5000   # layers above this size get a cluster renderer
+CLUSTER_TOLERANCE_PX = 5.0
+
+def with_clustering(layer, renderer):
+    """
+    Wrap `renderer` in a QgsPointClusterRenderer for dense layers, so overlapping
+    rooftop-PV dots collapse into one cluster glyph; individual (rule-styled)
+    symbols reappear once points are further apart than the tolerance.
+    """
+    if layer.featureCount() <= CLUSTER_MIN_FEATURES:
+        return renderer
+    cluster = QgsPointClusterRenderer()
+    cluster.setEmbeddedRenderer(renderer)
+    cluster.setTolerance(CLUSTER_TOLERANCE_PX)
+    cluster.setToleranceUnit(QgsUnitTypes.RenderPixels)
+    return cluster
+
+def build_symbol(fill_color: str, precomputed: bool = False) -> QgsMarkerSymbol:
     sym = QgsMarkerSymbol.createSimple({
         "name": "circle",
         "color": fill_color,
         "outline_color": "black",
         "size": "4"  # base size; overridden below
     })
+    layer0 = sym.symbolLayer(0)
+    if precomputed:
+        # Plain field reads of the columns baked into the GeoPackage
+        layer0.setDataDefinedProperty(QgsSymbolLayer.PropertySize, QgsProperty.fromField("size_px"))
+        layer0.setDataDefinedProperty(QgsSymbolLayer.PropertyStrokeColor, QgsProperty.fromField("stroke_col"))
+        return sym
     # Log-scale symbol size by installed power
-    sym.symbolLayer(0).setDataDefinedProperty(
+    layer0.setDataDefinedProperty(
         QgsSymbolLayer.PropertySize,
         QgsProperty.fromExpression(
             'CASE WHEN "Bruttoleistung" IS NOT NULL AND "Bruttoleistung" > 0 '
@@ -59,7 +170,7 @@ def build_symbol(fill_color: str) -> QgsMarkerSymbol:
         )
     )
     # Outline green if remotely controllable, else black
-    sym.symbolLayer(0).setDataDefinedProperty(
+    layer0.setDataDefinedProperty(
         QgsSymbolLayer.PropertyStrokeColor,
         QgsProperty.fromExpression(
             "CASE WHEN \"FernsteuerbarkeitNb\" = '1' OR \"FernsteuerbarkeitDv\" = '1' "
@@ -68,55 +179,77 @@ def build_symbol(fill_color: str) -> QgsMarkerSymbol:
     )
     return sym
 
-# Loop through all GeoJSON files
-for file_name in os.listdir(geojson_folder):
-    if not file_name.endswith(".geojson"):
-        continue
-
-    file_path = os.path.join(geojson_folder, file_name)
-    layer_name = os.path.splitext(file_name)[0].replace("_", " ").title().replace(" ", "_")
-    layer = QgsVectorLayer(file_path, layer_name, "ogr")
+# Rule trees are identical for every state: build one reference tree per variant
+# (group_code column or Energietraeger expressions × precomputed-column or expression
+# symbols) and give each layer a clone, so filters and symbols are not rebuilt per file.
+code_by_group = {v: k for k, v in PRIMARY_TYPES.items()}
+primary_code_list = ",".join([f"'{c}'" for c in PRIMARY_TYPES.keys()])
+_reference_rules = {}
 
-    if not layer.isValid():
-        print(f"❌ Failed to load: {file_name}")
-        continue
+def reference_rules(use_group_code: bool, precomputed: bool) -> QgsRuleBasedRenderer.Rule:
+    key = (use_group_code, precomputed)
+    if key in _reference_rules:
+        return _reference_rules[key]
 
-    # Root rule
     root_rule = QgsRuleBasedRenderer.Rule(None)
-
-    # 1) Primary five rules (stable legend order)
-    code_by_group = {v: k for k, v in PRIMARY_TYPES.items()}
-    for group in GROUP_ORDER:
-        if group == "Others":
-            continue
-        code = code_by_group[group]
-        symbol = build_symbol(GROUP_COLORS[group])
-        rule = QgsRuleBasedRenderer.Rule(symbol)
-        rule.setFilterExpression(f"\"Energietraeger\" = '{code}'")
+    # One rule per group (stable legend order)
+    for group_code, group in enumerate(GROUP_ORDER):
+        if use_group_code:
+            # Precomputed integer group column (indexed in the GeoPackage)
+            expr = f"\"group_code\" = {group_code}"
+        elif group != "Others":
+            expr = f"\"Energietraeger\" = '{code_by_group[group]}'"
+        else:
+            # Catch-all "Others" rule (QGIS 3.10: filter expression instead of setElse)
+            # ('' is never a primary code, so NOT IN already covers blanks; no trim())
+            expr = f"\"Energietraeger\" IS NULL OR \"Energietraeger\" NOT IN ({primary_code_list})"
+        rule = QgsRuleBasedRenderer.Rule(build_symbol(GROUP_COLORS[group], precomputed))
+        rule.setFilterExpression(expr)
         rule.setLabel(group)
         root_rule.appendChild(rule)
 
-    # 2) Catch-all "Others" rule (QGIS 3.10: filter expression instead of setElse)
-    primary_code_list = ",".join([f"'{c}'" for c in PRIMARY_TYPES.keys()])
-    others_expr = (
-        f"\"Energietraeger\" IS NULL OR trim(\"Energietraeger\") = '' "
-        f"OR NOT (\"Energietraeger\" IN ({primary_code_list}))"
+    _reference_rules[key] = root_rule
+    return root_rule
+
+# One directory scan (DirEntry caches the file type), sorted once for a stable order
+with os.scandir(geojson_folder) as it:
+    geojson_files = sorted(
+        (e.name, e.path) for e in it if e.is_file() and e.name.endswith(".geojson")
     )
-    others_symbol = build_symbol(GROUP_COLORS["Others"])
-    others_rule = QgsRuleBasedRenderer.Rule(others_symbol)
-    others_rule.setFilterExpression(others_expr)
-    others_rule.setLabel("Others")
-    root_rule.appendChild(others_rule)
-
-    # Apply renderer
-    renderer = QgsRuleBasedRenderer(root_rule)
-    layer.setRenderer(renderer)
-
-    # Optional: enable labeling (state/district fields may not exist here; keep off by default)
-    # lbl = QgsPalLayerSettings(); ...  # left intentionally minimal
-
-    # Add to group
-    QgsProject.instance().addMapLayer(layer, False)
-    tree_layer = QgsLayerTreeLayer(layer)
-    layer_group.insertChildNode(0, tree_layer)
-    print(f"✅ Loaded and styled (5+Others): {layer_name}")
+
+# Freeze the canvas while layers are built (they are added to the project in one batch);
+# unfrozen in `finally`, so a failed load never leaves it frozen
+canvas = iface.mapCanvas()
+canvas.freeze(True)
+pending = []
+try:
+    # Loop through all GeoJSON files
+    for file_name, file_path in geojson_files:
+        layer_name = os.path.splitext(file_name)[0].replace("_", " ").title().replace(" ", "_")
+        gpkg_path = grouped_source(file_path)
+        layer = QgsVectorLayer(gpkg_path or file_path, layer_name, "ogr")
+
+        if not layer.isValid():
+            print(f"❌ Failed to load: {file_name}")
+            continue
+
+        # Precomputed size/stroke columns present (GeoPackage copy)?
+        precomputed = layer.fields().indexOf("size_px") >= 0
+        root_rule = reference_rules(gpkg_path is not None, precomputed).clone()
+
+        # Apply renderer
+        renderer = QgsRuleBasedRenderer(root_rule)
+        layer.setRenderer(with_clustering(layer, renderer))
+
+        # Optional: enable labeling (state/district fields may not exist here; keep off by default)
+        # lbl = QgsPalLayerSettings(); ...  # left intentionally minimal
+
+        pending.append(layer)
+        print(f"✅ Loaded and styled (5+Others): {layer_name}")
+
+    # Add all layers with one project call and one tree insert (last file on top, as before)
+    QgsProject.instance().addMapLayers(pending, False)
+    layer_group.insertChildNodes(0, [QgsLayerTreeLayer(lyr) for lyr in reversed(pending)])
+finally:
+    canvas.freeze(False)
+    canvas.refresh()
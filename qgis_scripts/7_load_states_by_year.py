@@ -3,6 +3,7 @@ from qgis.core import (
     QgsVectorLayer, QgsProject, QgsLayerTreeLayer, QgsRuleBasedRenderer,
     QgsMarkerSymbol, QgsSymbolLayer, QgsProperty
 )
+from osgeo import gdal
 import os
 
 # --- Input folder and group in Layers panel ---
@@ -37,6 +38,42 @@ GROUP_COLORS = {
     "Others": "gray",
 }
 
+# --- Helper: FlatGeobuf copy with spatial index ---------------------------------
+def is_fresh(derived_path: str, source_path: str) -> bool:
+    """True if `derived_path` exists and is not older than `source_path`."""
+    return (
+        os.path.exists(derived_path)
+        and os.path.getmtime(derived_path) >= os.path.getmtime(source_path)
+    )
+
+def indexed_source(geojson_path: str) -> str:
+    """
+    Return a FlatGeobuf copy of a yearly GeoJSON (written next to it, with a spatial
+    index, and rebuilt only when the GeoJSON is newer), so reloading the project does
+    not re-tokenize every JSON file. Falls back to the GeoJSON path if conversion fails.
+    """
+    fgb_path = os.path.splitext(geojson_path)[0] + ".fgb"
+    if is_fresh(fgb_path, geojson_path):
+        return fgb_path
+    tmp_path = fgb_path[:-len(".fgb")] + ".tmp.fgb"  # renamed into place only when complete
+    try:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        ds = gdal.VectorTranslate(
+            tmp_path, geojson_path, format="FlatGeobuf",
+            layerCreationOptions=["SPATIAL_INDEX=YES"],
+        )
+        if ds is None:  # no exceptions without gdal.UseExceptions()
+            raise RuntimeError(gdal.GetLastErrorMsg() or "gdal.VectorTranslate returned None")
+        ds = None  # flush before the rename
+        os.replace(tmp_path, fgb_path)
+        return fgb_path
+    except Exception as e:
+        print(f"⚠️ FlatGeobuf conversion failed for {geojson_path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return geojson_path
+
 def build_symbol(fill_color: str) -> QgsMarkerSymbol:
     """Marker with data-defined size (log power) and green outline if remotely controllable."""
     sym = QgsMarkerSymbol.createSimple({
@@ -63,57 +100,64 @@ def build_symbol(fill_color: str) -> QgsMarkerSymbol:
     )
     return sym
 
-# --- Iterate states and years --------------------------------------------------
-for state_name in sorted(os.listdir(base_folder)):
-    state_path = os.path.join(base_folder, state_name)
-    if not os.path.isdir(state_path):
+# The rule tree is identical for every layer: build it once and give each layer
+# renderer a clone (no per-layer symbol construction or expression re-parsing)
+code_by_group = {v: k for k, v in PRIMARY_TYPES.items()}
+primary_code_list = ",".join([f"'{c}'" for c in PRIMARY_TYPES.keys()])
+template_root = QgsRuleBasedRenderer.Rule(None)
+
+# 1) Rules for the 5 primary groups (stable legend order)
+for group in GROUP_ORDER:
+    if group == "Others":
         continue
+    rule = QgsRuleBasedRenderer.Rule(build_symbol(GROUP_COLORS[group]))
+    rule.setFilterExpression(f"\"Energietraeger\" = '{code_by_group[group]}'")
+    rule.setLabel(group)
+    template_root.appendChild(rule)
+
+# 2) Catch-all "Others" rule (3.10-friendly filter expression)
+others_expr = (
+    f"\"Energietraeger\" IS NULL OR trim(\"Energietraeger\") = '' "
+    f"OR NOT (\"Energietraeger\" IN ({primary_code_list}))"
+)
+others_rule = QgsRuleBasedRenderer.Rule(build_symbol(GROUP_COLORS["Others"]))
+others_rule.setFilterExpression(others_expr)
+others_rule.setLabel("Others")
+template_root.appendChild(others_rule)
+
+# Every layer gets the rule renderer below, so skip the default-style lookup on open
+layer_options = QgsVectorLayer.LayerOptions()
+layer_options.loadDefaultStyle = False
+layer_options.readExtentFromXml = False
+
+def scan_geojson(folder: str):
+    """Yield the .geojson files of `folder` as DirEntry objects, sorted by name (one scan)."""
+    with os.scandir(folder) as it:
+        yield from sorted(
+            (e for e in it if e.is_file() and e.name.endswith(".geojson")),
+            key=lambda e: e.name,
+        )
 
-    state_group = main_group.addGroup(state_name)
+# --- Iterate states and years --------------------------------------------------
+# DirEntry carries the file type from the directory read: no extra stat() per entry
+with os.scandir(base_folder) as it:
+    state_dirs = sorted((e.name, e.path) for e in it if e.is_dir())
 
-    for file_name in sorted(os.listdir(state_path)):
-        if not file_name.endswith(".geojson"):
-            continue
+for state_name, state_path in state_dirs:
+    state_group = main_group.addGroup(state_name)
 
-        file_path = os.path.join(state_path, file_name)
-        year = os.path.splitext(file_name)[0]
+    for entry in scan_geojson(state_path):
+        file_path = entry.path
+        year = entry.name[:-len(".geojson")]
         layer_name = f"{state_name}_{year}"
-        layer = QgsVectorLayer(file_path, layer_name, "ogr")
+        layer = QgsVectorLayer(indexed_source(file_path), layer_name, "ogr", layer_options)
 
         if not layer.isValid():
             print(f"❌ Failed to load {file_path}")
             continue
 
-        # Build rule-based renderer
-        root_rule = QgsRuleBasedRenderer.Rule(None)
-
-        # 1) Rules for the 5 primary groups (stable legend order)
-        code_by_group = {v: k for k, v in PRIMARY_TYPES.items()}
-        for group in GROUP_ORDER:
-            if group == "Others":
-                continue
-            code = code_by_group[group]
-            symbol = build_symbol(GROUP_COLORS[group])
-            rule = QgsRuleBasedRenderer.Rule(symbol)
-            rule.setFilterExpression(f"\"Energietraeger\" = '{code}'")
-            rule.setLabel(group)
-            root_rule.appendChild(rule)
-
-        # 2) Catch-all "Others" rule (3.10-friendly filter expression)
-        primary_code_list = ",".join([f"'{c}'" for c in PRIMARY_TYPES.keys()])
-        others_expr = (
-            f"\"Energietraeger\" IS NULL OR trim(\"Energietraeger\") = '' "
-            f"OR NOT (\"Energietraeger\" IN ({primary_code_list}))"
-        )
-        others_symbol = build_symbol(GROUP_COLORS["Others"])
-        others_rule = QgsRuleBasedRenderer.Rule(others_symbol)
-        others_rule.setFilterExpression(others_expr)
-        others_rule.setLabel("Others")
-        root_rule.appendChild(others_rule)
-
-        # Apply renderer
-        renderer = QgsRuleBasedRenderer(root_rule)
-        layer.setRenderer(renderer)
+        # Rule renderer: a clone of the shared tree (saved with the project)
+        layer.setRenderer(QgsRuleBasedRenderer(template_root.clone()))
 
         # Add to project under the state's group; start hidden to avoid clutter
         QgsProject.instance().addMapLayer(layer, False)
@@ -1,6 +1,11 @@
-import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from qgis.PyQt.QtGui import QColor
 
+# Static legend: rendered off-screen (Agg) to a PNG instead of opening a Qt window
+LEGEND_PNG = r"C:\Users\jo73vure\Desktop\powerPlantProject\data\legend.png"
+
 # --- Define color palette ---
 PALETTE = {
     "pv_kw":      QColor(255,255,0,255),
@@ -32,15 +37,20 @@ energy_types = [
 ]
 
 # --- Create plot ---
-fig, ax = plt.subplots(figsize=(5, 5))
+# Figure + Agg canvas directly: no pyplot state, no GUI backend, no event loop
+fig = Figure(figsize=(5, 5))
+FigureCanvasAgg(fig)
+ax = fig.add_subplot(111)
 ax.axis('off')
 
-y = 1.0
-for qcolor, label in energy_types:
-    rgba = qcolor_to_rgba(qcolor)
-    ax.scatter(0.06, y, color=rgba, s=90, edgecolor='black')
+# One scatter call (a single PathCollection) for all markers, then the labels
+n = len(energy_types)
+ys = 1.0 - 0.05 * np.arange(n)
+colors = [qcolor_to_rgba(qcolor) for qcolor, _ in energy_types]
+ax.scatter(np.full(n, 0.06), ys, c=colors, s=90, edgecolor='black')
+for y, (_, label) in zip(ys, energy_types):
     ax.text(0.1, y, label, fontsize=10, va='center', ha='left')
-    y -= 0.05
+y = 1.0 - 0.05 * n
 
 # Add notes
 y -= 0.05
@@ -53,4 +63,5 @@ ax.set_xlim(0, 1)
 ax.set_ylim(0, 1.1)
 fig.subplots_adjust(left=0.1, right=0.95, top=0.95, bottom=0.05)
 
-plt.show()
+fig.savefig(LEGEND_PNG, dpi=150, bbox_inches='tight')
+print(f"Legend written to {LEGEND_PNG}")
@@ -3,14 +3,38 @@
 
 import os
 import json
-import matplotlib.pyplot as plt
-from collections import defaultdict
+import mmap
+import hashlib
+import numpy as np
+import matplotlib
+from matplotlib.colors import to_rgba
+from matplotlib.figure import Figure
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from qgis.PyQt.QtWidgets import QDialog, QTabWidget, QWidget, QVBoxLayout
 from qgis.utils import iface
 
+try:
+    from pyogrio import read_dataframe  # GDAL reader (optional), attributes only
+except ImportError:
+    read_dataframe = None
+try:
+    import ijson  # streaming parser (optional); falls back to json.load
+except ImportError:
+    ijson = None
+try:
+    import orjson  # faster whole-file decode for the json fallback (optional)
+except ImportError:
+    orjson = None
+
 BASE_DIR = r"C:\Users\jo73vure\Desktop\powerPlantProject\data\geojson\by_state_yearly_three_checks"
+# Aggregated counts from the last run, reused while no input file changed
+CACHE_PATH = os.path.join(BASE_DIR, "_energytype_counts_cache.json")
+
+# Never fall back to matplotlib's costly "best" legend placement on toolbar redraws
+matplotlib.rcParams["legend.loc"] = "upper left"
 
 # --- Supervisor-approved grouping (codes -> 5 main groups, everything else -> Others) ---
 PRIMARY_TYPES = {
@@ -34,89 +58,186 @@ GROUP_COLORS = {
     "Biogas": "darkgreen",
     "Others": "gray",
 }
+# RGBA rows in GROUP_ORDER, resolved once and shared by every state tab
+GROUP_COLORS_RGBA = np.array([to_rgba(GROUP_COLORS[g]) for g in GROUP_ORDER])
 
-def map_code_to_group(code: str) -> str:
-    """Return one of the 5 main groups, otherwise 'Others'."""
-    if code in PRIMARY_TYPES:
-        return PRIMARY_TYPES[code]
-    return "Others"
+# Code -> group in one dict lookup: CODE_TO_GROUP.get(code, "Others")
+CODE_TO_GROUP = dict(PRIMARY_TYPES)
+CODE_TO_GROUP.update({c: "Others" for c in OTHERS_CODES})
 
 # --- Parse helper ---
-def parse_energy_group(feature) -> str:
+def parse_energy_code(feature) -> str:
     props = feature.get("properties", {})
-    code = str(props.get("Energietraeger", "")).strip()
-    return map_code_to_group(code)
+    return str(props.get("Energietraeger", "")).strip()
+
+# --- Feature reader: one feature at a time ---
+def iter_features(file_path: str):
+    """Yield the features of a GeoJSON file, streamed with ijson when available."""
+    if ijson is not None:
+        with open(file_path, "rb") as f:
+            yield from ijson.items(f, "features.item")
+        return
+    if orjson is not None:
+        # Parse straight from the memory-mapped file: no extra bytes copy of it
+        with open(file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            with memoryview(mm) as buf:
+                features = orjson.loads(buf).get("features", [])
+        yield from features
+        return
+    with open(file_path, "r", encoding="utf-8") as f:
+        yield from json.load(f).get("features", [])
+
+def read_energy_codes(file_path: str) -> np.ndarray:
+    """
+    Return the stripped Energietraeger codes of a GeoJSON file. With pyogrio, GDAL
+    reads just that column and skips geometry parsing; otherwise features are parsed.
+    """
+    if read_dataframe is not None:
+        try:
+            df = read_dataframe(file_path, columns=["Energietraeger"], read_geometry=False)
+            if "Energietraeger" in df.columns:
+                col = df["Energietraeger"]
+                if col.dtype.kind == "f":  # numeric codes with nulls: avoid "2495.0"
+                    col = col.astype("Int64")
+                return col.astype(str).str.strip().to_numpy(dtype=str)
+        except Exception as e:
+            print(f"pyogrio could not read {file_path} ({e}); parsing JSON instead.")
+    return np.array([parse_energy_code(f) for f in iter_features(file_path)], dtype=str)
+
+# --- Per-file counter: (state, year, path) → (state, year, group → count) ---
+def count_one(task):
+    state_name, year, file_path = task
+    try:
+        codes = read_energy_codes(file_path)
+    except Exception as e:
+        print(f"Error reading {file_path}: {e}")
+        return state_name, year, None
+
+    # Tally codes in one C pass; map only the few distinct codes to groups
+    group_counts = Counter()
+    values, counts = np.unique(codes, return_counts=True)
+    for code, n in zip(values, counts):
+        group_counts[CODE_TO_GROUP.get(str(code), "Others")] += int(n)
+    return state_name, year, group_counts
+
+# --- Cache: flat (state, year, group, count) rows keyed by an input manifest ---
+def load_cached_counts(manifest: str):
+    """Return the cached rows if they were built from the same inputs, else None."""
+    try:
+        with open(CACHE_PATH, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get("manifest") != manifest:
+        return None
+    return cache.get("rows", [])
+
+def save_cached_counts(manifest: str, result) -> None:
+    rows = [[state_name, year, grp, n] for (state_name, year, grp), n in result.items()]
+    try:
+        with open(CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump({"manifest": manifest, "rows": rows}, f)
+    except OSError as e:
+        print(f"Could not write count cache {CACHE_PATH}: {e}")
 
-# --- Data collector: state → year → group → count ---
+# --- Data collector: (state, year, group) → count ---
 def process_geojson_files():
-    result = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    result = Counter()
 
-    for state_name in os.listdir(BASE_DIR):
-        state_path = os.path.join(BASE_DIR, state_name)
-        if not os.path.isdir(state_path):
-            continue
+    tasks = []
+    # DirEntry carries the file type from the directory read: no extra stat() per entry
+    with os.scandir(BASE_DIR) as states:
+        state_dirs = [(e.name, e.path) for e in states if e.is_dir()]
 
-        for file in os.listdir(state_path):
-            if not file.endswith(".geojson") or file == "unknown.geojson":
-                continue
+    for state_name, state_path in state_dirs:
+        with os.scandir(state_path) as files:
+            for entry in files:
+                file = entry.name
+                if not file.endswith(".geojson") or file == "unknown.geojson":
+                    continue
 
-            try:
-                year = int(file.replace(".geojson", ""))
-            except ValueError:
-                continue
+                try:
+                    year = int(file.replace(".geojson", ""))
+                except ValueError:
+                    continue
 
-            file_path = os.path.join(state_path, file)
-            try:
-                with open(file_path, "r", encoding="utf-8") as f:
-                    geo = json.load(f)
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-                continue
+                tasks.append((state_name, year, entry.path))
+
+    # Reuse the cached table unless the set of files or any mtime changed
+    manifest = hashlib.sha1(
+        repr(sorted((p, os.path.getmtime(p)) for _, _, p in tasks)).encode("utf-8")
+    ).hexdigest()
+    cached = load_cached_counts(manifest)
+    if cached is not None:
+        for state_name, year, grp, n in cached:
+            result[(state_name, year, grp)] = n
+        print(f"Using cached counts ({len(tasks)} files unchanged).")
+        return result
 
-            for feature in geo.get("features", []):
-                grp = parse_energy_group(feature)
-                result[state_name][year][grp] += 1
+    # Files are independent; threads (not processes: inside QGIS a worker process
+    # would relaunch the QGIS executable) overlap I/O and GDAL reads, which run
+    # without the GIL.
+    failed = 0
+    with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as ex:
+        for state_name, year, group_counts in ex.map(count_one, tasks):
+            if group_counts is None:
+                failed += 1
+                continue
+            for grp, n in group_counts.items():
+                result[(state_name, year, grp)] += n
 
+    # Never cache an incomplete table: a transient read error would stick as zero counts
+    if failed:
+        print(f"{failed} file(s) could not be read; count cache not updated.")
+    else:
+        save_cached_counts(manifest, result)
     return result
 
 # --- Plot with toolbar and tabs ---
 def plot_counts_tabbed(aggregated_data):
     tab_widget = QTabWidget()
 
-    for state, year_data in sorted(aggregated_data.items()):
+    # Regroup the flat (state, year, group) counts once: state → year → group → count
+    by_state = defaultdict(lambda: defaultdict(dict))
+    for (state, year, grp), n in aggregated_data.items():
+        by_state[state][year][grp] = n
+
+    for state, year_data in sorted(by_state.items()):
         all_years = sorted(year_data.keys())
 
-        # Build stacked series only for groups that appear at least once
-        stacked_data = {
-            g: [year_data[y].get(g, 0) for y in all_years]
-            for g in GROUP_ORDER
-            if any(year_data[y].get(g, 0) > 0 for y in all_years)
-        }
+        # (n_groups, n_years) count matrix; each bar row starts on the cumulative sum below it
+        heights = np.array([[year_data[y].get(g, 0) for y in all_years] for g in GROUP_ORDER])
+        if not heights.any():
+            continue  # no plants at all: skip the figure and the tab
+        bottoms = np.vstack([np.zeros(len(all_years)), heights.cumsum(axis=0)[:-1]])
 
-        fig, ax = plt.subplots(figsize=(10, 6))
-        bottom = [0] * len(all_years)
+        # Plain Figure (not pyplot): not kept in pyplot's global figure registry,
+        # so closed tabs free their figures in a long QGIS session
+        fig = Figure(figsize=(10, 6))
+        canvas = FigureCanvas(fig)
+        ax = fig.add_subplot(111)
 
         # (Optional) background styling
         fig.patch.set_facecolor("#f7f7f5")
         ax.set_facecolor("#e6e6e6")
 
-        for g in stacked_data:
+        # Only groups that appear at least once
+        for i in np.flatnonzero(heights.sum(axis=1) > 0):
+            g = GROUP_ORDER[i]
             ax.bar(
                 all_years,
-                stacked_data[g],
-                bottom=bottom,
+                heights[i],
+                bottom=bottoms[i],
                 label=g,
-                color=GROUP_COLORS.get(g, "gray")
+                color=GROUP_COLORS_RGBA[i]
             )
-            bottom = [bottom[i] + stacked_data[g][i] for i in range(len(all_years))]
 
         ax.set_title(f"{state.upper()} - Number of Power Plants per Year (Grouped)")
         ax.set_xlabel("Year")
         ax.set_ylabel("Number of Plants")
-        ax.legend(fontsize=8, loc="upper left", framealpha=1, facecolor="#f0f0f0")
+        ax.legend(fontsize=8, loc="upper left", frameon=True, framealpha=1, facecolor="#f0f0f0")
         ax.grid(True)
 
-        canvas = FigureCanvas(fig)
         toolbar = NavigationToolbar(canvas, None)
 
         tab = QWidget()
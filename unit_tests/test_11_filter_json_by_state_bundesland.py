@@ -131,9 +131,7 @@ def test_no_output_files_when_no_matches(tmp_path, capsys):
     mod.filter_by_state_codes(str(input_dir), str(out_base), "Bundesland", codes)
 
     for code in codes:
-        code_dir = out_base / code
-        assert code_dir.exists()
-        assert list(code_dir.glob("*.json")) == []
+        assert not (out_base / code).exists()
 
     out = capsys.readouterr().out
     assert "Processing: plants.json" in out
@@ -161,7 +159,7 @@ def test_supports_custom_state_key(tmp_path):
     assert read_json(out_file) == [{"state_code": "1415", "id": 2}]
 
 
-def test_precreates_all_target_subfolders_even_before_processing(tmp_path):
+def test_creates_target_subfolders_only_for_matched_codes(tmp_path):
     input_dir = tmp_path / "in"
     out_base = tmp_path / "out"
     input_dir.mkdir()
@@ -172,12 +170,9 @@ def test_precreates_all_target_subfolders_even_before_processing(tmp_path):
 
     mod.filter_by_state_codes(str(input_dir), str(out_base), "Bundesland", codes)
 
-    for code in codes:
-        assert (out_base / code).exists()
-
     assert (out_base / "1409" / "plants.json").exists()
-    assert list((out_base / "1408").glob("*.json")) == []
-    assert list((out_base / "1410").glob("*.json")) == []
+    assert not (out_base / "1408").exists()
+    assert not (out_base / "1410").exists()
 
 
 def test_multiple_files_multiple_codes(tmp_path, capsys):
@@ -238,7 +233,7 @@ def test_creates_output_base_folder_when_missing(tmp_path):
     assert (out_base / "1415" / "plants.json").exists()
 
 
-def test_empty_input_folder_still_precreates_target_dirs(tmp_path):
+def test_empty_input_folder_creates_only_base_folder(tmp_path):
     input_dir = tmp_path / "in"
     out_base = tmp_path / "out"
     input_dir.mkdir()
@@ -248,7 +243,26 @@ def test_empty_input_folder_still_precreates_target_dirs(tmp_path):
     mod.filter_by_state_codes(str(input_dir), str(out_base), "Bundesland", codes)
 
     assert out_base.exists()
-    assert (out_base / "1401").exists()
-    assert (out_base / "1402").exists()
-    assert list((out_base / "1401").glob("*.json")) == []
-    assert list((out_base / "1402").glob("*.json")) == []
\ No newline at end of file
+    assert list(out_base.iterdir()) == []
+
+
+def test_duplicate_codes_and_unhashable_values_are_handled(tmp_path, capsys):
+    input_dir = tmp_path / "in"
+    out_base = tmp_path / "out"
+    input_dir.mkdir()
+
+    write_json(
+        input_dir / "plants.json",
+        [
+            {"Bundesland": "1409", "id": 1},
+            {"Bundesland": ["1409"], "id": 2},
+            {"Bundesland": {"code": "1409"}, "id": 3},
+        ],
+    )
+
+    mod.filter_by_state_codes(str(input_dir), str(out_base), "Bundesland", ["1409", "1409"])
+
+    assert read_json(out_base / "1409" / "plants.json") == [{"Bundesland": "1409", "id": 1}]
+    out = capsys.readouterr().out
+    assert out.count("✔ Saved") == 1
+    assert "Failed to load" not in out
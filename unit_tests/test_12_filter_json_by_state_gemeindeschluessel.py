@@ -11,6 +11,10 @@ Covers:
 - handling corrupted JSON gracefully while continuing
 - behavior when no valid prefixes exist
 - handling multiple files and multiple prefixes
+- streamed output staying a valid JSON array with non-ASCII text kept
+- identical output with the stdlib json fallback (no orjson)
+- empty input files reported as load failures
+- no truncated output files when a file fails mid-stream
 """
 
 import json
@@ -260,4 +264,73 @@ def test_preserves_entries_with_same_prefix_in_single_output_file(tmp_path):
         {"Gemeindeschluessel": "14150001", "id": 1},
         {"Gemeindeschluessel": "14150002", "id": 2},
         {"Gemeindeschluessel": "14150003", "id": 3},
-    ]
\ No newline at end of file
+    ]
+
+def test_streamed_output_is_valid_json_array_with_unicode(tmp_path):
+    input_dir = tmp_path / "in"
+    output_base = tmp_path / "out"
+    input_dir.mkdir()
+
+    entries = [
+        {"Gemeindeschluessel": "16055000", "name": "Thüringen Süd", "id": 1},
+        {"Gemeindeschluessel": "09162000", "name": "München", "id": 2},
+        {"Gemeindeschluessel": "16055001", "name": "Weißensee", "id": 3},
+    ]
+    write_json(input_dir / "plants.json", entries)
+
+    mod.filter_by_state_prefix(str(input_dir), str(output_base))
+
+    out_16 = output_base / "16" / "plants.json"
+    text = out_16.read_text(encoding="utf-8")
+    assert "Thüringen Süd" in text
+    assert read_json(out_16) == [entries[0], entries[2]]
+    assert read_json(output_base / "09" / "plants.json") == [entries[1]]
+
+
+def test_stdlib_json_fallback_without_orjson(tmp_path, monkeypatch):
+    monkeypatch.setattr(mod, "orjson", None)
+
+    input_dir = tmp_path / "in"
+    output_base = tmp_path / "out"
+    input_dir.mkdir()
+
+    entries = [
+        {"Gemeindeschluessel": "05170001", "name": "Düren", "id": 1},
+        {"Gemeindeschluessel": "05170002", "name": "Köln", "id": 2},
+    ]
+    write_json(input_dir / "plants.json", entries)
+
+    mod.filter_by_state_prefix(str(input_dir), str(output_base))
+
+    out_05 = output_base / "05" / "plants.json"
+    assert "Köln" in out_05.read_text(encoding="utf-8")
+    assert read_json(out_05) == entries
+
+
+def test_empty_json_file_is_reported_and_skipped(tmp_path, capsys):
+    input_dir = tmp_path / "in"
+    output_base = tmp_path / "out"
+    input_dir.mkdir()
+
+    (input_dir / "empty.json").write_bytes(b"")
+    write_json(input_dir / "ok.json", [{"Gemeindeschluessel": "14150001", "id": 1}])
+
+    mod.filter_by_state_prefix(str(input_dir), str(output_base))
+
+    assert (output_base / "14" / "ok.json").exists()
+    assert not (output_base / "14" / "empty.json").exists()
+    assert "Failed to load empty.json" in capsys.readouterr().out
+
+
+def test_failure_mid_file_leaves_no_truncated_output(tmp_path):
+    input_dir = tmp_path / "in"
+    output_base = tmp_path / "out"
+    input_dir.mkdir()
+
+    # The first entry is streamed out, then the non-dict entry raises
+    write_json(input_dir / "plants.json", [{"Gemeindeschluessel": "16051000", "id": 1}, "not an entry"])
+
+    with pytest.raises(AttributeError):
+        mod.filter_by_state_prefix(str(input_dir), str(output_base))
+
+    assert [p for p in output_base.rglob("*") if p.is_file()] == []
@@ -70,8 +70,11 @@ def test_creates_year_folders_and_writes_filtered_files(tmp_path, capsys):
 
     mod.filter_by_installation_years(str(input_dir), str(out_base))
 
-    for year in ("1900", "1999", "2010", "2025"):
+    for year in ("1999", "2010", "2025"):
         assert (out_base / year).exists()
+    # Year folders are created lazily: none for valid years without entries
+    assert not (out_base / "1900").exists()
+    assert sorted(p.name for p in out_base.iterdir()) == ["1999", "2010", "2025"]
 
     y1999 = out_base / "1999" / "plants_A.json"
     y2010_a = out_base / "2010" / "plants_A.json"
@@ -171,4 +174,66 @@ def test_custom_year_key_supported(tmp_path):
     ids_2001 = [e["id"] for e in rjson(y2001)]
     assert sorted(ids_2001) == [1, 2]
 
-    assert rjson(y1998) == [{"commissioning_date": "1998-12-31", "id": 3}]
\ No newline at end of file
+    assert rjson(y1998) == [{"commissioning_date": "1998-12-31", "id": 3}]
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_load_save_json_roundtrip_keeps_umlauts(tmp_path, monkeypatch, use_orjson):
+    if not use_orjson:
+        monkeypatch.setattr(mod, "orjson", None)
+    elif mod.orjson is None:
+        pytest.skip("orjson not installed")
+
+    entries = [{"Inbetriebnahmedatum": "2010-01-01", "Ort": "Köln", "id": 1}]
+    path = tmp_path / "plants.json"
+    mod.save_json(entries, str(path))
+
+    assert "Köln" in path.read_text(encoding="utf-8")
+    assert mod.load_json(str(path)) == entries
+    assert rjson(path) == entries
+
+
+def test_parallel_split_matches_serial(tmp_path, capsys):
+    input_dir = tmp_path / "in"
+    input_dir.mkdir()
+    wjson(input_dir / "a.json", [{"id": 1, "Inbetriebnahmedatum": "2001-01-01"}])
+    wjson(input_dir / "b.json", [{"id": 2, "Inbetriebnahmedatum": "2001-02-02"},
+                                 {"id": 3, "Inbetriebnahmedatum": "2002-03-03"}])
+    (input_dir / "broken.json").write_bytes(b"{ not valid json")
+
+    outputs = {}
+    for workers in (1, 2):
+        out_base = tmp_path / f"out_{workers}"
+        mod.filter_by_installation_years(str(input_dir), str(out_base), max_workers=workers)
+        outputs[workers] = {p.relative_to(out_base).as_posix(): rjson(p) for p in out_base.rglob("*.json")}
+        assert "Failed to load broken.json" in capsys.readouterr().out
+
+    assert outputs[1] == outputs[2]
+    assert set(outputs[1]) == {"2001/a.json", "2001/b.json", "2002/b.json"}
+
+
+@pytest.mark.parametrize("mmap_min_bytes", [0, 1 << 30])
+def test_load_json_mmap_and_small_file_paths_agree(tmp_path, monkeypatch, mmap_min_bytes):
+    if mod.orjson is None:
+        pytest.skip("orjson not installed")
+    monkeypatch.setattr(mod, "MMAP_MIN_BYTES", mmap_min_bytes)
+
+    entries = [{"id": i, "Inbetriebnahmedatum": "2010-01-01", "Ort": "Görlitz"} for i in range(50)]
+    path = tmp_path / "plants.json"
+    wjson(path, entries)
+
+    assert mod.load_json(str(path)) == entries
+
+
+def test_split_file_by_year_reports_years_in_order(tmp_path):
+    path = tmp_path / "plants.json"
+    wjson(path, [
+        {"id": 1, "Inbetriebnahmedatum": "2020-01-01"},
+        {"id": 2, "Inbetriebnahmedatum": "1999-01-01"},
+        {"id": 3, "Inbetriebnahmedatum": "2020-06-01"},
+        {"id": 4, "Inbetriebnahmedatum": "1850-01-01"},
+    ])
+
+    saved = mod.split_file_by_year(str(path), str(tmp_path / "out"), "Inbetriebnahmedatum", frozenset({"1999", "2020"}))
+
+    assert list(saved.items()) == [("1999", 1), ("2020", 2)]
+    assert [e["id"] for e in rjson(tmp_path / "out" / "2020" / "plants.json")] == [1, 3]
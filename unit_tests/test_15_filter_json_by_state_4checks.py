@@ -6,7 +6,7 @@ Covers:
 - state polygon loading and lookup
 - Landkreis prepared geometry loading and matching
 - Bundesland and Gemeindeschluessel mapping helpers
-- parse_point() valid and invalid cases
+- parse_xy() valid and invalid cases
 - end-to-end filtering with all 4 checks
 - summary generation and bad JSON handling
 - runtime errors when required polygon data is missing
@@ -16,7 +16,9 @@ import json
 import sys
 from pathlib import Path
 
+import numpy as np
 import pytest
+import shapely
 from shapely.geometry import MultiPolygon, Point
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -141,16 +143,13 @@ def test_normalize_state_name(value, expected):
         ({}, None),
     ],
 )
-def test_parse_point(entry, expected):
-    pt = mod.parse_point(entry)
+def test_parse_xy(entry, expected):
+    xy = mod.parse_xy(entry)
 
     if expected is None:
-        assert pt is None
+        assert xy is None
     else:
-        lon, lat = expected
-        assert pt is not None
-        assert pt.x == pytest.approx(lon)
-        assert pt.y == pytest.approx(lat)
+        assert xy == pytest.approx(expected)
 
 
 def test_load_state_polygons_returns_mapping(sample_state_geojson):
@@ -161,14 +160,18 @@ def test_load_state_polygons_returns_mapping(sample_state_geojson):
     assert pretty_by_norm["bayern"] == "Bayern"
     assert pretty_by_norm["thueringen"] == "Thüringen"
     assert isinstance(polygons_by_norm["bayern"], MultiPolygon)
+    assert shapely.is_prepared(polygons_by_norm["bayern"])
 
 
-def test_polygon_state_of_point_returns_expected_state(sample_state_geojson):
+def test_states_of_points_returns_expected_state(sample_state_geojson):
     polygons_by_norm, _ = mod.load_state_polygons(str(sample_state_geojson))
+    coords = [(10.5, 50.0), (11.5, 50.5), (11.0, 50.5), (10.0, 49.0), (20.0, 60.0)]
+    xs = np.array([x for x, _ in coords] + [np.nan])
+    ys = np.array([y for _, y in coords] + [np.nan])
 
-    assert mod.polygon_state_of_point(Point(10.5, 50.0), polygons_by_norm) == "bayern"
-    assert mod.polygon_state_of_point(Point(11.5, 50.5), polygons_by_norm) == "thueringen"
-    assert mod.polygon_state_of_point(Point(20.0, 60.0), polygons_by_norm) is None
+    state_of = mod.states_of_points(xs, ys, polygons_by_norm)
+
+    assert list(state_of) == ["bayern", "thueringen", "bayern", "bayern", None, None]
 
 
 def test_bl_code_to_norm_name():
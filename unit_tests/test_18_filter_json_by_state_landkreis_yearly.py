@@ -7,7 +7,7 @@ import sys
 from pathlib import Path
 
 import pytest
-from shapely.geometry import MultiPolygon
+from shapely.geometry import MultiPolygon, Polygon
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT))
@@ -111,6 +111,9 @@ def test_normalize_state_name_token(value, expected):
         ({"Laengengrad": "10", "Breitengrad": "91"}, None),
         ({"Laengengrad": "abc", "Breitengrad": "50"}, None),
         ({}, None),
+        ({"Laengengrad": 10.5, "Breitengrad": 50}, (10.5, 50.0)),
+        ({"Laengengrad": None, "Breitengrad": "50"}, None),
+        ({"Laengengrad": [10.5], "Breitengrad": "50"}, None),
     ],
 )
 def test_parse_point(entry, expected):
@@ -148,12 +151,12 @@ def test_load_gadm_l2_returns_expected_structures(sample_gadm_l2_geojson):
     name_1, name_2, geom = result[0]
     assert name_1 == "Bayern"
     assert name_2 == "Landkreis A"
-    assert isinstance(geom, MultiPolygon)
+    assert isinstance(geom, (Polygon, MultiPolygon))
 
     name_1_b, name_2_b, geom_b = result[1]
     assert name_1_b == "Thüringen"
     assert name_2_b == "Landkreis B/City"
-    assert isinstance(geom_b, MultiPolygon)
+    assert isinstance(geom_b, (Polygon, MultiPolygon))
 
 
 def test_filter_json_by_state_landkreis_yearly_end_to_end(temp_workspace, sample_gadm_l2_geojson, capsys):
@@ -382,4 +385,103 @@ def test_filter_json_by_state_landkreis_yearly_raises_when_l2_missing(temp_works
             input_folder=str(input_dir),
             output_root=str(output_dir),
             gadm_l2_path=str(empty_gadm),
-        )
\ No newline at end of file
+        )
+
+def test_filter_json_by_state_landkreis_yearly_parallel_matches_serial(temp_workspace, sample_gadm_l2_geojson):
+    input_dir = temp_workspace["input_dir"]
+
+    def entry(i, lon, lat, bl, gs, date):
+        return {
+            "id": i,
+            "Laengengrad": lon,
+            "Breitengrad": lat,
+            "Bundesland": bl,
+            "Gemeindeschluessel": gs,
+            "Inbetriebnahmedatum": date,
+        }
+
+    write_json(input_dir / "a.json", [
+        entry(1, "10.5", "50.0", "1403", "09670000", "2020-01-01"),
+        entry(2, "10.6", "50.1", "1415", "16000000", "2020-01-01"),
+    ])
+    write_json(input_dir / "b.json", [
+        entry(3, "11.5", "50.5", "1415", "16000000", "2021-06-06"),
+        entry(4, "20.0", "60.0", "1403", "09670000", "2021-06-06"),
+    ])
+    (input_dir / "bad.json").write_text("{ invalid json", encoding="utf-8")
+
+    outputs = {}
+    for workers in (1, 2):
+        output_dir = temp_workspace["root"] / f"out_{workers}"
+        mod.filter_json_by_state_landkreis_yearly(
+            input_folder=str(input_dir),
+            output_root=str(output_dir),
+            gadm_l2_path=str(sample_gadm_l2_geojson),
+            max_workers=workers,
+        )
+        outputs[workers] = {
+            p.relative_to(output_dir).as_posix(): read_json(p)
+            for p in output_dir.rglob("*.json")
+            if p.name != "_summary.json"
+        }
+        summary = read_json(output_dir / "_summary.json")
+        assert summary["files_processed"] == 3
+        assert summary["kept_entries"] == 2
+        assert summary["dropped_state_triple_mismatch"] == 1
+        assert summary["dropped_no_polygon_match"] == 1
+
+    assert outputs[1] == outputs[2]
+    assert set(outputs[1]) == {"Bayern/landkreis a/2020/a.json", "Thüringen/landkreis b_city/2021/b.json"}
+
+
+def test_bucket_key_roundtrip_groups_polygons_by_names():
+    square = MultiPolygon([Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])])
+    mod.init_prepared([
+        ("Bayern", "Landkreis A", square),
+        ("Thüringen", "Landkreis B", square),
+        ("Bayern", "Landkreis A", square),
+    ])
+
+    assert mod._group_of_polygon == [0, 1, 0]
+    for group_id, year in [(0, "2020"), (1, "0999"), (1, "unknown")]:
+        key = mod.bucket_key(group_id, year)
+        assert mod.unpack_bucket_key(key) == mod._group_names[group_id] + (year,)
+    assert mod.bucket_key(0, "2020") != mod.bucket_key(1, "2020")
+
+
+def test_iter_json_paths_recurses_and_tolerates_missing_folder(tmp_path):
+    (tmp_path / "a" / "b").mkdir(parents=True)
+    (tmp_path / "top.json").write_text("[]", encoding="utf-8")
+    (tmp_path / "a" / "b" / "deep.json").write_text("[]", encoding="utf-8")
+    (tmp_path / "a" / "notes.txt").write_text("x", encoding="utf-8")
+    (tmp_path / "a" / "dir.json").mkdir()
+
+    found = sorted(Path(p).relative_to(tmp_path).as_posix() for p in mod.iter_json_paths(str(tmp_path)))
+
+    assert found == ["a/b/deep.json", "top.json"]
+    assert list(mod.iter_json_paths(str(tmp_path / "missing"))) == []
+
+
+def test_filter_json_by_state_landkreis_yearly_counts_empty_coordinates(temp_workspace, sample_gadm_l2_geojson):
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+
+    base = {"Bundesland": "1403", "Gemeindeschluessel": "09670000", "Inbetriebnahmedatum": "2020-01-01"}
+    write_json(input_dir / "file1.json", [
+        {**base, "id": 1, "Laengengrad": "10.5", "Breitengrad": "50.0"},
+        {**base, "id": 2, "Laengengrad": "", "Breitengrad": "50.0"},
+        {**base, "id": 3, "Laengengrad": "10.5"},
+        {**base, "id": 4, "Laengengrad": None, "Breitengrad": None},
+        {**base, "id": 5, "Laengengrad": "abc", "Breitengrad": "50.0"},
+    ])
+
+    mod.filter_json_by_state_landkreis_yearly(
+        input_folder=str(input_dir),
+        output_root=str(output_dir),
+        gadm_l2_path=str(sample_gadm_l2_geojson),
+    )
+
+    summary = read_json(output_dir / "_summary.json")
+    assert summary["entries_seen"] == 5
+    assert summary["dropped_empty_coords"] == 3
+    assert summary["kept_entries"] == 1
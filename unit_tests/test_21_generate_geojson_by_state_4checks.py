@@ -7,6 +7,7 @@ import sys
 from pathlib import Path
 
 import pytest
+import shapely
 from shapely.geometry import MultiPolygon, Point
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -132,6 +133,7 @@ def test_load_state_polygons(sample_state_geojson):
     assert "thueringen" in polygons
     assert isinstance(polygons["bayern"], MultiPolygon)
     assert isinstance(polygons["thueringen"], MultiPolygon)
+    assert all(shapely.is_prepared(mp) for mp in polygons.values())
 
 
 def test_polygon_state_of_point(sample_state_geojson):
@@ -142,6 +144,16 @@ def test_polygon_state_of_point(sample_state_geojson):
     assert mod.polygon_state_of_point(Point(20.0, 60.0), polygons) is None
 
 
+def test_polygon_state_of_point_with_index_matches_plain_scan(sample_state_geojson):
+    polygons = mod.load_state_polygons(str(sample_state_geojson))
+    state_index = mod.build_state_index(polygons)
+
+    # (11.0, 50.5) lies on the shared border: both scans must pick the first state
+    for pt in [Point(10.5, 50.0), Point(11.5, 50.5), Point(11.0, 50.5), Point(20.0, 60.0)]:
+        assert mod.polygon_state_of_point(pt, polygons, state_index) == mod.polygon_state_of_point(pt, polygons)
+    assert mod.polygon_state_of_point(Point(11.0, 50.5), polygons, state_index) == "bayern"
+
+
 def test_bl_code_to_norm_name():
     assert mod.bl_code_to_norm_name("1403") == "bayern"
     assert mod.bl_code_to_norm_name("1415") == "thueringen"
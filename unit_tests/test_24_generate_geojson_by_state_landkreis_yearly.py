@@ -7,7 +7,7 @@ import sys
 from pathlib import Path
 
 import pytest
-from shapely.geometry import MultiPolygon, Point
+from shapely.geometry import MultiPolygon, Point, Polygon
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT))
@@ -125,6 +125,19 @@ def test_parse_point(entry, expected):
         assert p.y == pytest.approx(lat)
 
 
+@pytest.mark.parametrize(
+    ("entry", "expected"),
+    [
+        ({"Laengengrad": "10,5", "Breitengrad": "50.0"}, (10.5, 50.0)),
+        ({"Laengengrad": 10.5, "Breitengrad": 50}, (10.5, 50.0)),
+        ({"Laengengrad": "", "Breitengrad": "50"}, None),
+        ({"Laengengrad": "10", "Breitengrad": "-91"}, None),
+    ],
+)
+def test_parse_xy(entry, expected):
+    assert mod.parse_xy(entry) == expected
+
+
 @pytest.mark.parametrize(
     ("entry", "expected"),
     [
@@ -133,6 +146,10 @@ def test_parse_point(entry, expected):
         ({"Inbetriebnahmedatum": "abcd"}, "unknown"),
         ({"Inbetriebnahmedatum": ""}, "unknown"),
         ({}, "unknown"),
+        ({"Inbetriebnahmedatum": None}, "unknown"),
+        ({"Inbetriebnahmedatum": 2004}, "2004"),
+        ({"Inbetriebnahmedatum": "  2011-02-03 "}, "2011"),
+        ({"Inbetriebnahmedatum": "201 "}, "unknown"),
     ],
 )
 def test_extract_year(entry, expected):
@@ -146,8 +163,8 @@ def test_load_state_polygons(sample_state_geojson):
     assert "thueringen" in polygons
     assert pretty["bayern"] == "Bayern"
     assert pretty["thueringen"] == "Thüringen"
-    assert isinstance(polygons["bayern"], MultiPolygon)
-    assert isinstance(polygons["thueringen"], MultiPolygon)
+    assert isinstance(polygons["bayern"], (Polygon, MultiPolygon))
+    assert isinstance(polygons["thueringen"], (Polygon, MultiPolygon))
 
 
 def test_polygon_state_of_point(sample_state_geojson):
@@ -184,7 +201,7 @@ def test_to_feature():
     }
 
     point = mod.parse_point(entry)
-    feature = mod.to_feature(entry, point)
+    feature = mod.to_feature(entry, point.x, point.y)
 
     assert feature["type"] == "Feature"
     assert feature["geometry"]["type"] == "Point"
@@ -192,6 +209,8 @@ def test_to_feature():
     assert feature["properties"]["id"] == 1
     assert "Laengengrad" not in feature["properties"]
     assert "Breitengrad" not in feature["properties"]
+    # The entry is reused as the properties dict instead of being copied
+    assert feature["properties"] is entry
 
 
 def test_bl_code_to_norm_name():
@@ -298,6 +317,78 @@ def test_convert_state_landkreis_yearly_end_to_end(
     assert "DONE:" in out
 
 
+def test_convert_state_landkreis_yearly_skips_polygon_lookup_for_bad_codes(
+    temp_workspace,
+    sample_state_geojson,
+    sample_gadm_l2_geojson,
+    monkeypatch,
+):
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+
+    good = {"id": 1, "Laengengrad": "10.5", "Breitengrad": "50.0",
+            "Bundesland": "1403", "Gemeindeschluessel": "09670000", "Inbetriebnahmedatum": "2020-01-01"}
+    code_mismatch = {"id": 2, "Laengengrad": "10.6", "Breitengrad": "50.1",
+                     "Bundesland": "1403", "Gemeindeschluessel": "16000000"}
+    missing_gs = {"id": 3, "Laengengrad": "10.7", "Breitengrad": "50.2", "Bundesland": "1403"}
+    polygon_mismatch = {"id": 4, "Laengengrad": "10.5", "Breitengrad": "50.0",
+                        "Bundesland": "1415", "Gemeindeschluessel": "16000000"}
+    write_json(input_dir / "file1.json", [good, code_mismatch, missing_gs, polygon_mismatch])
+
+    looked_up = []
+    original = mod.shapely.covers
+
+    def recording(polys, points):
+        looked_up.append(len(points))
+        return original(polys, points)
+
+    monkeypatch.setattr(mod.shapely, "covers", recording)
+    monkeypatch.setattr(mod, "INPUT_FOLDER", str(input_dir))
+    monkeypatch.setattr(mod, "OUTPUT_ROOT", str(output_dir))
+    monkeypatch.setattr(mod, "GADM_L2_PATH", str(sample_gadm_l2_geojson))
+    monkeypatch.setattr(mod, "POLYGON_STATES_PATH", str(sample_state_geojson))
+
+    mod.convert_state_landkreis_yearly()
+
+    # The state check only tests the two entries whose codes agree (each against its own
+    # state); then the L2 pass tests the one survivor
+    assert looked_up == [2, 1]
+    summary = read_json(output_dir / "_state_landkreis_yearly_summary.json")
+    assert summary["passed_3check"] == 1
+    assert summary["skipped_inconsistent"] == 3
+    assert summary["skipped_empty_coords"] == 0
+
+
+def test_convert_state_landkreis_yearly_checks_point_against_expected_state_only(
+    temp_workspace,
+    sample_state_geojson,
+    sample_gadm_l2_geojson,
+    monkeypatch,
+):
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+
+    # (11.0, 50.5) lies on the Bayern / Thüringen border: covered by both states
+    on_border = {"id": 1, "Laengengrad": "11.0", "Breitengrad": "50.5",
+                 "Bundesland": "1415", "Gemeindeschluessel": "16000000"}
+    wrong_state = {"id": 2, "Laengengrad": "10.5", "Breitengrad": "50.0",
+                   "Bundesland": "1415", "Gemeindeschluessel": "16000000"}
+    unknown_state = {"id": 3, "Laengengrad": "10.5", "Breitengrad": "50.0",
+                     "Bundesland": "1400", "Gemeindeschluessel": "12000000"}
+    write_json(input_dir / "file1.json", [on_border, wrong_state, unknown_state])
+
+    monkeypatch.setattr(mod, "INPUT_FOLDER", str(input_dir))
+    monkeypatch.setattr(mod, "OUTPUT_ROOT", str(output_dir))
+    monkeypatch.setattr(mod, "GADM_L2_PATH", str(sample_gadm_l2_geojson))
+    monkeypatch.setattr(mod, "POLYGON_STATES_PATH", str(sample_state_geojson))
+
+    mod.convert_state_landkreis_yearly()
+
+    summary = read_json(output_dir / "_state_landkreis_yearly_summary.json")
+    assert summary["passed_3check"] == 1
+    assert summary["skipped_inconsistent"] == 2
+
+
 def test_convert_state_landkreis_yearly_empty_input(
     temp_workspace,
     sample_state_geojson,
@@ -362,4 +453,48 @@ def test_convert_state_landkreis_yearly_with_empty_l2_produces_zero_matches(
 
     summary = read_json(output_dir / "_state_landkreis_yearly_summary.json")
     assert summary["entries_seen"] == 0
-    assert summary["matched_entries"] == 0
\ No newline at end of file
+    assert summary["matched_entries"] == 0
+
+
+def test_first_covering_polygon_prefers_file_order_and_flags_misses():
+    import numpy as np
+    from shapely.geometry import box
+    from shapely.strtree import STRtree
+
+    # Two overlapping squares: points in the overlap go to the first one
+    tree = STRtree([box(0, 0, 2, 2), box(1, 1, 3, 3)])
+    points = np.array([Point(0.5, 0.5), Point(1.5, 1.5), Point(2.5, 2.5), Point(2.0, 0.0), Point(5, 5)])
+
+    assert mod.first_covering_polygon(tree, points).tolist() == [0, 0, 1, 0, -1]
+    assert mod.first_covering_polygon(tree, np.array([], dtype=object)).tolist() == []
+
+
+def test_convert_state_landkreis_yearly_counts_empty_coordinates(
+    temp_workspace,
+    sample_state_geojson,
+    sample_gadm_l2_geojson,
+    monkeypatch,
+):
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+
+    base = {"Bundesland": "1403", "Gemeindeschluessel": "09670000", "Inbetriebnahmedatum": "2020-01-01"}
+    write_json(input_dir / "file1.json", [
+        {**base, "id": 1, "Laengengrad": "10.5", "Breitengrad": "50.0"},
+        {**base, "id": 2, "Laengengrad": "", "Breitengrad": ""},
+        {**base, "id": 3},
+        {**base, "id": 4, "Laengengrad": "x", "Breitengrad": "50.0"},
+    ])
+
+    monkeypatch.setattr(mod, "INPUT_FOLDER", str(input_dir))
+    monkeypatch.setattr(mod, "OUTPUT_ROOT", str(output_dir))
+    monkeypatch.setattr(mod, "GADM_L2_PATH", str(sample_gadm_l2_geojson))
+    monkeypatch.setattr(mod, "POLYGON_STATES_PATH", str(sample_state_geojson))
+
+    mod.convert_state_landkreis_yearly()
+
+    summary = read_json(output_dir / "_state_landkreis_yearly_summary.json")
+    assert summary["entries_seen"] == 4
+    assert summary["skipped_empty_coords"] == 2
+    assert summary["passed_3check"] == 1
+    assert summary["skipped_inconsistent"] == 0
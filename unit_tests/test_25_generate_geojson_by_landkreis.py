@@ -8,6 +8,7 @@ from pathlib import Path
 
 import pytest
 from shapely.geometry import MultiPolygon, Point
+from shapely.prepared import prep
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(PROJECT_ROOT))
@@ -92,6 +93,22 @@ def test_parse_point(entry, expected):
         assert p.y == pytest.approx(lat)
 
 
+@pytest.mark.parametrize(
+    ("entry", "expected"),
+    [
+        ({"Laengengrad": "10,5", "Breitengrad": " 50.0 "}, (10.5, 50.0)),
+        ({"Laengengrad": 10.5, "Breitengrad": 50}, (10.5, 50.0)),
+        ({"Laengengrad": None, "Breitengrad": "50"}, None),
+        ({"Laengengrad": "", "Breitengrad": "50"}, None),
+        ({"Laengengrad": "nan", "Breitengrad": "50"}, None),
+        ({"Laengengrad": ["10"], "Breitengrad": "50"}, None),
+        ("not a dict", None),
+    ],
+)
+def test_parse_xy(entry, expected):
+    assert mod.parse_xy(entry) == expected
+
+
 def test_safe_filename():
     assert mod.safe_filename("Landkreis A") == "Landkreis A"
     assert mod.safe_filename("Landkreis/B") == "Landkreis_B"
@@ -99,6 +116,20 @@ def test_safe_filename():
     assert mod.safe_filename("") == "unknown"
 
 
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("  Müllheim-Süd ", "Müllheim-Süd"),
+        ("A//B\\\\C", "A_B_C"),
+        ("Stadt (kreisfrei), Nord", "Stadt _kreisfrei_ Nord"),
+        ("Île-de-Zoß.v2", "_le-de-Zoß.v2"),
+        ("___", "_"),
+    ],
+)
+def test_safe_filename_replaces_and_collapses(name, expected):
+    assert mod.safe_filename(name) == expected
+
+
 def test_load_landkreis_polygons(sample_gadm_l2_geojson):
     polygons = mod.load_landkreis_polygons(str(sample_gadm_l2_geojson))
 
@@ -111,7 +142,7 @@ def test_load_landkreis_polygons(sample_gadm_l2_geojson):
 
 def test_match_landkreis_via_prepared_geometries(sample_gadm_l2_geojson):
     landkreise = mod.load_landkreis_polygons(str(sample_gadm_l2_geojson))
-    prepared = [(name_2, props, mod.prep(geom)) for (name_2, props, geom) in landkreise]
+    prepared = [(name_2, props, prep(geom)) for (name_2, props, geom) in landkreise]
 
     def _match(point):
         for name_2, props, pgeom in prepared:
@@ -143,6 +174,16 @@ def test_to_feature():
     assert "Breitengrad" not in feature["properties"]
 
 
+def test_xy_feature_reuses_entry_as_properties():
+    entry = {"Laengengrad": "10,5", "Breitengrad": "50,0", "id": 7}
+
+    feature = mod.xy_feature(entry, 10.5, 50.0)
+
+    assert feature["properties"] is entry
+    assert entry == {"id": 7}
+    assert feature["geometry"]["coordinates"] == [10.5, 50.0]
+
+
 def test_convert_by_landkreis_end_to_end(
     temp_workspace,
     sample_gadm_l2_geojson,
@@ -262,6 +303,23 @@ def test_convert_by_landkreis_empty_input(
     assert summary["unmatched_entries"] == 0
 
 
+def test_convert_by_landkreis_writes_summary_pretty_even_when_features_compact(
+    temp_workspace,
+    sample_gadm_l2_geojson,
+):
+    output_dir = temp_workspace["output_dir"]
+
+    mod.convert_by_landkreis(
+        input_folder=str(temp_workspace["input_dir"]),
+        output_folder=str(output_dir),
+        gadm_l2_path=str(sample_gadm_l2_geojson),
+        pretty=False,
+    )
+
+    text = (output_dir / "_landkreis_summary.json").read_text(encoding="utf-8")
+    assert '\n  "files_processed"' in text
+
+
 def test_convert_by_landkreis_raises_with_empty_l2(
     temp_workspace,
 ):
@@ -276,4 +334,340 @@ def test_convert_by_landkreis_raises_with_empty_l2(
             input_folder=str(input_dir),
             output_folder=str(output_dir),
             gadm_l2_path=str(empty),
-        )
\ No newline at end of file
+        )
+
+
+def test_convert_by_landkreis_matches_boundary_points_via_index(
+    temp_workspace,
+    sample_gadm_l2_geojson,
+):
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+
+    on_edge = {"id": 1, "Laengengrad": "10.1", "Breitengrad": "50.0"}
+    on_corner = {"id": 2, "Laengengrad": "11.9", "Breitengrad": "50.9"}
+    in_gap = {"id": 3, "Laengengrad": "11.0", "Breitengrad": "50.5"}
+
+    write_json(input_dir / "file1.json", [on_edge, on_corner, in_gap])
+
+    mod.convert_by_landkreis(
+        input_folder=str(input_dir),
+        output_folder=str(output_dir),
+        gadm_l2_path=str(sample_gadm_l2_geojson),
+    )
+
+    a_feats = read_json(output_dir / "Landkreis A.geojson")["features"]
+    b_feats = read_json(output_dir / "Landkreis B.geojson")["features"]
+    assert [f["properties"]["id"] for f in a_feats] == [1]
+    assert [f["properties"]["id"] for f in b_feats] == [2]
+
+    summary = read_json(output_dir / "_landkreis_summary.json")
+    assert summary["matched_entries"] == 2
+    assert summary["unmatched_entries"] == 1
+
+
+def test_first_covering_polygon_prefers_file_order_and_flags_misses():
+    from shapely.geometry import box
+    from shapely.strtree import STRtree
+    import numpy as np
+
+    # Two overlapping squares: points in the overlap go to the first one
+    tree = STRtree([box(0, 0, 2, 2), box(1, 1, 3, 3)])
+    xs = np.array([0.5, 1.5, 2.5, 2.0, 5.0])
+    ys = np.array([0.5, 1.5, 2.5, 0.0, 5.0])
+
+    assert mod.first_covering_polygon(tree, xs, ys).tolist() == [0, 0, 1, 0, -1]
+    assert mod.first_covering_polygon(tree, np.array([]), np.array([])).tolist() == []
+
+
+def test_first_covering_polygon_bbox_prefilter_keeps_edges():
+    from shapely.geometry import box
+    from shapely.strtree import STRtree
+    import numpy as np
+
+    tree = STRtree([box(0, 0, 1, 1), box(4, 0, 5, 1)])
+    # Points on the outer bbox edge still match; points beyond it and in the gap do not
+    xs = np.array([0.0, 5.0, 2.5, -0.1, 5.1])
+    ys = np.array([0.0, 1.0, 0.5, 0.5, 0.5])
+
+    assert mod.first_covering_polygon(tree, xs, ys).tolist() == [0, 1, -1, -1, -1]
+    assert mod.first_covering_polygon(STRtree([]), np.array([1.0]), np.array([1.0])).tolist() == [-1]
+
+
+@pytest.mark.parametrize("fast_decoder", [True, False])
+def test_convert_by_landkreis_rolls_back_truncated_file(
+    temp_workspace,
+    sample_gadm_l2_geojson,
+    monkeypatch,
+    capsys,
+    fast_decoder,
+):
+    if not fast_decoder:
+        monkeypatch.setattr(mod, "orjson", None)
+
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+
+    write_json(input_dir / "good.json", [{"id": 1, "Laengengrad": "10.5", "Breitengrad": "50.0"}])
+    # Valid first entry, then the file breaks off: nothing from it may be kept
+    (input_dir / "truncated.json").write_text(
+        '[{"id": 2, "Laengengrad": "11.5", "Breitengrad": "50.5"}, {"id": 3, "Laeng',
+        encoding="utf-8",
+    )
+
+    mod.convert_by_landkreis(
+        input_folder=str(input_dir),
+        output_folder=str(output_dir),
+        gadm_l2_path=str(sample_gadm_l2_geojson),
+    )
+
+    assert (output_dir / "Landkreis A.geojson").exists()
+    assert not (output_dir / "Landkreis B.geojson").exists()
+
+    summary = read_json(output_dir / "_landkreis_summary.json")
+    assert summary["files_processed"] == 2
+    assert summary["entries_seen"] == 1
+    assert summary["matched_entries"] == 1
+    assert "Could not load truncated.json" in capsys.readouterr().out
+
+
+def test_covers_xy_rings_matches_shapely_covers():
+    import numpy as np
+    import shapely
+    from shapely.geometry import MultiPolygon, Polygon, box
+
+    # Square with a hole plus a separate part
+    geom = MultiPolygon([
+        Polygon([(0, 0), (4, 0), (4, 4), (0, 4)], [[(1, 1), (3, 1), (3, 3), (1, 3)]]),
+        box(5, 0, 6, 1),
+    ])
+    grid = np.arange(-0.5, 6.75, 0.25)
+    xs, ys = (a.ravel() for a in np.meshgrid(grid, grid))
+
+    out = np.zeros(len(xs), dtype=bool)
+    mod.covers_xy_rings(xs, ys, *mod.ring_arrays(geom), out)
+
+    assert out.tolist() == shapely.covers(geom, shapely.points(xs, ys)).tolist()
+
+
+def test_first_covering_polygon_kernel_path_matches_geos(monkeypatch):
+    from shapely.geometry import box
+    from shapely.strtree import STRtree
+    import numpy as np
+
+    tree = STRtree([box(0, 0, 2, 2), box(1, 1, 3, 3)])
+    xs = np.array([0.5, 1.5, 2.5, 2.0, 5.0, 3.0])
+    ys = np.array([0.5, 1.5, 2.5, 0.0, 5.0, 1.0])
+    expected = mod.first_covering_polygon(tree, xs, ys).tolist()
+
+    # Route every polygon through the (uncompiled) kernel
+    monkeypatch.setattr(mod, "covers_xy_kernel", mod.covers_xy_rings)
+    monkeypatch.setattr(mod, "NUMBA_MIN_POINTS", 0)
+
+    assert mod.first_covering_polygon(tree, xs, ys).tolist() == expected == [0, 0, 1, 0, -1, 1]
+
+
+@pytest.mark.parametrize("fast_encoder", [True, False])
+def test_convert_by_landkreis_streams_valid_feature_collections(
+    temp_workspace,
+    sample_gadm_l2_geojson,
+    monkeypatch,
+    fast_encoder,
+):
+    if not fast_encoder:
+        monkeypatch.setattr(mod, "orjson", None)
+
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+    write_json(
+        input_dir / "plants.json",
+        [
+            {"id": 1, "Laengengrad": "10.5", "Breitengrad": "50.0", "Name": "Mühle"},
+            {"id": 2, "Laengengrad": "10.6", "Breitengrad": "50.1"},
+        ],
+    )
+
+    mod.convert_by_landkreis(
+        input_folder=str(input_dir),
+        output_folder=str(output_dir),
+        gadm_l2_path=str(sample_gadm_l2_geojson),
+    )
+
+    geojson = read_json(output_dir / "Landkreis A.geojson")
+    assert geojson["type"] == "FeatureCollection"
+    assert [f["properties"] for f in geojson["features"]] == [{"id": 1, "Name": "Mühle"}, {"id": 2}]
+
+
+def test_convert_by_landkreis_leaves_no_truncated_output_on_failure(
+    temp_workspace,
+    sample_gadm_l2_geojson,
+    monkeypatch,
+):
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+    write_json(
+        input_dir / "plants.json",
+        [
+            {"id": 1, "Laengengrad": "10.5", "Breitengrad": "50.0"},
+            {"id": 2, "Laengengrad": "11.5", "Breitengrad": "50.5"},
+        ],
+    )
+
+    original = mod.dumps_json
+    calls = []
+
+    def failing_second_feature(obj, pretty=False):
+        calls.append(obj)
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return original(obj, pretty)
+
+    monkeypatch.setattr(mod, "dumps_json", failing_second_feature)
+
+    with pytest.raises(OSError, match="disk full"):
+        mod.convert_by_landkreis(
+            input_folder=str(input_dir),
+            output_folder=str(output_dir),
+            gadm_l2_path=str(sample_gadm_l2_geojson),
+        )
+
+    assert list(output_dir.iterdir()) == []
+
+
+def test_iter_json_paths_recurses_and_skips_missing(tmp_path):
+    (tmp_path / "a" / "b.json").mkdir(parents=True)  # a directory, not a file
+    (tmp_path / "a" / "b.json" / "deep.json").write_text("[]", encoding="utf-8")
+    (tmp_path / "top.json").write_text("[]", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("", encoding="utf-8")
+
+    found = sorted(Path(p).relative_to(tmp_path).as_posix() for p in mod.iter_json_paths(str(tmp_path)))
+
+    assert found == ["a/b.json/deep.json", "top.json"]
+    assert list(mod.iter_json_paths(str(tmp_path / "missing"))) == []
+
+
+@pytest.mark.parametrize("fast_decoder", [True, False])
+def test_iter_parsed_files_read_ahead_keeps_order_and_errors(tmp_path, monkeypatch, fast_decoder):
+    if not fast_decoder:
+        monkeypatch.setattr(mod, "orjson", None)
+    monkeypatch.setattr(mod, "READ_AHEAD", 1)
+
+    paths = []
+    for i in range(5):
+        path = tmp_path / f"f{i}.json"
+        write_json(path, [{"Laengengrad": f"10.{i}", "Breitengrad": "50"}, {"id": i}])
+        paths.append(str(path))
+    (tmp_path / "f2.json").write_text('[{"Laengengrad": "1', encoding="utf-8")
+    paths.append(str(tmp_path / "missing.json"))
+
+    results = list(mod.iter_parsed_files(paths))
+
+    assert [path for path, _ in results] == paths
+    assert isinstance(results[2][1], ValueError)
+    assert isinstance(results[5][1], OSError)
+    n_seen, entries, xs, ys = results[4][1]
+    assert (n_seen, len(entries), xs, ys) == (2, 1, [10.4], [50.0])
+
+
+def test_covered_pairs_prepares_polygons_for_geos(monkeypatch):
+    from shapely.geometry import box
+    from shapely.strtree import STRtree
+    import numpy as np
+    import shapely
+
+    tree = STRtree([box(0, 0, 2, 2), box(1, 1, 3, 3)])
+    xs = np.array([0.5, 1.5, 2.5])
+    ys = np.array([0.5, 1.5, 2.5])
+    monkeypatch.setattr(mod, "NUMBA_MIN_POINTS", 10**9)  # every polygon via GEOS
+
+    pt_idx, poly_idx = mod.covered_pairs(tree, shapely.points(xs, ys), xs, ys)
+
+    assert sorted(zip(pt_idx.tolist(), poly_idx.tolist())) == [(0, 0), (1, 0), (1, 1), (2, 1)]
+    assert shapely.is_prepared(tree.geometries).all()
+
+
+def test_load_landkreis_polygons_uses_and_refreshes_cache(sample_gadm_l2_geojson, monkeypatch, capsys):
+    import os
+
+    path = str(sample_gadm_l2_geojson)
+    cache = Path(path + mod.GADM_CACHE_SUFFIX)
+
+    first = mod.load_landkreis_polygons(path)
+    assert cache.exists()
+
+    # A fresh cache is read without parsing the GeoJSON again
+    def _no_parse(_path):
+        raise AssertionError("GeoJSON parsed despite fresh cache")
+
+    monkeypatch.setattr(mod, "load_json", _no_parse)
+    cached = mod.load_landkreis_polygons(path)
+    assert [(n, p) for n, p, _ in cached] == [(n, p) for n, p, _ in first]
+    assert all(a.equals(b) for (_, _, a), (_, _, b) in zip(cached, first))
+    monkeypatch.undo()
+
+    # A newer GeoJSON invalidates the cache; a corrupt cache is rebuilt
+    mtime = cache.stat().st_mtime
+    os.utime(path, (mtime + 10, mtime + 10))
+    cache.write_bytes(b"garbage")
+    os.utime(cache, (mtime + 20, mtime + 20))
+    rebuilt = mod.load_landkreis_polygons(path)
+
+    assert [n for n, _, _ in rebuilt] == ["Landkreis A", "Landkreis B"]
+    assert "Ignoring unreadable polygon cache" in capsys.readouterr().out
+
+
+def test_first_covering_polygon_queries_duplicate_coordinates_once(monkeypatch):
+    from shapely.geometry import box
+    from shapely.strtree import STRtree
+    import numpy as np
+
+    tree = STRtree([box(0, 0, 2, 2), box(1, 1, 3, 3)])
+    xs = np.array([1.5, 0.5, 1.5, 2.5, 1.5, 9.0])
+    ys = np.array([1.5, 0.5, 1.5, 2.5, 1.5, 9.0])
+
+    queried = []
+    real_points = mod.shapely.points
+
+    def _points(px, py):
+        queried.append(len(px))
+        return real_points(px, py)
+
+    monkeypatch.setattr(mod.shapely, "points", _points)
+
+    assert mod.first_covering_polygon(tree, xs, ys).tolist() == [0, 0, 0, 1, 0, -1]
+    assert queried == [3]
+
+
+def test_first_covering_polygon_interior_raster_matches_exact(monkeypatch):
+    from shapely.geometry import Point, box
+    from shapely.strtree import STRtree
+    import numpy as np
+
+    tree = STRtree([Point(0, 0).buffer(2), box(1, 1, 3, 3), box(-3, -3, -1, 3)])
+    rng = np.random.default_rng(0)
+    xs = rng.uniform(-3.5, 3.5, 5000).round(2)
+    ys = rng.uniform(-3.5, 3.5, 5000).round(2)
+
+    monkeypatch.setattr(mod, "RASTER_CELL_DEG", 0)
+    expected = mod.first_covering_polygon(tree, xs, ys)
+    monkeypatch.setattr(mod, "RASTER_CELL_DEG", 0.25)
+    raster = mod.interior_raster(tree, mod.shapely.total_bounds(tree.geometries), 0.25)
+
+    assert (raster >= 0).any() and (raster < 0).any()
+    assert mod.first_covering_polygon(tree, xs, ys).tolist() == expected.tolist()
+
+
+@pytest.mark.parametrize("fast_encoder", [True, False])
+def test_dump_json_compact_by_default_and_pretty_on_request(tmp_path, monkeypatch, fast_encoder):
+    if not fast_encoder:
+        monkeypatch.setattr(mod, "orjson", None)
+    data = {"name": "Mühldorf", "values": [1, 2]}
+
+    mod.dump_json(data, str(tmp_path / "compact.json"))
+    mod.dump_json(data, str(tmp_path / "pretty.json"), pretty=True)
+
+    compact = (tmp_path / "compact.json").read_text(encoding="utf-8")
+    pretty = (tmp_path / "pretty.json").read_text(encoding="utf-8")
+    assert "\n" not in compact and "Mühldorf" in compact
+    assert '\n  "name"' in pretty
+    assert json.loads(compact) == json.loads(pretty) == data
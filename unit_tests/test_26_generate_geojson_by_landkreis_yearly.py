@@ -3,6 +3,7 @@ Unit tests for step26_generate_geojson_by_landkreis_yearly.py
 """
 
 import json
+import os
 import sys
 from pathlib import Path
 
@@ -185,6 +186,24 @@ def test_load_gadm_l2_polygons(sample_gadm_l2_geojson):
     assert polygons[1][0] == "Landkreis B"
 
 
+def test_load_gadm_l2_polygons_keeps_geometry_types_and_skips_non_areas(tmp_path):
+    square = [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]
+    path = tmp_path / "gadm.json"
+    write_json(path, {"type": "FeatureCollection", "features": [
+        {"type": "Feature", "properties": {"NAME_1": "S", "NAME_2": "Poly"},
+         "geometry": {"type": "Polygon", "coordinates": square}},
+        {"type": "Feature", "properties": {"NAME_1": "S", "NAME_2": "Multi"},
+         "geometry": {"type": "MultiPolygon", "coordinates": [square]}},
+        {"type": "Feature", "properties": {"NAME_1": "S", "NAME_2": "Line"},
+         "geometry": {"type": "LineString", "coordinates": [[0, 0], [1, 1]]}},
+    ]})
+
+    polygons = mod.load_gadm_l2_polygons(str(path))
+
+    assert [name for name, _ in polygons] == ["Poly", "Multi"]
+    assert [pgeom.context.geom_type for _, pgeom in polygons] == ["Polygon", "MultiPolygon"]
+
+
 def test_to_feature():
     entry = {
         "Laengengrad": "10.5",
@@ -194,7 +213,7 @@ def test_to_feature():
     }
 
     point = mod.parse_point(entry)
-    feature = mod.to_feature(entry, point)
+    feature = mod.to_feature(entry, point.x, point.y)
 
     assert feature["type"] == "Feature"
     assert feature["geometry"]["type"] == "Point"
@@ -282,6 +301,151 @@ def test_convert_landkreis_yearly_end_to_end(
     assert len(read_json(b_unknown)["features"]) == 1
 
 
+def test_convert_landkreis_yearly_streams_features_across_files_in_order(
+    temp_workspace,
+    sample_state_geojson,
+    sample_gadm_l2_geojson,
+    monkeypatch,
+):
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+
+    def bayern(i, lon):
+        return {
+            "id": i,
+            "Laengengrad": lon,
+            "Breitengrad": "50.0",
+            "Bundesland": "1403",
+            "Gemeindeschluessel": "09670000",
+            "Inbetriebnahmedatum": "2020-05-01",
+            "Ort": "Würzburg",
+        }
+
+    write_json(input_dir / "a.json", [bayern(1, "10.2"), bayern(2, "10.3")])
+    write_json(input_dir / "b.json", [bayern(3, "10.4")])
+
+    monkeypatch.setattr(mod, "INPUT_FOLDER", str(input_dir))
+    monkeypatch.setattr(mod, "OUTPUT_ROOT", str(output_dir))
+    monkeypatch.setattr(mod, "GADM_L2_PATH", str(sample_gadm_l2_geojson))
+    monkeypatch.setattr(mod, "POLYGON_STATES_PATH", str(sample_state_geojson))
+
+    mod.convert_landkreis_yearly()
+
+    out = output_dir / "Landkreis A" / "2020.geojson"
+    data = read_json(out)
+    assert data["type"] == "FeatureCollection"
+    assert sorted(f["properties"]["id"] for f in data["features"]) == [1, 2, 3]
+    assert [f["properties"]["id"] for f in data["features"]][:2] == [1, 2]
+    assert "Würzburg" in out.read_text(encoding="utf-8")
+    assert read_json(output_dir / "_landkreis_yearly_summary.json")["matched_entries"] == 3
+
+
+def test_convert_landkreis_yearly_leaves_no_truncated_output_on_failure(
+    temp_workspace,
+    sample_state_geojson,
+    sample_gadm_l2_geojson,
+    monkeypatch,
+):
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+
+    entries = [
+        {"id": i, "Laengengrad": lon, "Breitengrad": "50.0", "Bundesland": "1403",
+         "Gemeindeschluessel": "09670000", "Inbetriebnahmedatum": "2020-05-01"}
+        for i, lon in enumerate(["10.2", "10.3"], start=1)
+    ]
+    write_json(input_dir / "a.json", entries)
+
+    original = mod.dumps_json
+    calls = []
+
+    def failing_second_feature(data, pretty=False):
+        calls.append(data)
+        if len(calls) == 2:
+            raise OSError("disk full")
+        return original(data, pretty)
+
+    monkeypatch.setattr(mod, "dumps_json", failing_second_feature)
+    monkeypatch.setattr(mod, "INPUT_FOLDER", str(input_dir))
+    monkeypatch.setattr(mod, "OUTPUT_ROOT", str(output_dir))
+    monkeypatch.setattr(mod, "GADM_L2_PATH", str(sample_gadm_l2_geojson))
+    monkeypatch.setattr(mod, "POLYGON_STATES_PATH", str(sample_state_geojson))
+
+    with pytest.raises(OSError, match="disk full"):
+        mod.convert_landkreis_yearly()
+
+    assert [p for p in output_dir.rglob("*") if p.is_file()] == []
+
+
+def test_convert_landkreis_yearly_writes_more_outputs_than_open_file_limit(
+    temp_workspace,
+    sample_state_geojson,
+    sample_gadm_l2_geojson,
+    monkeypatch,
+):
+    resource = pytest.importorskip("resource")
+    if not os.path.isdir("/proc/self/fd"):
+        pytest.skip("needs /proc/self/fd to count open files")
+
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+
+    # One <lkr>/<year>.geojson per entry: 64 outputs for a single Landkreis
+    years = range(1950, 2014)
+    write_json(input_dir / "a.json", [
+        {"id": year, "Laengengrad": "10.5", "Breitengrad": "50.0", "Bundesland": "1403",
+         "Gemeindeschluessel": "09670000", "Inbetriebnahmedatum": f"{year}-01-01"}
+        for year in years
+    ])
+
+    monkeypatch.setattr(mod, "INPUT_FOLDER", str(input_dir))
+    monkeypatch.setattr(mod, "OUTPUT_ROOT", str(output_dir))
+    monkeypatch.setattr(mod, "GADM_L2_PATH", str(sample_gadm_l2_geojson))
+    monkeypatch.setattr(mod, "POLYGON_STATES_PATH", str(sample_state_geojson))
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (len(os.listdir("/proc/self/fd")) + 16, hard))
+    try:
+        mod.convert_landkreis_yearly()
+    finally:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+    written = sorted(p.name for p in (output_dir / "Landkreis A").glob("*.geojson"))
+    assert written == [f"{year}.geojson" for year in years]
+    assert read_json(output_dir / "Landkreis A" / "1961.geojson")["features"][0]["properties"]["id"] == 1961
+    assert list(output_dir.rglob("*.part")) == []
+
+
+def test_convert_landkreis_yearly_checks_point_against_expected_state_only(
+    temp_workspace,
+    sample_state_geojson,
+    sample_gadm_l2_geojson,
+    monkeypatch,
+):
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+
+    # (11.0, 50.5) lies on the Bayern / Thüringen border: covered by both states
+    on_border = {"id": 1, "Laengengrad": "11.0", "Breitengrad": "50.5",
+                 "Bundesland": "1415", "Gemeindeschluessel": "16000000"}
+    wrong_state = {"id": 2, "Laengengrad": "10.5", "Breitengrad": "50.0",
+                   "Bundesland": "1415", "Gemeindeschluessel": "16000000"}
+    unknown_state = {"id": 3, "Laengengrad": "10.5", "Breitengrad": "50.0",
+                     "Bundesland": "1400", "Gemeindeschluessel": "12000000"}
+    write_json(input_dir / "file1.json", [on_border, wrong_state, unknown_state])
+
+    monkeypatch.setattr(mod, "INPUT_FOLDER", str(input_dir))
+    monkeypatch.setattr(mod, "OUTPUT_ROOT", str(output_dir))
+    monkeypatch.setattr(mod, "GADM_L2_PATH", str(sample_gadm_l2_geojson))
+    monkeypatch.setattr(mod, "POLYGON_STATES_PATH", str(sample_state_geojson))
+
+    mod.convert_landkreis_yearly()
+
+    summary = read_json(output_dir / "_landkreis_yearly_summary.json")
+    assert summary["passed_3check"] == 1
+    assert summary["skipped_inconsistent"] == 2
+
+
 def test_convert_landkreis_yearly_empty_input(
     temp_workspace,
     sample_state_geojson,
@@ -319,4 +483,92 @@ def test_convert_landkreis_yearly_with_empty_l2_produces_no_outputs(
 
     mod.convert_landkreis_yearly()
 
-    assert list(output_dir.rglob("*.geojson")) == []
\ No newline at end of file
+    assert list(output_dir.rglob("*.geojson")) == []
+
+
+def test_first_covering_polygon_prefers_file_order_and_flags_misses():
+    import numpy as np
+    from shapely.geometry import box
+    from shapely.strtree import STRtree
+
+    # Two overlapping squares: points in the overlap go to the first one
+    tree = STRtree([box(0, 0, 2, 2), box(1, 1, 3, 3)])
+    points = np.array([Point(0.5, 0.5), Point(1.5, 1.5), Point(2.5, 2.5), Point(2.0, 0.0), Point(5, 5)])
+
+    assert mod.first_covering_polygon(tree, points).tolist() == [0, 0, 1, 0, -1]
+    assert mod.first_covering_polygon(tree, np.array([], dtype=object)).tolist() == []
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_output_geojson_is_compact_but_summary_indented(
+    temp_workspace,
+    sample_state_geojson,
+    sample_gadm_l2_geojson,
+    monkeypatch,
+    use_orjson,
+):
+    if not use_orjson:
+        monkeypatch.setattr(mod, "orjson", None)
+    elif mod.orjson is None:
+        pytest.skip("orjson not installed")
+
+    input_dir = temp_workspace["input_dir"]
+    output_dir = temp_workspace["output_dir"]
+    entries = [
+        {"id": i, "Laengengrad": "10.5", "Breitengrad": "50.0", "Bundesland": "1403",
+         "Gemeindeschluessel": "09670000", "Inbetriebnahmedatum": "2020-05-01"}
+        for i in (1, 2)
+    ]
+    write_json(input_dir / "file1.json", entries)
+
+    monkeypatch.setattr(mod, "INPUT_FOLDER", str(input_dir))
+    monkeypatch.setattr(mod, "OUTPUT_ROOT", str(output_dir))
+    monkeypatch.setattr(mod, "GADM_L2_PATH", str(sample_gadm_l2_geojson))
+    monkeypatch.setattr(mod, "POLYGON_STATES_PATH", str(sample_state_geojson))
+
+    mod.convert_landkreis_yearly()
+
+    out = output_dir / "Landkreis A" / "2020.geojson"
+    lines = out.read_text(encoding="utf-8").splitlines()
+    # Header, one line per feature, footer
+    assert len(lines) == 4
+    assert [f["properties"]["id"] for f in read_json(out)["features"]] == [1, 2]
+
+    summary_text = (output_dir / "_landkreis_yearly_summary.json").read_text(encoding="utf-8")
+    assert '\n  "entries_seen": 2' in summary_text
+
+
+def test_covers_xy_rings_matches_shapely_covers():
+    import numpy as np
+    import shapely
+    from shapely.geometry import MultiPolygon, Polygon, box
+
+    # Square with a hole plus a separate part
+    geom = MultiPolygon([
+        Polygon([(0, 0), (4, 0), (4, 4), (0, 4)], [[(1, 1), (3, 1), (3, 3), (1, 3)]]),
+        box(5, 0, 6, 1),
+    ])
+    grid = np.arange(-0.5, 6.75, 0.25)
+    xs, ys = (a.ravel() for a in np.meshgrid(grid, grid))
+
+    out = np.zeros(len(xs), dtype=bool)
+    mod.covers_xy_rings(xs, ys, *mod.ring_arrays(geom), out)
+
+    assert out.tolist() == shapely.covers(geom, shapely.points(xs, ys)).tolist()
+
+
+def test_first_covering_polygon_kernel_path_matches_geos(monkeypatch):
+    import numpy as np
+    import shapely
+    from shapely.geometry import box
+    from shapely.strtree import STRtree
+
+    tree = STRtree([box(0, 0, 2, 2), box(1, 1, 3, 3)])
+    points = shapely.points([0.5, 1.5, 2.5, 2.0, 5.0, 3.0], [0.5, 1.5, 2.5, 0.0, 5.0, 1.0])
+    expected = mod.first_covering_polygon(tree, points).tolist()
+
+    # Route every polygon through the (uncompiled) kernel
+    monkeypatch.setattr(mod, "covers_xy_kernel", mod.covers_xy_rings)
+    monkeypatch.setattr(mod, "NUMBA_MIN_POINTS", 0)
+
+    assert mod.first_covering_polygon(tree, points).tolist() == expected == [0, 0, 1, 0, -1, 1]
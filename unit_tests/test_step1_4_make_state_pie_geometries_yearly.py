@@ -481,4 +481,31 @@ def test_main_skips_bin_when_inputs_missing(tmp_path, monkeypatch):
     mod.main()
 
     out = bin_dir / "de_state_pie_2019_2020.geojson"
-    assert not out.exists()
\ No newline at end of file
+    assert not out.exists()
+
+def test_main_reads_points_once_when_computing_global_scale(tmp_path, monkeypatch):
+    base = tmp_path
+    bin_dir = base / "2019_2020"
+    bin_dir.mkdir(parents=True)
+
+    pts = bin_dir / "de_state_pies_2019_2020.geojson"
+    meta = bin_dir / "state_pie_style_meta_2019_2020.json"
+    build_points_gdf().to_file(pts, driver="GeoJSON")
+    meta.write_text(json.dumps({"min_total_kw": 0, "max_total_kw": 1000}), encoding="utf-8")
+
+    reads = []
+    real_read_file = gpd.read_file
+
+    def counting_read_file(path, *args, **kwargs):
+        reads.append(Path(path).name)
+        return real_read_file(path, *args, **kwargs)
+
+    monkeypatch.setattr(mod, "BASE", base)
+    monkeypatch.setattr(mod, "GLOBAL_META", base / "missing_global_meta.json")
+    monkeypatch.setattr(mod, "GLOBAL_SIZING", True)
+    monkeypatch.setattr(mod.gpd, "read_file", counting_read_file)
+
+    mod.main()
+
+    assert reads.count(pts.name) == 1
+    assert (bin_dir / "de_state_pie_2019_2020.geojson").exists()